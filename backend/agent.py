@@ -0,0 +1,167 @@
+# backend/agent.py
+"""
+Driver agent: runs the UI automation for the WhatsApp session on this desktop
+on behalf of an API server, possibly on another machine. It registers with the
+server, long-polls it for work items (one driver call each), runs them on its
+driver and posts the results back. Attachments are downloaded from the server
+by content hash and cached in --files-dir.
+
+    python -m backend.agent --server http://192.168.1.10:5690 [--id desk-1] [--token SECRET] [--simulated]
+"""
+import argparse
+import json
+import logging
+import os
+import shutil
+import socket
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+from backend.clipboard import clipboard
+from backend.drivers import DesktopDriver, SimulatedDriver
+from backend.static import content_hash
+
+log = logging.getLogger("backend.agent")
+
+POLL_SECONDS = 25  # Long-poll wait; the server answers as soon as there is work
+RETRY_SECONDS = 5
+ACTIONS = ("open_chat", "send_message", "send_attachments", "report_to_admin", "close")
+
+
+class AgentClient:
+    """JSON over HTTP to the API server's /agents/ endpoints (stdlib only, so the agent bundles small)."""
+
+    def __init__(self, server: str, agent_id: str, token: str = None):
+        self.server = server.rstrip("/")
+        self.agent_id = agent_id
+        self.token = token
+
+    def _request(self, method: str, path: str, body=None, timeout: float = 30):
+        request = urllib.request.Request(f"{self.server}{path}", method=method,
+                                         data=None if body is None else json.dumps(body).encode("utf-8"),
+                                         headers={"Content-Type": "application/json"})
+        if self.token:
+            request.add_header("X-Agent-Token", self.token)
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            data = response.read()
+        return json.loads(data) if data else None
+
+    def register(self, name: str, driver: str) -> dict:
+        return self._request("POST", "/agents/register", {"agent_id": self.agent_id, "name": name, "driver": driver})
+
+    def unregister(self):
+        self._request("DELETE", f"/agents/{self.agent_id}")
+
+    def next_item(self):
+        return self._request("GET", f"/agents/{self.agent_id}/work?wait={POLL_SECONDS}", timeout=POLL_SECONDS + 30)
+
+    def report(self, item_id: int, result=None, error: str = None):
+        self._request("POST", f"/agents/{self.agent_id}/results/{item_id}", {"result": result, "error": error})
+
+    def download(self, file_hash: str, target: Path):
+        request = urllib.request.Request(f"{self.server}/agents/files/{file_hash}")
+        if self.token:
+            request.add_header("X-Agent-Token", self.token)
+        temporary = target.with_name(f"{target.name}.part")
+        with urllib.request.urlopen(request, timeout=600) as response, open(temporary, "wb") as f:
+            shutil.copyfileobj(response, f, 1024 * 1024)
+        os.replace(temporary, target)
+
+
+def local_files(client: AgentClient, files: list, files_dir: Path) -> list:
+    """The attachments as local paths, downloading the ones not cached yet (cache named by content hash)."""
+    files_dir.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for file in files:
+        # Keep the original name (WhatsApp shows it for documents) under a per-content folder
+        target = files_dir / file["hash"][:16] / file["name"]
+        if not target.exists() or target.stat().st_size != file["size"]:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            client.download(file["hash"], target)
+            if content_hash(target) != file["hash"]:
+                target.unlink()
+                raise RuntimeError(f"Download of {file['name']} is corrupt")
+        paths.append(str(target))
+    return paths
+
+
+def execute(driver, client: AgentClient, item: dict, files_dir: Path):
+    action, args = item["action"], item["args"]
+    if action not in ACTIONS:
+        raise ValueError(f"Unknown action {action!r}")
+    if action == "send_attachments":
+        return driver.send_attachments(local_files(client, args["files"], files_dir))
+    if action == "report_to_admin":
+        # JSON has no tuples: the reports are lists of (name, value) pairs
+        return driver.report_to_admin([tuple(pair) for pair in args["no_number"] or []] or None,
+                                      [tuple(pair) for pair in args["invalid_number"] or []],
+                                      args["batch_no"], args["admin_no"])
+    return getattr(driver, action)(**args)
+
+
+def run(client: AgentClient, driver, name: str, files_dir: Path, stop=None):
+    """Serve work items until `stop()` is true (or forever), re-registering whenever the server was unreachable."""
+    registered = False
+    while stop is None or not stop():
+        try:
+            if not registered:
+                client.register(name, driver.name)
+                registered = True
+                log.info("Registered with %s as %s", client.server, client.agent_id)
+            item = client.next_item()
+        except (urllib.error.URLError, ConnectionError, TimeoutError, OSError) as e:
+            if registered:
+                log.warning("Lost the server (%s), retrying in %d seconds", e, RETRY_SECONDS)
+            registered = False
+            time.sleep(RETRY_SECONDS)
+            continue
+        if not item:
+            continue
+
+        try:
+            result, error = execute(driver, client, item, files_dir), None
+        except Exception as e:
+            log.exception("Work item %s (%s) failed: %s", item["id"], item["action"], e)
+            result, error = None, str(e)
+        try:
+            client.report(item["id"], result, error)
+        except urllib.error.HTTPError as e:
+            if e.code == 404:
+                registered = False  # The server restarted or expired us: register again
+            log.warning("Could not report work item %s: %s", item["id"], e)
+        except (urllib.error.URLError, ConnectionError, TimeoutError, OSError) as e:
+            log.warning("Could not report work item %s: %s", item["id"], e)
+            registered = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description="WhatsApp driver agent")
+    parser.add_argument("--server", required=True, help="API server URL, e.g. http://192.168.1.10:5690")
+    parser.add_argument("--id", default=socket.gethostname(), help="agent (account) id, default: host name")
+    parser.add_argument("--name", help="display name, default: the id")
+    parser.add_argument("--token", default=os.environ.get("WHATSAPP_AGENT_TOKEN"),
+                        help="shared secret the server expects (WHATSAPP_AGENT_TOKEN)")
+    parser.add_argument("--files-dir", default=os.environ.get("AGENT_FILES_DIR", "./agent_files"),
+                        help="where downloaded attachments are cached")
+    parser.add_argument("--simulated", action="store_true", help="use the SimulatedDriver (no UI, for testing)")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s [%(levelname)s] %(name)s: %(message)s")
+    driver = SimulatedDriver() if args.simulated else DesktopDriver()
+    client = AgentClient(args.server, args.id, args.token)
+    try:
+        run(client, driver, args.name or args.id, Path(args.files_dir).resolve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        clipboard.restore()  # If it stopped in the middle of a campaign
+        try:
+            client.unregister()
+        except (urllib.error.URLError, OSError):
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+# backend/agents.py
+import itertools
+import logging
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from backend.config import Settings
+from backend.helper import wait_until
+from backend.jobs import checkpoint
+from backend.sharding import Account, register_account, unregister_account
+from backend.static import content_hash
+
+log = logging.getLogger(__name__)
+
+
+class AgentError(RuntimeError):
+    """A work item failed on the agent, or the agent went away before finishing it."""
+
+
+class WorkItem:
+    """One driver call for an agent to run, and its outcome once the agent reports it."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, action: str, args: dict):
+        self.id = next(self._ids)
+        self.action = action
+        self.args = args
+        self.result = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+    def finish(self, result=None, error: Optional[str] = None):
+        self.result = result
+        self.error = error
+        self.done.set()
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "action": self.action, "args": self.args}
+
+
+class Agent:
+    """A driver agent process (see agent.py) that pulls work items for the WhatsApp session on its desktop."""
+
+    def __init__(self, agent_id: str, name: str, driver: str):
+        self.id = agent_id
+        self.name = name
+        self.driver = driver
+        self.registered_at = time.time()
+        self.last_seen = time.time()
+        self.work: "queue.Queue[WorkItem]" = queue.Queue()
+        self.in_flight: Dict[int, WorkItem] = {}
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def connected(self) -> bool:
+        return bool(self.in_flight) or time.time() - self.last_seen < Settings.AGENT_TIMEOUT
+
+    def fail_pending(self, reason: str):
+        while True:
+            try:
+                self.work.get_nowait().finish(error=reason)
+            except queue.Empty:
+                break
+        for item in list(self.in_flight.values()):
+            item.finish(error=reason)
+        self.in_flight.clear()
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "driver": self.driver,
+            "connected": self.connected,
+            "last_seen": round(time.time() - self.last_seen, 1),
+            "queued": self.work.qsize(),
+            "in_flight": len(self.in_flight),
+            "completed": self.completed,
+            "failed": self.failed,
+        }
+
+
+class AgentRegistry:
+    """
+    The agents connected to this API server. Each one is also registered as a
+    sending Account, so campaigns shard contacts across agents the same way as
+    across local sessions.
+    """
+
+    def __init__(self):
+        self.agents: Dict[str, Agent] = {}
+        self.shared_files: Dict[str, str] = {}  # Content hash -> local path, for agents to download
+        self._lock = threading.Lock()
+
+    def register(self, agent_id: str, name: Optional[str] = None, driver: str = "desktop") -> Agent:
+        with self._lock:
+            previous = self.agents.get(agent_id)
+            if previous is not None:
+                # The agent restarted: whatever it was doing is lost
+                previous.fail_pending(f"Agent {agent_id} restarted")
+            agent = self.agents[agent_id] = Agent(agent_id, name or agent_id, driver)
+        register_account(Account(agent_id, lambda: RemoteDriver(agent_id)))
+        log.info("Agent %s registered (%s driver)", agent_id, driver)
+        return agent
+
+    def unregister(self, agent_id: str):
+        with self._lock:
+            agent = self.agents.pop(agent_id, None)
+        if agent is not None:
+            agent.fail_pending(f"Agent {agent_id} disconnected")
+            unregister_account(agent_id)
+            log.info("Agent %s unregistered", agent_id)
+
+    def expire(self):
+        """Forget agents that stopped polling."""
+        for agent in list(self.agents.values()):
+            if not agent.connected:
+                log.warning("Agent %s not seen for %.0f seconds", agent.id, time.time() - agent.last_seen)
+                self.unregister(agent.id)
+
+    def get(self, agent_id: str) -> Optional[Agent]:
+        return self.agents.get(agent_id)
+
+    def connected(self) -> List[Agent]:
+        self.expire()
+        return [agent for agent in self.agents.values() if agent.connected]
+
+    def next_item(self, agent_id: str, wait: float) -> Optional[WorkItem]:
+        """Long poll: the agent's next work item, or None after `wait` seconds without one."""
+        agent = self.agents[agent_id]
+        deadline = time.monotonic() + wait
+        try:
+            while True:
+                agent.last_seen = time.time()
+                try:
+                    item = agent.work.get(timeout=max(deadline - time.monotonic(), 0))
+                except queue.Empty:
+                    return None
+                if not item.done.is_set():  # Not given up on (cancelled job, timeout) while it was queued
+                    agent.in_flight[item.id] = item
+                    return item
+        finally:
+            agent.last_seen = time.time()
+
+    def complete(self, agent_id: str, item_id: int, result=None, error: Optional[str] = None) -> bool:
+        agent = self.agents[agent_id]
+        agent.last_seen = time.time()
+        item = agent.in_flight.pop(item_id, None)
+        if item is None:
+            return False
+        if error is None:
+            agent.completed += 1
+        else:
+            agent.failed += 1
+        item.finish(result, error)
+        return True
+
+    def submit(self, agent_id: str, action: str, args: dict, timeout: Optional[float] = None):
+        """Queue a driver call for the agent and wait for its result; inside a job the wait is cancellable."""
+        agent = self.agents.get(agent_id)
+        if agent is None or not agent.connected:
+            raise AgentError(f"Agent {agent_id} is not connected")
+        item = WorkItem(action, args)
+        agent.work.put(item)
+        try:
+            finished = wait_until(item.done.is_set, timeout or Settings.AGENT_ACTION_TIMEOUT, interval=0.05)
+        except BaseException:
+            item.finish(error="cancelled")  # JobCancelled: the agent skips it if it hasn't picked it up yet
+            raise
+        if not finished:
+            item.finish(error="timed out")
+            agent.in_flight.pop(item.id, None)
+            raise AgentError(f"Agent {agent_id} did not finish {action} in time")
+        if item.error is not None:
+            raise AgentError(f"{action} failed on agent {agent_id}: {item.error}")
+        return item.result
+
+    def share_file(self, path) -> dict:
+        """Make a local file downloadable by agents, by content hash."""
+        file_hash = content_hash(path)
+        self.shared_files[file_hash] = str(path)
+        return {"hash": file_hash, "name": Path(path).name, "size": Path(path).stat().st_size}
+
+
+registry = AgentRegistry()
+
+
+class RemoteDriver:
+    """
+    Driver whose actions run on a driver agent, possibly on another desktop.
+    Same interface as DesktopDriver; attachments are sent by content hash and
+    downloaded by the agent from GET /agents/files/{hash}.
+    """
+
+    name = "remote"
+
+    def __init__(self, agent_id: str):
+        self.agent_id = agent_id
+
+    def _call(self, action: str, **args):
+        checkpoint()
+        return registry.submit(self.agent_id, action, args)
+
+    def open_chat(self, number):
+        return self._call("open_chat", number=number)
+
+    def send_message(self, message):
+        return self._call("send_message", message=message)
+
+    def send_attachments(self, file_paths):
+        return self._call("send_attachments", files=[registry.share_file(path) for path in file_paths])
+
+    def report_to_admin(self, no_number, invalid_number, batch_no, admin_no):
+        return self._call("report_to_admin", no_number=no_number, invalid_number=invalid_number,
+                          batch_no=batch_no, admin_no=admin_no)
+
+    def close(self):
+        return self._call("close")
@@ -0,0 +1,45 @@
+# backend/attachments.py
+import os
+from typing import List, Optional
+
+from backend.config import Settings
+
+VIDEO_EXTENSIONS = ('.mp4', '.mkv', '.avi', '.mov', '.wmv', '.3gp')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png')
+MAX_FILES_PER_PASTE = 30  # WhatsApp's limit for one attachment preview
+
+
+def attachment_kind(file_path) -> str:
+    extension = os.path.splitext(str(file_path))[1].lower()
+    if extension in VIDEO_EXTENSIONS:
+        return "video"
+    if extension in IMAGE_EXTENSIONS:
+        return "image"
+    return "document"
+
+
+def paste_groups(file_paths, mode: Optional[str] = None) -> List[list]:
+    """
+    Split a recipient's files into the groups pasted and sent together. In
+    "batch" mode that is every image and video in one paste and every document
+    in another (WhatsApp won't mix them in one preview), at most
+    MAX_FILES_PER_PASTE files each. In "per_file" mode it is one file per paste.
+    """
+    if (mode or Settings.ATTACHMENT_MODE) == "per_file":
+        return [[file_path] for file_path in file_paths]
+    media = [file_path for file_path in file_paths if attachment_kind(file_path) != "document"]
+    documents = [file_path for file_path in file_paths if attachment_kind(file_path) == "document"]
+    return [
+        group[start:start + MAX_FILES_PER_PASTE]
+        for group in (media, documents) if group
+        for start in range(0, len(group), MAX_FILES_PER_PASTE)
+    ]
+
+
+def group_kind(file_paths) -> str:
+    """The kind a paste of `file_paths` is waited for and learned under: that of its slowest file type."""
+    kinds = {attachment_kind(file_path) for file_path in file_paths}
+    for kind in ("video", "document", "image"):
+        if kind in kinds:
+            return kind
+    return "document"
@@ -0,0 +1,70 @@
+# backend/benchmarks/__main__.py
+"""
+Runs the benchmarks that check a budget or an invariant, each in its own
+process, and exits non-zero when any of them fails: what to run before a
+release or in CI. They are run small (see CHECKS) so the whole set takes a
+few minutes; --full runs each one with its own defaults instead.
+
+Benchmarks that only report numbers (attachment_modes, export, json_payload,
+phone_numbers, spreadsheet_import, text_entry) aren't run, nor launch_time,
+which needs the PyInstaller builds.
+
+    python -m backend.benchmarks [--full] [--only stop_latency soak]
+"""
+import argparse
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[2]
+TIMEOUT = 1800  # seconds, per benchmark
+
+# Benchmark module, arguments for the quick run
+CHECKS = [
+    ("stop_latency", []),
+    ("startup", []),
+    ("sharding", []),
+    ("agents_loopback", []),
+    ("load_test", ["--requests", "30", "--csv-rows", "2000"]),
+    ("soak", ["--hours", "6", "--contacts", "100"]),
+]
+
+
+def run(name, arguments):
+    """(passed, seconds) of running the benchmark; its output goes straight to ours."""
+    started = time.perf_counter()
+    try:
+        completed = subprocess.run([sys.executable, "-m", f"backend.benchmarks.{name}", *arguments],
+                                   cwd=ROOT, timeout=TIMEOUT)
+        passed = completed.returncode == 0
+    except subprocess.TimeoutExpired:
+        print(f"[ERROR]: {name} still running after {TIMEOUT} s")
+        passed = False
+    return passed, time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--full", action="store_true", help="run each benchmark with its own defaults")
+    parser.add_argument("--only", nargs="+", choices=[name for name, _ in CHECKS], metavar="NAME")
+    args = parser.parse_args()
+
+    results = []
+    for name, arguments in CHECKS:
+        if args.only and name not in args.only:
+            continue
+        arguments = [] if args.full else arguments
+        print(f"=== {name} {' '.join(arguments)}".rstrip(), flush=True)
+        passed, seconds = run(name, arguments)
+        results.append((name, passed, seconds))
+
+    print()
+    for name, passed, seconds in results:
+        print(f"{name:16s} {'ok' if passed else 'FAILED':6s} {seconds:7.1f} s")
+    if not all(passed for _, passed, _ in results):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,111 @@
+# backend/benchmarks/agents_loopback.py
+"""
+End to end run of the API server / driver agent split on one machine.
+
+Starts the server (uvicorn in a thread) and --agents `python -m backend.agent
+--simulated` processes against it, then sends an attachment campaign of
+--contacts contacts with a small media file through POST /send-attachments/,
+sharded across the agents. Checks every contact was sent, that each agent ran
+work and downloaded the attachment, and times --calls driver actions that
+take no time on the agent, i.e. the round-trip overhead of the split.
+
+    python -m backend.benchmarks.agents_loopback [--agents 2] [--contacts 12]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+from backend.main import app  # noqa: F401  First: it sets up the storage directories that Settings reads
+from backend.agents import registry
+from backend.benchmarks.export import serve
+from backend.config import Settings
+
+
+def start_agents(base_url, count, files_dir):
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (os.getcwd(), os.environ.get("PYTHONPATH")))))
+    return [subprocess.Popen([sys.executable, "-m", "backend.agent", "--server", base_url, "--id", f"loopback-{i + 1}",
+                              "--simulated", "--files-dir", str(Path(files_dir) / f"agent-{i + 1}")],
+                             env=environment, stdout=subprocess.DEVNULL)
+            for i in range(count)]
+
+
+def wait_for_agents(client, agent_ids, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if set(agent_ids) <= {agent["id"] for agent in client.get("/agents/").json()}:
+            return
+        time.sleep(0.2)
+    raise TimeoutError(f"agents {agent_ids} did not register")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--agents", type=int, default=2)
+    parser.add_argument("--contacts", type=int, default=12)
+    parser.add_argument("--calls", type=int, default=50)
+    args = parser.parse_args()
+
+    agent_ids = [f"loopback-{i + 1}" for i in range(args.agents)]
+    media = Settings.UPLOAD_DIR / "loopback_media.png"
+    media.write_bytes(os.urandom(64 * 1024))
+    contacts = [{"name": f"Contact_{i}", "number": f"+92300{i:07d}"} for i in range(args.contacts)]
+
+    server, thread, base_url = serve()
+    with tempfile.TemporaryDirectory() as files_dir, httpx.Client(base_url=base_url, timeout=120) as client:
+        agents = start_agents(base_url, args.agents, files_dir)
+        try:
+            wait_for_agents(client, agent_ids)
+            started = time.perf_counter()
+            response = client.post("/send-attachments/", data={
+                "data": json.dumps(contacts),
+                "media_paths": json.dumps([media.name]),
+                "message": "Hello {name}",
+                "admin_no": "+923009999999",
+                "min_batch_size": args.contacts, "max_batch_size": args.contacts,
+                "min_batch_delay": 0, "max_batch_delay": 0,
+                "account_ids": json.dumps(agent_ids),
+                "skip_recent_days": 0,
+            })
+            response.raise_for_status()
+            records = [json.loads(line) for line in response.text.splitlines() if line.strip()]
+            elapsed = time.perf_counter() - started
+
+            sent = [r for r in records if r.get("status") == "success"]
+            assert len(sent) == args.contacts, f"{len(sent)} of {args.contacts} contacts sent: {records[-3:]}"
+            status = {agent["id"]: agent for agent in client.get("/agents/").json()}
+            for agent_id in agent_ids:
+                assert status[agent_id]["completed"] > 0 and status[agent_id]["failed"] == 0, status[agent_id]
+                assert list(Path(files_dir, f"agent-{agent_id.split('-')[-1]}").rglob(media.name)), \
+                    f"{agent_id} did not download the attachment"
+
+            actions = sum(agent["completed"] for agent in status.values())
+            print(f"{args.contacts} contacts over {args.agents} agents: {elapsed:.2f} s, {actions} driver actions "
+                  f"through the agents")
+            for agent_id in agent_ids:
+                print(f"  {agent_id}: {status[agent_id]['completed']} actions")
+
+            # SimulatedDriver.close doesn't sleep: what's left is queueing, the long poll and the HTTP round trips
+            started = time.perf_counter()
+            for _ in range(args.calls):
+                registry.submit(agent_ids[0], "close", {})
+            overhead = (time.perf_counter() - started) / args.calls
+            print(f"  round trip of a driver action through an agent: {overhead * 1000:.1f} ms")
+        finally:
+            for agent in agents:
+                agent.terminate()
+            for agent in agents:
+                agent.wait(timeout=30)
+            server.should_exit = True
+            thread.join()
+            media.unlink()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+# backend/benchmarks/attachment_modes.py
+"""
+Per-contact attachment time against file count, one paste per file
+("per_file") versus one paste for all of a recipient's media ("batch").
+
+By default the paste cycles are simulated: each paste costs the driver's
+pacing pauses plus the wait model's typical ready and sent times for the
+pasted files (backend/wait_model.py), run through the SimulatedDriver at
+--time-scale and reported scaled back to real seconds.
+
+With --live NUMBER it drives the real WhatsApp desktop app on Windows instead,
+sending the given --files to NUMBER (use a test chat!) in both modes.
+
+    python -m backend.benchmarks.attachment_modes [--counts 1 2 3 5 10] [--size-kb 300]
+    python -m backend.benchmarks.attachment_modes --live +923001234567 --files a.jpg b.jpg c.mp4
+"""
+import argparse
+import itertools
+import os
+import time
+
+from backend.attachments import group_kind
+from backend.drivers import DesktopDriver, SimulatedDriver
+from backend.wait_model import wait_model
+
+MODES = ("per_file", "batch")
+# Midpoints of the driver's pauses around one paste: copy -> Ctrl+V, preview -> Enter, after the send
+PASTE_PACING = (0.4 + 0.9) / 2 + (0.3 + 0.8) / 2 + (0.5 + 1.2) / 2
+
+
+def modeled_paste_seconds(size_bytes):
+    def paste_seconds(group):
+        kind = group_kind(group)
+        size = size_bytes * len(group)
+        return PASTE_PACING + wait_model.typical(kind, "ready", size) + wait_model.typical(kind, "sent", size)
+    return paste_seconds
+
+
+def simulate(mode, files, size_bytes, time_scale):
+    paste_seconds = modeled_paste_seconds(size_bytes)
+    driver = SimulatedDriver(attachment_mode=mode, paste_delay=lambda group: paste_seconds(group) * time_scale)
+    started = time.perf_counter()
+    driver.send_attachments(files)
+    return (time.perf_counter() - started) / time_scale
+
+
+def live(mode, files, number):
+    from backend.config import Settings
+
+    Settings.ATTACHMENT_MODE = mode
+    driver = DesktopDriver()
+    if driver.open_chat(number) is not True:
+        raise RuntimeError(f"could not open the chat with {number}")
+    started = time.perf_counter()
+    driver.send_attachments([os.path.abspath(path) for path in files])
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--counts", type=int, nargs="+", default=[1, 2, 3, 5, 10])
+    parser.add_argument("--size-kb", type=int, default=300, help="simulated size of each image")
+    parser.add_argument("--time-scale", type=float, default=0.02)
+    parser.add_argument("--live", metavar="NUMBER", help="send for real to this number (Windows only)")
+    parser.add_argument("--files", nargs="+", help="files to send with --live, reused in a cycle")
+    args = parser.parse_args()
+    if args.live and not args.files:
+        parser.error("--live needs --files")
+
+    print(f"{'files':>5}  " + "  ".join(f"{mode:>10}" for mode in MODES) + "   speed-up")
+    for count in args.counts:
+        timings = {}
+        for mode in MODES:
+            if args.live:
+                files = list(itertools.islice(itertools.cycle(args.files), count))
+                timings[mode] = live(mode, files, args.live)
+            else:
+                files = [f"image_{i}.jpg" for i in range(count)]
+                timings[mode] = simulate(mode, files, args.size_kb * 1024, args.time_scale)
+        print(f"{count:>5}  " + "  ".join(f"{timings[mode]:>9.1f}s" for mode in MODES)
+              + f"   {timings['per_file'] / timings['batch']:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
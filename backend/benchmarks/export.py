@@ -0,0 +1,159 @@
+# backend/benchmarks/export.py
+"""
+Streaming export of a large campaign history.
+
+Writes --rows result rows for a throwaway job into the result store, then
+for CSV and XLSX:
+1. renders the export in-process, reporting the time to the first chunk and
+   to the end, the bytes and the peak Python memory of the export itself;
+2. downloads it from a live server (uvicorn in a thread) through
+   GET /jobs/{job_id}/export while timing GET /api/health/simple, to show the
+   event loop keeps answering during the export.
+Checks that the XLSX sheet holds every row; the rows are deleted afterwards.
+
+    python -m backend.benchmarks.export [--rows 100000]
+"""
+import argparse
+import io
+import statistics
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+import zipfile
+from xml.etree.ElementTree import iterparse
+
+import httpx
+import uvicorn
+
+from backend.main import app  # First: it sets up the storage directories that Settings reads
+from backend.benchmarks.startup import free_port
+from backend.export import FORMATS, format_rows
+from backend.results import COLUMNS, result_store
+
+STATUSES = ("success", "success", "success", "partial", "skipped", "error")
+
+
+def fill(job_id, count):
+    now = time.time()
+    rows = [
+        (job_id, "attachments", None, i // 25 + 1, f"Contact_{i}", f"+92300{i:07d}", STATUSES[i % len(STATUSES)],
+         "invalid_number" if i % len(STATUSES) == 4 else None, "benchmark row", None,
+         time.strftime("%d-%m-%Y %H:%M:%S"), now + i / 1000)
+        for i in range(count)
+    ]
+    conn = result_store._connect()
+    with conn:
+        conn.executemany(f"INSERT INTO results ({', '.join(COLUMNS)}) VALUES ({', '.join('?' * len(COLUMNS))})", rows)
+    conn.close()
+
+
+def remove(job_id):
+    conn = result_store._connect()
+    with conn:
+        conn.execute("DELETE FROM results WHERE job_id = ?", (job_id,))
+    conn.close()
+
+
+def render(export_format, job_id):
+    chunks_for, _ = FORMATS[export_format]
+    peak = baseline = 0
+    with tempfile.TemporaryFile() as output:
+        tracemalloc.start()
+        started = time.perf_counter()
+        first_chunk = None
+        for chunk in chunks_for(COLUMNS, format_rows(COLUMNS, result_store.iter_rows(job_id=job_id))):
+            if first_chunk is None:
+                first_chunk = time.perf_counter() - started
+            output.write(chunk)
+            # What the export held while producing this chunk, over what was allocated before it
+            peak = max(peak, tracemalloc.get_traced_memory()[1] - baseline)
+            del chunk
+            baseline = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        total = time.perf_counter() - started
+        tracemalloc.stop()
+        output.seek(0)
+        data = output.read()
+    return first_chunk, total, data, peak
+
+
+def serve():
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+    while not server.started:
+        time.sleep(0.05)
+    return server, thread, f"http://127.0.0.1:{port}"
+
+
+def download_while_probing(base_url, path):
+    """Download `path` and time health checks while it streams; returns (seconds, bytes, health latencies)."""
+    latencies = []
+    finished = threading.Event()
+
+    def probe():
+        with httpx.Client(base_url=base_url) as client:
+            while not finished.is_set():
+                started = time.perf_counter()
+                client.get("/api/health/simple")
+                latencies.append(time.perf_counter() - started)
+                time.sleep(0.05)
+
+    prober = threading.Thread(target=probe)
+    started = time.perf_counter()
+    size = 0
+    prober.start()
+    try:
+        with httpx.Client(base_url=base_url, timeout=None) as client, client.stream("GET", path) as response:
+            assert response.status_code == 200, response.read()[:200]
+            for chunk in response.iter_raw():
+                size += len(chunk)
+    finally:
+        finished.set()
+        prober.join()
+    return time.perf_counter() - started, size, latencies
+
+def sheet_rows(data):
+    with zipfile.ZipFile(io.BytesIO(data)) as archive, archive.open("xl/worksheets/sheet1.xml") as sheet:
+        return sum(1 for _, element in iterparse(sheet) if element.tag.endswith("}row"))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=100_000)
+    args = parser.parse_args()
+
+    job_id = f"benchmark-{uuid.uuid4().hex[:8]}"
+    fill(job_id, args.rows)
+    server, thread, base_url = serve()
+    print(f"{args.rows} rows")
+    try:
+        for export_format in FORMATS:
+            first_chunk, total, data, peak = render(export_format, job_id)
+            print(f"  {export_format:5s} render:   first chunk {first_chunk * 1000:6.1f} ms   total {total:6.2f} s   "
+                  f"{len(data) / 1024:8.1f} KiB   peak memory {peak / 1024 / 1024:5.2f} MiB")
+            if export_format == "xlsx":
+                rows = sheet_rows(data) - 1
+                assert rows == args.rows, f"the sheet has {rows} rows"
+
+            seconds, size, latencies = download_while_probing(base_url, f"/jobs/{job_id}/export?format={export_format}")
+            assert size == len(data), f"downloaded {size} bytes, rendered {len(data)}"
+            print(f"  {export_format:5s} download: total {seconds:6.2f} s   /api/health/simple during it: "
+                  f"median {statistics.median(latencies) * 1000:.1f} ms, max {max(latencies) * 1000:.1f} ms "
+                  f"({len(latencies)} checks)")
+
+        with httpx.Client(base_url=base_url) as client:
+            filtered = client.get(f"/jobs/{job_id}/export", params={"status": "skipped", "reason": "invalid_number"})
+        expected = sum(1 for i in range(args.rows) if i % len(STATUSES) == 4)
+        assert filtered.text.count("\n") - 1 == expected, "status/reason filter"
+    finally:
+        server.should_exit = True
+        thread.join()
+        remove(job_id)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+# backend/benchmarks/json_payload.py
+"""
+Response time and size of a 100k-contact list.
+
+Serves the same saved list through GET /api/contacts/load-list/{list_id} and
+the same contacts payload through a plain FastAPI route (dict return value,
+default JSONResponse: jsonable_encoder + json.dumps) for comparison, once per
+Accept-Encoding. Reports the median time and the bytes on the wire.
+
+    python -m backend.benchmarks.json_payload [--contacts 100000] [--runs 5]
+"""
+import argparse
+import json
+import statistics
+import time
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from backend.main import app  # First: it sets up the storage directories that Settings reads
+from backend.config import Settings
+from backend.middleware import brotli
+from backend.responses import FastJSONResponse
+
+LIST_ID = "_benchmark_contacts.json"
+
+
+def contacts_payload(count):
+    contacts = [{"name": f"Contact_{i}", "number": f"+92300{i:07d}"} for i in range(count)]
+    return {"name": "benchmark", "contacts": contacts, "created_at": "2024-01-01T00:00:00",
+            "contact_count": count}
+
+
+def measure(client, path, encoding, runs):
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        response = client.get(path, headers={"Accept-Encoding": encoding})
+        timings.append(time.perf_counter() - started)
+        assert response.status_code == 200, response.text[:200]
+    return statistics.median(timings), int(response.headers["content-length"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--contacts", type=int, default=100_000)
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    payload = contacts_payload(args.contacts)
+    list_path = Settings.CONTACTS_DIR / LIST_ID
+    with open(list_path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)  # The same format save-list writes
+
+    baseline = FastAPI()
+    baseline.get("/contacts")(lambda: payload)
+    fast = FastAPI()
+    fast.get("/contacts")(lambda: FastJSONResponse(payload))
+
+    # The same orjson payload through the app's middleware stack (compression, security headers)
+    app.get("/_benchmark/contacts")(lambda: FastJSONResponse(payload))
+    app_client = TestClient(app)
+
+    identity = ["identity"]
+    negotiated = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    cases = [
+        ("default JSONResponse (dict)", TestClient(baseline), "/contacts", identity),
+        ("FastJSONResponse", TestClient(fast), "/contacts", identity),
+        ("app: FastJSONResponse", app_client, "/_benchmark/contacts", negotiated),
+        ("app: load-list", app_client, f"/api/contacts/load-list/{LIST_ID}", negotiated),
+    ]
+
+    print(f"{args.contacts} contacts, median of {args.runs} runs")
+    try:
+        for label, client, path, encodings in cases:
+            for encoding in encodings:
+                seconds, size = measure(client, path, encoding, args.runs)
+                print(f"  {label:28s} {encoding:9s} {seconds * 1000:8.1f} ms {size / 1024:10.1f} KiB")
+    finally:
+        list_path.unlink(missing_ok=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+# backend/benchmarks/launch_time.py
+"""
+Launch time of the packaged backend, per PyInstaller build mode.
+
+Starts each built executable several times and measures the time until
+GET /api/health/simple first answers 200 - what the Electron shell waits on.
+The first launch of each mode is reported on its own (cold file cache, and for
+onefile the first extraction), the rest as min/median/max.
+
+Build both modes first, from the backend directory:
+
+    python build_backend.py --mode onedir
+    python build_backend.py --mode onefile
+
+then, from the repository root:
+
+    python -m backend.benchmarks.launch_time [--runs 5]
+"""
+import argparse
+import socket
+import statistics
+import sys
+import time
+from pathlib import Path
+
+from backend.benchmarks.startup import time_to_first_health
+from backend.config import Settings
+
+DIST_DIR = Path(__file__).resolve().parents[1] / "dist"
+EXECUTABLE = "backend.exe" if sys.platform == "win32" else "backend"
+BUILDS = {
+    "onedir": DIST_DIR / "backend" / EXECUTABLE,
+    "onefile": DIST_DIR / EXECUTABLE,
+}
+
+
+def wait_for_port_free(port, timeout=10.0):
+    """The executables always listen on Settings.BACKEND_PORT; don't start the next run until it's released."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with socket.socket() as sock:
+            if sock.connect_ex(("127.0.0.1", port)) != 0:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"port {port} is still in use")
+
+
+def measure(executable, runs):
+    timings = []
+    for _ in range(runs):
+        wait_for_port_free(Settings.BACKEND_PORT)
+        timings.append(time_to_first_health([str(executable)], Settings.BACKEND_PORT, cwd=executable.parent,
+                                            timeout=120))
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    found = {mode: path for mode, path in BUILDS.items() if path.exists()}
+    if not found:
+        print(f"No builds found in {DIST_DIR}; run build_backend.py --mode onedir/onefile first")
+        sys.exit(1)
+
+    for mode, path in BUILDS.items():
+        if mode not in found:
+            print(f"{mode:8s} not built ({path})")
+            continue
+        first, *rest = measure(path, args.runs)
+        size_mb = sum(f.stat().st_size for f in path.parent.rglob("*") if f.is_file()) / 1024 ** 2 \
+            if mode == "onedir" else path.stat().st_size / 1024 ** 2
+        line = f"{mode:8s} {size_mb:7.1f} MB  first launch {first:.2f} s"
+        if rest:
+            line += (f", then min {min(rest):.2f} s / median {statistics.median(rest):.2f} s"
+                     f" / max {max(rest):.2f} s over {len(rest)} runs")
+        print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+# backend/benchmarks/load_test.py
+"""
+HTTP load test of the non-sending API surface.
+
+Starts the server (uvicorn, in a fresh process) on throwaway storage
+(WHATSAPP_DATA_DIR in a temp dir) and drives it from --concurrency
+concurrent clients through these scenarios:
+
+- media-upload / pdf-upload: unique files of mixed sizes
+  (POST /media/upload, /pdf/upload);
+- contacts-csv: CSV uploads of --csv-rows contacts (POST /api/contacts/upload-csv);
+- lists-N: for contact lists of increasing size N, saving one
+  (POST /api/contacts/save-list), then listing all saved lists
+  (GET /api/contacts/saved-lists) and loading it (GET /api/contacts/load-list/...);
+- preview-N: POST /preview-message/ of datasets of increasing size N.
+
+Reports per scenario the throughput (requests/s and MB/s, both directions),
+latency percentiles, errors and the server's resident memory (peak during
+the scenario and after it; Linux only). --save writes the results as JSON,
+--compare prints the change against such a file, so a run before an
+optimization is the baseline for the run after it.
+
+Media optimization is off, so uploads measure the request path; --optimize
+turns it on.
+
+    python -m backend.benchmarks.load_test [--concurrency 8] [--requests 100] [--save baseline.json]
+    python -m backend.benchmarks.load_test --compare baseline.json
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.request
+import uuid
+
+import httpx
+
+from backend.benchmarks.startup import REPO_ROOT, free_port, stop
+
+KB, MB = 1024, 1024 * 1024
+MEDIA_SIZES = ((200 * KB, 70), (2 * MB, 25), (20 * MB, 5))  # (bytes, weight): mostly photos, some videos
+PDF_SIZES = ((100 * KB, 60), (1 * MB, 30), (5 * MB, 10))
+LIST_SIZES = (100, 1_000, 10_000, 50_000)
+PREVIEW_SIZES = (100, 1_000, 10_000, 50_000)
+
+
+class Server:
+    """The backend on throwaway storage, in its own process so its memory is measured alone."""
+
+    def __init__(self, data_dir, optimize=False):
+        self.port = free_port()
+        self.url = f"http://127.0.0.1:{self.port}"
+        environment = dict(os.environ, WHATSAPP_DATA_DIR=data_dir, PYTHONDONTWRITEBYTECODE="1",
+                           WHATSAPP_OPTIMIZE_MEDIA="1" if optimize else "0", WHATSAPP_LOG_LEVEL="WARNING")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(self.port),
+             "--log-level", "warning", "--no-access-log"],
+            cwd=REPO_ROOT, env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        self._wait_healthy()
+
+    def _wait_healthy(self, timeout=60.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if self.process.poll() is not None:
+                raise RuntimeError(f"server exited with code {self.process.returncode}")
+            try:
+                with urllib.request.urlopen(f"{self.url}/api/health/simple", timeout=0.5):
+                    return
+            except OSError:
+                time.sleep(0.05)
+        raise TimeoutError(f"no healthy response within {timeout:.0f} s")
+
+    def rss(self):
+        """Resident memory in bytes, None where /proc isn't available."""
+        try:
+            with open(f"/proc/{self.process.pid}/status") as f:
+                for line in f:
+                    if line.startswith("VmRSS:"):
+                        return int(line.split()[1]) * KB
+        except OSError:
+            return None
+
+    def stop(self):
+        stop(self.process)
+
+
+class MemorySampler:
+    """Peak resident memory of the server while a scenario runs."""
+
+    def __init__(self, server, interval=0.02):
+        self.server = server
+        self.interval = interval
+        self.peak = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            rss = self.server.rss()
+            if rss is not None:
+                self.peak = max(self.peak or 0, rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(int(len(values) * fraction), len(values) - 1)]
+
+
+async def drive(client, make_request, count, concurrency):
+    """Send `count` requests from `concurrency` concurrent clients; latencies, errors and bytes moved."""
+    latencies, errors, moved = [], [], 0
+    next_index = iter(range(count))
+
+    async def worker():
+        nonlocal moved
+        for index in next_index:
+            method, path, kwargs, sent = make_request(index)
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, **kwargs)
+                body = response.content
+            except httpx.HTTPError as e:
+                errors.append(repr(e))
+                continue
+            latencies.append(time.perf_counter() - started)
+            moved += sent + len(body)
+            if response.status_code >= 400:
+                errors.append(f"{response.status_code} {body[:200]!r}")
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return latencies, errors, moved
+
+
+def run_scenario(server, name, make_request, count, concurrency):
+    async def main():
+        async with httpx.AsyncClient(base_url=server.url, timeout=600,
+                                     limits=httpx.Limits(max_connections=concurrency)) as client:
+            return await drive(client, make_request, count, concurrency)
+
+    with MemorySampler(server) as memory:
+        started = time.perf_counter()
+        latencies, errors, moved = asyncio.run(main())
+        elapsed = time.perf_counter() - started
+    result = {
+        "requests": count,
+        "errors": len(errors),
+        "seconds": round(elapsed, 3),
+        "requests_per_second": round(len(latencies) / elapsed, 2),
+        "mb_per_second": round(moved / MB / elapsed, 2),
+        "p50_ms": round(statistics.median(latencies) * 1000, 1) if latencies else None,
+        "p90_ms": round(percentile(latencies, 0.90) * 1000, 1) if latencies else None,
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 1) if latencies else None,
+        "max_ms": round(max(latencies) * 1000, 1) if latencies else None,
+        "peak_rss_mb": round(memory.peak / MB, 1) if memory.peak else None,
+        "end_rss_mb": round(server.rss() / MB, 1) if server.rss() else None,
+    }
+    if errors:
+        result["first_error"] = errors[0]
+    return result
+
+
+def weighted_sizes(sizes, count, rng):
+    return rng.choices([size for size, _ in sizes], weights=[weight for _, weight in sizes], k=count)
+
+
+def upload_requests(path, field, extension, content_type, sizes, count, rng):
+    """Unique contents (a fresh prefix on a shared random block), so every upload takes the write path."""
+    block = rng.randbytes(max(size for size, _ in sizes))
+    chosen = weighted_sizes(sizes, count, rng)
+
+    def make(index):
+        content = uuid.uuid4().bytes + block[:chosen[index] - 16]
+        files = [(field, (f"load_{index}{extension}", content, content_type))]
+        return "POST", path, {"files": files}, len(content)
+    return make
+
+
+def contacts(count, rng):
+    return [{"name": f"Contact {i}", "number": f"0{rng.choice((300, 301, 321, 333, 345))}{rng.randrange(10**7):07d}"}
+            for i in range(count)]
+
+
+def csv_upload_requests(rows, rng):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(["Name", "Number"])
+    writer.writerows((entry["name"], entry["number"]) for entry in contacts(rows, rng))
+    content = buffer.getvalue().encode("utf-8")
+
+    def make(index):
+        return "POST", "/api/contacts/upload-csv", {"files": [("file", ("contacts.csv", content, "text/csv"))]}, \
+            len(content)
+    return make
+
+
+def json_request(method, path, payload):
+    body = json.dumps(payload).encode("utf-8")
+    headers = {"Content-Type": "application/json"}
+    return lambda index: (method, path, {"content": body, "headers": headers}, len(body))
+
+
+def get_request(path):
+    return lambda index: ("GET", path, {}, 0)
+
+
+def scenarios(args, rng):
+    """(name, request maker, requests) in order; the list scenarios save the list they then load."""
+    count, large = args.requests, max(args.requests // 10, 5)  # Fewer of the heavy requests
+    yield "media-upload", upload_requests("/media/upload", "media", ".jpg", "image/jpeg", MEDIA_SIZES, count, rng), count
+    yield "pdf-upload", upload_requests("/pdf/upload", "pdfs", ".pdf", "application/pdf", PDF_SIZES, count, rng), count
+    yield "contacts-csv", csv_upload_requests(args.csv_rows, rng), large
+    for size in LIST_SIZES:
+        repeat = count if size <= 1_000 else large
+        yield f"lists-{size}-save", json_request("POST", "/api/contacts/save-list",
+                                                 {"name": f"Load test {size}", "contacts": contacts(size, rng)}), 1
+        yield f"lists-{size}-index", get_request("/api/contacts/saved-lists"), repeat
+        yield f"lists-{size}-load", get_request(f"/api/contacts/load-list/Load_test_{size}.json"), repeat
+    for size in PREVIEW_SIZES:
+        dataset = [{"name": entry["name"], "number": entry["number"], "balance": rng.randrange(100, 100_000),
+                    "messageTemplate": "Dear {name}, your balance is {balance}."} for entry in contacts(size, rng)]
+        yield f"preview-{size}", json_request("POST", "/preview-message/", dataset), \
+            count if size <= 1_000 else large
+
+
+def print_results(results, baseline=None):
+    print(f"{'scenario':22s} {'req':>5s} {'err':>4s} {'req/s':>8s} {'MB/s':>7s} {'p50 ms':>8s} {'p90 ms':>8s} "
+          f"{'p99 ms':>8s} {'max ms':>8s} {'peak MB':>8s} {'end MB':>7s}")
+    for name, result in results.items():
+        def cell(key, width):
+            value = result[key]
+            return f"{'-' if value is None else value:>{width}}"
+        line = (f"{name:22s} {result['requests']:5d} {result['errors']:4d} {cell('requests_per_second', 8)} "
+                f"{cell('mb_per_second', 7)} {cell('p50_ms', 8)} {cell('p90_ms', 8)} {cell('p99_ms', 8)} "
+                f"{cell('max_ms', 8)} {cell('peak_rss_mb', 8)} {cell('end_rss_mb', 7)}")
+        previous = (baseline or {}).get(name)
+        if previous and previous.get("requests_per_second") and result["p50_ms"] and previous.get("p50_ms"):
+            line += (f"   vs baseline: {result['requests_per_second'] / previous['requests_per_second'] - 1:+.0%} req/s, "
+                     f"{result['p50_ms'] / previous['p50_ms'] - 1:+.0%} p50")
+        print(line)
+        if "first_error" in result:
+            print(f"{'':22s} first error: {result['first_error']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=100, help="per scenario; the heavy ones send a tenth")
+    parser.add_argument("--csv-rows", type=int, default=10_000)
+    parser.add_argument("--only", help="run only the scenarios whose name starts with this")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--optimize", action="store_true", help="keep upload-time media optimization on")
+    parser.add_argument("--save", help="write the results to this JSON file")
+    parser.add_argument("--compare", help="a JSON file written by --save to compare against")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)["results"]
+
+    rng = random.Random(args.seed)
+    results = {}
+    with tempfile.TemporaryDirectory(prefix="whatsapp-load-") as data_dir:
+        server = Server(data_dir, optimize=args.optimize)
+        try:
+            results["idle"] = {"requests": 0, "errors": 0, "seconds": 0, "requests_per_second": None,
+                               "mb_per_second": None, "p50_ms": None, "p90_ms": None, "p99_ms": None, "max_ms": None,
+                               "peak_rss_mb": round(server.rss() / MB, 1) if server.rss() else None,
+                               "end_rss_mb": round(server.rss() / MB, 1) if server.rss() else None}
+            for name, make_request, count in scenarios(args, rng):
+                if args.only and not name.startswith(args.only):
+                    continue
+                # Saving a list is a single request: it runs alone so the next scenario finds the list
+                results[name] = run_scenario(server, name, make_request, count, 1 if name.endswith("-save") else
+                                             args.concurrency)
+        finally:
+            server.stop()
+
+    print(f"concurrency {args.concurrency}, {args.requests} requests per scenario")
+    print_results(results, baseline)
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump({"concurrency": args.concurrency, "requests": args.requests, "csv_rows": args.csv_rows,
+                       "results": results}, f, indent=2)
+    if any(result["errors"] for result in results.values()):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+# backend/benchmarks/phone_numbers.py
+"""
+Phone-number normalization over a large contact list.
+
+Generates --numbers numbers in the formats contact CSVs actually contain
+(0300-1234567, +92 300 1234567, 923001234567, 3001234567.0 from pandas,
+0092..., blanks), with --unique distinct numbers, and times:
+- the old helper.clean_number (str(int(float(n))) then +92 prefixing),
+- phone.normalize with an empty cache (every distinct number parsed once),
+- phone.normalize again (numbers seen before, as on re-upload or save),
+- phone.contact_number on canonicalized contacts, which is all the send path does.
+Also counts the inputs the old function rejected or got wrong.
+
+    python -m backend.benchmarks.phone_numbers [--numbers 1000000] [--unique 200000]
+"""
+import argparse
+import random
+import time
+
+from backend.phone import _normalize, canonicalize, contact_number, normalize
+
+FORMATS = (
+    lambda n: f"0{n[:3]}-{n[3:]}",
+    lambda n: f"+92 {n[:3]} {n[3:]}",
+    lambda n: f"92{n}",
+    lambda n: f"{n}.0",
+    lambda n: f"0092{n}",
+    lambda n: f"0{n}",
+    lambda n: n,
+)
+
+
+def legacy_clean_number(number):
+    """helper.clean_number before phone.normalize replaced it."""
+    number = str(int(float(number)))
+    if number.startswith("+92"):
+        return number
+    elif number.startswith("92"):
+        return "+" + number
+    elif number.startswith("0"):
+        return "+92" + number[1:]
+    else:
+        return "+92" + number
+
+
+def sample_numbers(count, unique, seed=7):
+    rng = random.Random(seed)
+    pool = [f"3{rng.randrange(10**9):09d}" for _ in range(unique)]
+    numbers = []
+    for _ in range(count):
+        if rng.random() < 0.01:
+            numbers.append(rng.choice(("", "nan", "0")))
+        else:
+            numbers.append(rng.choice(FORMATS)(rng.choice(pool)))
+    return numbers
+
+
+def timed(label, function, numbers):
+    started = time.perf_counter()
+    results = [function(number) for number in numbers]
+    elapsed = time.perf_counter() - started
+    print(f"  {label:44s} {elapsed:6.2f} s  {elapsed / len(numbers) * 1e9:7.0f} ns/number")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--numbers", type=int, default=1_000_000)
+    parser.add_argument("--unique", type=int, default=200_000)
+    args = parser.parse_args()
+
+    numbers = sample_numbers(args.numbers, args.unique)
+    print(f"{args.numbers} numbers, {args.unique} distinct")
+
+    def legacy(number):
+        try:
+            return legacy_clean_number(number)
+        except ValueError:
+            return None
+
+    legacy_results = timed("old clean_number", legacy, numbers)
+    _normalize.cache_clear()
+    results = timed("normalize, empty cache", normalize, numbers)
+    timed("normalize, numbers seen before", normalize, numbers)
+    contacts = canonicalize({"number": number} for number in numbers)
+    timed("contact_number on canonicalized contacts", contact_number, contacts)
+
+    rejected = sum(1 for old, new in zip(legacy_results, results) if old is None and new is not None)
+    wrong = sum(1 for old, new in zip(legacy_results, results) if old is not None and new is not None and old != new)
+    garbage = sum(1 for old, new in zip(legacy_results, results) if old is not None and new is None)
+    print(f"  old clean_number: {rejected} valid numbers rejected, {wrong} normalized differently, "
+          f"{garbage} blanks/zeros turned into numbers")
+    print(f"  cache: {_normalize.cache_info()}")
+
+
+if __name__ == "__main__":
+    main()
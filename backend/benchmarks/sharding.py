@@ -0,0 +1,74 @@
+# backend/benchmarks/sharding.py
+"""
+Runs a sharded attachment campaign across several simulated accounts and
+checks the scheduler's guarantees:
+
+- every contact is handled exactly once, by the account it hashes to
+- assignment is stable when the contact list is reordered
+- progress and reports are merged per account
+
+    python -m backend.benchmarks.sharding --accounts 3 --contacts 24
+"""
+import argparse
+import random
+import sys
+import time
+from collections import Counter
+
+from backend.drivers import SimulatedDriver
+from backend.jobs import create_job
+from backend.sharding import Account, assign_account, register_account, shard_contacts, sharded_attachment_campaign
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--accounts", type=int, default=3)
+    parser.add_argument("--contacts", type=int, default=24)
+    args = parser.parse_args()
+
+    drivers = {}
+
+    def driver_for(account_id):
+        def factory():
+            drivers[account_id] = SimulatedDriver(invalid_numbers={"+923000000007"})
+            return drivers[account_id]
+        return factory
+
+    account_ids = [f"sim-{i + 1}" for i in range(args.accounts)]
+    for account_id in account_ids:
+        register_account(Account(account_id, driver_for(account_id), min_batch_size=4, max_batch_size=6,
+                                 min_batch_delay=1, max_batch_delay=2))
+
+    contacts = [{"name": f"Contact_{i}", "number": f"+9230000000{i:02d}", "messageTemplate": "Hello {name}"}
+                for i in range(args.contacts)]
+    shards = shard_contacts(contacts, account_ids)
+    reshuffled = shard_contacts(random.sample(contacts, len(contacts)), account_ids)
+    assert all({c["number"] for c in shards[a]} == {c["number"] for c in reshuffled[a]} for a in account_ids)
+
+    job = create_job("attachments")
+    started = time.perf_counter()
+    job.start(lambda: sharded_attachment_campaign(account_ids, contacts, [], [], "+923000000099"))
+    job.join()
+    elapsed = time.perf_counter() - started
+
+    contact_records = [r for r in job.results if r.get("status") != "batch_complete"]
+    handled = Counter(r["number"] for r in contact_records)
+    assert job.status == "completed", job.status
+    assert len(handled) == len(contacts) and set(handled.values()) == {1}, handled
+    for record in contact_records:
+        assert record["account"] == assign_account(record["number"], account_ids)
+    for account_id, driver in drivers.items():
+        opened = [number for action, number in driver.actions if action == "open_chat"]
+        assert all(assign_account(number, account_ids) == account_id for number in opened)
+
+    print(f"{len(contacts)} contacts over {len(account_ids)} simulated accounts in {elapsed:.1f} s")
+    for account_id, report in sorted(job.summary().items()):
+        print(f"  {account_id}: {report['statuses']}, progress {job.progress.get(account_id)}")
+
+
+if __name__ == "__main__":
+    try:
+        main()
+    except AssertionError as e:
+        print(f"[ERROR]: Sharding check failed: {e}")
+        sys.exit(1)
@@ -0,0 +1,214 @@
+# backend/benchmarks/soak.py
+"""
+Soak test: a simulated day of campaigns, watching for memory and handle leaks.
+
+Runs attachment campaigns of --contacts contacts back to back through the
+SimulatedDriver until --hours of campaign time have passed on a compressed
+clock: every pacing sleep, cool-down and driver action is slept --speedup
+times shorter, so a 24-hour day takes minutes. Records go through the real
+job machinery (result store, delivery history, rate limiter, metrics), on
+throwaway storage. When OpenCV is installed every campaign also generates
+video thumbnails (of --video, else of a broken file, which takes the error
+path); on Windows with --image it also copies that image to the clipboard.
+
+After each campaign it collects garbage and samples the resident memory,
+the open file descriptors (handles on Windows) and the live Python objects.
+Exits non-zero, listing the object types that grew most, if any of them grew
+by more than its threshold between the end of the --warmup campaigns and the
+end of the run.
+
+    python -m backend.benchmarks.soak [--hours 24] [--speedup 3600] [--contacts 300]
+"""
+import atexit
+import os
+import shutil
+import tempfile
+
+# Before the backend reads its storage locations: the soak writes nowhere permanent
+if "WHATSAPP_DATA_DIR" not in os.environ:
+    os.environ["WHATSAPP_DATA_DIR"] = tempfile.mkdtemp(prefix="whatsapp-soak-")
+    atexit.register(shutil.rmtree, os.environ["WHATSAPP_DATA_DIR"], ignore_errors=True)
+
+import argparse
+import gc
+import random
+import sys
+import time
+from collections import Counter
+
+from backend.main import app  # noqa: F401  First: it sets up the storage directories that Settings reads
+from backend import jobs as job_registry
+from backend.campaign import attachment_campaign
+from backend.clipboard import clipboard
+from backend.config import Settings
+from backend.drivers import SimulatedDriver
+from backend.helper import copy_file_to_clipboard, generate_video_thumbnail
+from backend.jobs import create_job
+from backend.rate_limit import rate_limiter
+
+ACCOUNT = "soak"
+MB = 1024 * 1024
+
+
+class CompressedClock:
+    """Campaign time for jobs whose sleeps are `speedup` times shorter than they ask for."""
+
+    def __init__(self, speedup: float):
+        self.speedup = speedup
+        self.started = time.monotonic()
+        self.slept = 0.0  # Campaign seconds asked for
+
+    def attach(self, job):
+        real_sleep = job.sleep
+
+        def sleep(seconds, pausable=False):
+            self.slept += max(seconds, 0)
+            real_sleep(seconds / self.speedup, pausable)
+
+        job.sleep = sleep  # Job.wait_until and every pacing helper sleep through it
+        return job
+
+    @property
+    def hours(self) -> float:
+        real = time.monotonic() - self.started
+        return (real + self.slept * (1 - 1 / self.speedup)) / 3600
+
+
+def resident_memory():
+    """Resident memory of this process in bytes, None where it can't be read."""
+    if sys.platform == "win32":
+        import ctypes
+        from ctypes import wintypes
+
+        class Counters(ctypes.Structure):
+            _fields_ = [("cb", wintypes.DWORD), ("PageFaultCount", wintypes.DWORD)] + [
+                (name, ctypes.c_size_t) for name in ("PeakWorkingSetSize", "WorkingSetSize", "QuotaPeakPagedPoolUsage",
+                                                     "QuotaPagedPoolUsage", "QuotaPeakNonPagedPoolUsage",
+                                                     "QuotaNonPagedPoolUsage", "PagefileUsage", "PeakPagefileUsage")]
+        counters = Counters(cb=ctypes.sizeof(Counters))
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        if ctypes.windll.psapi.GetProcessMemoryInfo(process, ctypes.byref(counters), counters.cb):
+            return counters.WorkingSetSize
+        return None
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+
+
+def open_handles():
+    """Open file descriptors (handles on Windows), None where they can't be counted."""
+    if sys.platform == "win32":
+        import ctypes
+        count = ctypes.c_ulong()
+        process = ctypes.windll.kernel32.GetCurrentProcess()
+        return count.value if ctypes.windll.kernel32.GetProcessHandleCount(process, ctypes.byref(count)) else None
+    for fd_dir in ("/proc/self/fd", "/dev/fd"):
+        try:
+            return len(os.listdir(fd_dir))
+        except OSError:
+            continue
+    return None
+
+
+def sample():
+    gc.collect()
+    objects = gc.get_objects()
+    return {"rss": resident_memory(), "handles": open_handles(), "objects": len(objects),
+            "types": Counter(type(o).__name__ for o in objects)}
+
+
+def media_extras(args, thumbnails):
+    """The upload and paste helpers the simulated campaign doesn't reach."""
+    try:
+        import cv2  # noqa: F401
+    except ImportError:
+        pass
+    else:
+        video = args.video or str(Settings.UPLOAD_DIR / "soak_broken.mp4")
+        for i in range(args.thumbnails):
+            generate_video_thumbnail(video, str(Settings.THUMBNAIL_DIR / f"soak_{i}.jpg"))
+        thumbnails.append(args.thumbnails)
+    if args.image and sys.platform == "win32":
+        for _ in range(args.thumbnails):
+            copy_file_to_clipboard(args.image)
+            clipboard.restore()  # Else every copy but the first is skipped as unchanged
+
+
+def run_campaign(clock, index, args, media_name, rng):
+    contacts = [{"name": f"Contact {index}-{i}", "number": f"+92300{rng.randrange(10**7):07d}",
+                 "messageTemplate": "Hello {name}, here is this week's catalogue."} for i in range(args.contacts)]
+    invalid = {contact["number"] for contact in rng.sample(contacts, max(args.contacts // 50, 1))}
+    driver = SimulatedDriver(invalid_numbers=invalid, action_delay=(0.5, 2.0))
+    job = clock.attach(create_job("attachments"))
+    job.start(lambda: attachment_campaign(driver, contacts, [media_name], [], "+923009999999",
+                                          account_id=ACCOUNT, skip_recent_days=1))
+    job.join()
+    if job.status != "completed":
+        raise RuntimeError(f"campaign {index} {job.status}: {job.results[-1:]}")
+    return len(job.results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--hours", type=float, default=24)
+    parser.add_argument("--speedup", type=float, default=3600)
+    parser.add_argument("--contacts", type=int, default=300, help="per campaign")
+    parser.add_argument("--warmup", type=int, default=2, help="campaigns before the baseline sample")
+    parser.add_argument("--keep-jobs", type=int, default=2,
+                        help="finished jobs kept in memory (the server keeps 50: their records would read as growth)")
+    parser.add_argument("--max-rss-growth", type=float, default=32, help="MB")
+    parser.add_argument("--max-handle-growth", type=int, default=8)
+    parser.add_argument("--max-object-growth", type=float, default=5, help="percent")
+    parser.add_argument("--video", help="video to generate thumbnails of (default: a broken file)")
+    parser.add_argument("--image", help="image to copy to the clipboard (Windows)")
+    parser.add_argument("--thumbnails", type=int, default=20, help="thumbnails/clipboard copies per campaign")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    job_registry.MAX_FINISHED_JOBS = args.keep_jobs
+    rate_limiter.configure(ACCOUNT, per_hour=10 ** 9, per_day=10 ** 9)  # Its buckets refill on the real clock
+    media = Settings.UPLOAD_DIR / "soak_media.jpg"
+    media.write_bytes(os.urandom(256 * 1024))
+    (Settings.UPLOAD_DIR / "soak_broken.mp4").write_bytes(os.urandom(64 * 1024))
+
+    clock = CompressedClock(args.speedup)
+    thumbnails, records, baseline, current = [], 0, None, None
+    print(f"{'campaign':>8s} {'hour':>6s} {'records':>8s} {'RSS MB':>8s} {'handles':>8s} {'objects':>9s}")
+    index = 0
+    while clock.hours < args.hours or index <= args.warmup:
+        records += run_campaign(clock, index, args, media.name, rng)
+        media_extras(args, thumbnails)
+        current = sample()
+        if index + 1 == args.warmup:
+            baseline = current
+        rss = f"{current['rss'] / MB:8.1f}" if current["rss"] is not None else f"{'-':>8s}"
+        print(f"{index + 1:8d} {clock.hours:6.1f} {records:8d} {rss} {current['handles'] or '-':>8} "
+              f"{current['objects']:9d}")
+        index += 1
+
+    if thumbnails:
+        print(f"{sum(thumbnails)} video thumbnails generated")
+    failures = []
+    if baseline["rss"] is not None and (current["rss"] - baseline["rss"]) / MB > args.max_rss_growth:
+        failures.append(f"RSS grew {(current['rss'] - baseline['rss']) / MB:.1f} MB")
+    if baseline["handles"] is not None and current["handles"] - baseline["handles"] > args.max_handle_growth:
+        failures.append(f"open handles grew by {current['handles'] - baseline['handles']}")
+    object_growth = (current["objects"] - baseline["objects"]) / baseline["objects"] * 100
+    if object_growth > args.max_object_growth:
+        failures.append(f"live objects grew {object_growth:.1f}%")
+    print(f"after warm-up: RSS {((current['rss'] or 0) - (baseline['rss'] or 0)) / MB:+.1f} MB, "
+          f"handles {(current['handles'] or 0) - (baseline['handles'] or 0):+d}, objects {object_growth:+.1f}%")
+    if failures:
+        grown = (current["types"] - baseline["types"]).most_common(10)
+        print("FAIL: " + "; ".join(failures))
+        print("  types that grew most: " + ", ".join(f"{name} +{count}" for name, count in grown))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+# backend/benchmarks/spreadsheet_import.py
+"""
+Contact import from CSV, XLSX and ODS with spreadsheet.iter_rows.
+
+Writes the same --rows contacts (name, number, balance) as a CSV, an XLSX and
+an ODS file. Numbers are stored the ways exports contain them: numeric
+cells, numeric cells Excel wrote in scientific notation, and text such as
+"0300-1234567". Each file is then streamed through iter_rows and
+phone.normalize, reporting:
+- the rows per second;
+- the peak Python memory of the import; rows are hashed, not kept, so
+  it's bounded by phone.normalize's cache however long the file is,
+  plus an XLSX's shared strings table, which is read whole up front;
+- whether every format produced the same normalized contacts.
+For comparison it also times pandas.read_csv on the CSV, which is what the
+upload endpoints used before.
+
+    python -m backend.benchmarks.spreadsheet_import [--rows 500000]
+"""
+import argparse
+import hashlib
+import random
+import tempfile
+import time
+import tracemalloc
+import zipfile
+from pathlib import Path
+from xml.sax.saxutils import escape
+
+from backend.phone import _normalize, normalize
+from backend.spreadsheet import iter_rows
+
+XLSX_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+CHUNK_ROWS = 5000
+
+
+def sample_contacts(count, seed=7):
+    """(name, number as written, balance); the number kinds are "int", "scientific" and "text"."""
+    rng = random.Random(seed)
+    for i in range(count):
+        national = f"3{rng.randrange(10**9):09d}"
+        kind = rng.choices(("int", "scientific", "text"), weights=(70, 15, 15))[0]
+        number = {"int": f"92{national}", "scientific": f"92{national}", "text": f"0{national[:3]}-{national[3:]}"}[kind]
+        yield f"Customer {i}", number, kind, rng.randrange(0, 100_000)
+
+
+def write_csv(path, count):
+    with open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("Name,Number,Balance\n")
+        for name, number, _, balance in sample_contacts(count):
+            f.write(f"{name},{number},{balance}\n")
+
+
+def xlsx_number(number, kind):
+    if kind == "scientific":
+        return f'<c t="n"><v>{number[0]}.{number[1:]}E+{len(number) - 1}</v></c>'
+    if kind == "text":
+        return f'<c t="inlineStr"><is><t>{number}</t></is></c>'
+    return f'<c><v>{number}</v></c>'
+
+
+def write_xlsx(path, count):
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("xl/workbook.xml", f'<workbook xmlns="{XLSX_NS}" xmlns:r="http://schemas.openxmlformats.org/'
+                         'officeDocument/2006/relationships"><sheets><sheet name="Contacts" sheetId="1" r:id="rId1"/>'
+                         '</sheets></workbook>')
+        archive.writestr("xl/_rels/workbook.xml.rels", '<Relationships xmlns="http://schemas.openxmlformats.org/package/'
+                         '2006/relationships"><Relationship Id="rId1" Type="http://schemas.openxmlformats.org/'
+                         'officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/></Relationships>')
+        with archive.open("xl/sharedStrings.xml", "w") as strings:
+            strings.write(f'<sst xmlns="{XLSX_NS}"><si><t>Name</t></si><si><t>Number</t></si><si><t>Balance</t></si>'
+                          .encode())
+            lines = []
+            for name, _, _, _ in sample_contacts(count):
+                lines.append(f"<si><t>{escape(name)}</t></si>")
+                if len(lines) == CHUNK_ROWS:
+                    strings.write("".join(lines).encode())
+                    lines.clear()
+            strings.write(("".join(lines) + "</sst>").encode())
+        with archive.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write(f'<worksheet xmlns="{XLSX_NS}"><sheetData><row r="1"><c r="A1" t="s"><v>0</v></c>'
+                        '<c r="B1" t="s"><v>1</v></c><c r="C1" t="s"><v>2</v></c></row>'.encode())
+            lines = []
+            for i, (_, number, kind, balance) in enumerate(sample_contacts(count)):
+                lines.append(f'<row r="{i + 2}"><c t="s"><v>{i + 3}</v></c>{xlsx_number(number, kind)}'
+                             f'<c><v>{balance}</v></c></row>')
+                if len(lines) == CHUNK_ROWS:
+                    sheet.write("".join(lines).encode())
+                    lines.clear()
+            sheet.write(("".join(lines) + "</sheetData></worksheet>").encode())
+
+
+def ods_cell(value, numeric):
+    if numeric:
+        return f'<table:table-cell office:value-type="float" office:value="{value}"><text:p>{value}</text:p></table:table-cell>'
+    return f'<table:table-cell office:value-type="string"><text:p>{escape(value)}</text:p></table:table-cell>'
+
+
+def write_ods(path, count):
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("mimetype", "application/vnd.oasis.opendocument.spreadsheet", compress_type=zipfile.ZIP_STORED)
+        with archive.open("content.xml", "w") as content:
+            content.write(
+                b'<office:document-content xmlns:office="urn:oasis:names:tc:opendocument:xmlns:office:1.0" '
+                b'xmlns:table="urn:oasis:names:tc:opendocument:xmlns:table:1.0" '
+                b'xmlns:text="urn:oasis:names:tc:opendocument:xmlns:text:1.0"><office:body><office:spreadsheet>'
+                b'<table:table table:name="Contacts"><table:table-row>' +
+                "".join(ods_cell(header, False) for header in ("Name", "Number", "Balance")).encode() +
+                b'</table:table-row>')
+            lines = []
+            for name, number, kind, balance in sample_contacts(count):
+                lines.append("<table:table-row>" + ods_cell(name, False) + ods_cell(number, kind != "text")
+                             + ods_cell(balance, True) + "</table:table-row>")
+                if len(lines) == CHUNK_ROWS:
+                    content.write("".join(lines).encode())
+                    lines.clear()
+            # LibreOffice ends a sheet with the rest of its rows as one huge repeated empty row
+            content.write(("".join(lines) + '<table:table-row table:number-rows-repeated="1048000">'
+                           '<table:table-cell table:number-columns-repeated="1024"/></table:table-row>'
+                           '</table:table></office:spreadsheet></office:body></office:document-content>').encode())
+
+
+def import_file(path):
+    """Rows and normalized-contact digest of streaming the file."""
+    digest = hashlib.sha256()
+    rows = 0
+    with open(path, "rb") as f:
+        rows_iter = iter_rows(f, path.name)
+        header = next(rows_iter)
+        number_column, name_column = header.index("Number"), header.index("Name")
+        for row in rows_iter:
+            digest.update(f"{row[name_column]}\t{normalize(row[number_column])}\n".encode())
+            rows += 1
+    return rows, digest.hexdigest()
+
+
+def measured(function, *args):
+    """(result, seconds, peak traced bytes); timed on a separate run, tracing slows Python down a lot."""
+    _normalize.cache_clear()
+    started = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - started
+    _normalize.cache_clear()
+    tracemalloc.start()
+    result = function(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500_000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        files = {}
+        for extension, writer in ((".csv", write_csv), (".xlsx", write_xlsx), (".ods", write_ods)):
+            files[extension] = Path(directory) / f"contacts{extension}"
+            writer(files[extension], args.rows)
+
+        print(f"{args.rows} contacts")
+        normalize("+923001234567")  # Load the phone number metadata outside the measurements
+        digests = set()
+        for extension, path in files.items():
+            (rows, digest), elapsed, peak = measured(import_file, path)
+            assert rows == args.rows, f"{extension}: {rows} rows"
+            digests.add(digest)
+            print(f"  {extension:5s} {path.stat().st_size / 1024 / 1024:6.1f} MiB   {elapsed:6.2f} s   "
+                  f"{rows / elapsed:9.0f} rows/s   peak memory {peak / 1024 / 1024:6.1f} MiB")
+        assert len(digests) == 1, "the formats gave different contacts"
+        print("  same normalized contacts from every format")
+
+        import pandas as pd
+        _, elapsed, peak = measured(pd.read_csv, files[".csv"])
+        print(f"  pandas.read_csv of the .csv (before, without normalizing): {elapsed:6.2f} s, "
+              f"peak memory {peak / 1024 / 1024:6.1f} MiB")
+
+
+if __name__ == "__main__":
+    main()
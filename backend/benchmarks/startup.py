@@ -0,0 +1,112 @@
+# backend/benchmarks/startup.py
+"""
+Cold-start budget for the backend.
+
+1. Runs `python -X importtime -c "import backend.main"` in a fresh interpreter and
+   lists the slowest imports (cumulative), so a heavy module creeping back into
+   the import path shows up by name.
+2. Starts the server with uvicorn in a fresh process and measures the time until
+   GET /api/health/simple first answers 200 - what the Electron shell waits on.
+
+Exits non-zero if the health check takes longer than the budget.
+
+    python -m backend.benchmarks.startup [--budget 3.0] [--runs 3]
+"""
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+HEALTH_BUDGET = 3.0  # seconds from process start to the first healthy response
+REPO_ROOT = Path(__file__).resolve().parents[2]
+
+
+def slowest_imports(top=15):
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import backend.main"],
+        cwd=REPO_ROOT, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import backend.main failed:\n{result.stderr[-2000:]}")
+
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative_us, name = line.split("|", 2)  # "import time: self | cumulative | name"
+        timings.append((int(cumulative_us), name.rstrip()))
+    timings.sort(reverse=True)
+    return timings[:top]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def stop(process):
+    if sys.platform == "win32":
+        # A onefile executable runs the server in a child of the bootloader; take down the whole tree
+        subprocess.run(["taskkill", "/T", "/F", "/PID", str(process.pid)], capture_output=True)
+    else:
+        process.terminate()
+    process.wait(timeout=10)
+
+
+def time_to_first_health(command, port, cwd=REPO_ROOT, timeout=30.0):
+    """Start `command` and return the seconds until it answers GET /api/health/simple on `port`."""
+    url = f"http://127.0.0.1:{port}/api/health/simple"
+    started = time.perf_counter()
+    server = subprocess.Popen(command, cwd=cwd, env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+                              stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - started < timeout:
+            if server.poll() is not None:
+                raise RuntimeError(f"server exited with code {server.returncode}")
+            try:
+                with urllib.request.urlopen(url, timeout=0.5) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                pass
+            time.sleep(0.02)
+        raise TimeoutError(f"no healthy response within {timeout:.0f} s")
+    finally:
+        stop(server)
+
+
+def uvicorn_command(port):
+    return [sys.executable, "-m", "uvicorn", "backend.main:app", "--host", "127.0.0.1", "--port", str(port),
+            "--log-level", "warning"]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--budget", type=float, default=HEALTH_BUDGET)
+    parser.add_argument("--runs", type=int, default=3)
+    args = parser.parse_args()
+
+    print("Slowest imports of backend.main (cumulative):")
+    for cumulative_us, name in slowest_imports():
+        print(f"  {cumulative_us / 1000:8.1f} ms  {name}")
+
+    timings = []
+    for _ in range(args.runs):
+        port = free_port()
+        timings.append(time_to_first_health(uvicorn_command(port), port))
+    worst = max(timings)
+    print(f"Time to first /api/health/simple 200 over {args.runs} runs: "
+          f"best {min(timings):.2f} s, worst {worst:.2f} s (budget {args.budget:.2f} s)")
+    if worst > args.budget:
+        print("FAIL: cold start is over budget")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
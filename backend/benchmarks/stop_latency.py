@@ -0,0 +1,57 @@
+# backend/benchmarks/stop_latency.py
+"""
+Stop-to-idle latency check for cancellable campaigns.
+
+Runs attachment campaigns against the SimulatedDriver, cancels them at random
+points (mid-action, mid-pacing sleep, during the batch cool-down) and measures
+how long the worker thread takes to go idle. Exits non-zero if any stop takes
+longer than the budget.
+
+    python -m backend.benchmarks.stop_latency
+"""
+import random
+import sys
+import time
+
+from backend.campaign import attachment_campaign
+from backend.drivers import SimulatedDriver
+from backend.jobs import create_job
+
+LATENCY_BUDGET = 1.0  # seconds
+
+
+def measure_stop_latency(cancel_after):
+    driver = SimulatedDriver(invalid_numbers={"+923000000003"})
+    contacts = [{"name": f"Contact_{i}", "number": f"+9230000000{i:02d}"} for i in range(40)]
+    job = create_job("attachments")
+    job.start(lambda: attachment_campaign(
+        driver, contacts, ["a.jpg"], [], "+923000000099",
+        min_batch_size=2, max_batch_size=3, min_batch_delay=60, max_batch_delay=120
+    ))
+
+    time.sleep(cancel_after)
+    stopped_at = time.perf_counter()
+    job.cancel()
+    job.join(timeout=10)
+    latency = time.perf_counter() - stopped_at
+
+    assert job.status == "cancelled", f"job ended as {job.status!r}, expected 'cancelled'"
+    assert job.results[-1]["status"] == "stopped"
+    return latency
+
+
+def main():
+    # Spread the stop requests over the first seconds of the campaign so they land
+    # in open_chat, in send pacing and in the 60-120 s batch cool-down
+    latencies = [measure_stop_latency(random.uniform(0.1, 15.0)) for _ in range(8)]
+    worst = max(latencies)
+    print(f"stop-to-idle latency: worst {worst * 1000:.0f} ms, "
+          f"mean {sum(latencies) / len(latencies) * 1000:.0f} ms over {len(latencies)} runs")
+
+    if worst >= LATENCY_BUDGET:
+        print(f"[ERROR]: stop latency exceeded the {LATENCY_BUDGET:.1f} s budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# backend/benchmarks/text_entry.py
+"""
+Time to enter a message into the message box with each text entry strategy
+(value injection, clipboard paste, chunked typing) and with the per-message
+choice ("auto", also for a box without a ValuePattern), for short and long,
+English and Urdu messages.
+
+By default entry is simulated: each strategy costs the modeled time below,
+built from the pauses and key interval in backend/text_entry.py, run through
+the SimulatedDriver at --time-scale and reported scaled back to real seconds.
+
+With --live NUMBER it composes each message with each strategy in that chat
+of the real WhatsApp desktop app on Windows, reports the time and whether
+the box read back as the message, and clears the box again: nothing is sent.
+
+    python -m backend.benchmarks.text_entry [--time-scale 0.05]
+    python -m backend.benchmarks.text_entry --live +923001234567
+"""
+import argparse
+import time
+
+from backend.drivers import SimulatedDriver
+from backend.text_entry import (CHUNK_CHARS, CHUNK_PAUSE, PASTE_PAUSE, STRATEGIES, TYPING_INTERVAL, clear,
+                                composed_text, plan, same_text)
+
+VALUE_SECONDS = 0.05  # One cross-process UI Automation call
+PASTE_SECONDS = 0.05  # Clipboard write and the Ctrl+V key presses
+KEY_SECONDS = 0.002  # Injecting one key press, on top of TYPING_INTERVAL
+NEW_LINE_SECONDS = 0.03  # Shift+Enter
+VERIFY_SECONDS = 0.02  # Reading the box back
+
+BALANCE_LINES_EN = [
+    "Dear ALI RAZA,",
+    "Your outstanding balance with Al-Madina Traders is Rs. 15,750 as of 30-09.",
+    "Please clear it by the 10th to keep your credit line open.",
+    "Payments: Meezan Bank 0123-4567890, or JazzCash 0300-1234567.",
+    "Share the receipt on this number once paid.",
+    "Already paid? Please ignore this message.",
+    "Thank you for your business!",
+    "Al-Madina Traders, Faisalabad",
+]
+BALANCE_LINES_UR = [
+    "محترم علی رضا صاحب،",
+    "المدینہ ٹریڈرز کے ساتھ آپ کا واجب الادا بیلنس 30-09 تک 15,750 روپے ہے۔",
+    "براہ کرم 10 تاریخ تک ادائیگی کر دیں تاکہ آپ کی کریڈٹ لائن جاری رہے۔",
+    "ادائیگی: میزان بینک 0123-4567890، یا جاز کیش 0300-1234567۔",
+    "ادائیگی کے بعد رسید اسی نمبر پر بھیج دیں۔",
+    "اگر ادائیگی ہو چکی ہے تو اس پیغام کو نظر انداز کریں۔",
+    "آپ کے تعاون کا شکریہ!",
+    "المدینہ ٹریڈرز، فیصل آباد",
+]
+MESSAGES = {
+    "greeting (en)": "Salam ALI, 1500 due.",
+    "short (en)": "Hi ALI, your balance is Rs. 1500.",
+    "balance (en, 8 lines)": "\n".join(BALANCE_LINES_EN),
+    "balance (ur, 8 lines)": "\n".join(BALANCE_LINES_UR),
+    "long (en, 3 x 8 lines)": "\n\n".join(["\n".join(BALANCE_LINES_EN)] * 3),
+}
+COLUMNS = [("value", None, ()), ("clipboard", None, ()), ("typing", None, ()),
+           ("auto", "auto", ()), ("auto, no value", "auto", ("value",))]
+
+
+def modeled_entry_seconds(strategy, text):
+    if strategy == "value":
+        seconds = VALUE_SECONDS
+    elif strategy == "clipboard":
+        seconds = sum(PASTE_PAUSE) / 2 + PASTE_SECONDS
+    else:
+        lines = text.split("\n")
+        chunks = sum(-(-len(line) // CHUNK_CHARS) for line in lines)
+        seconds = (len(text) * (TYPING_INTERVAL + KEY_SECONDS) + chunks * sum(CHUNK_PAUSE) / 2
+                   + (len(lines) - 1) * NEW_LINE_SECONDS)
+    return seconds + VERIFY_SECONDS
+
+
+def simulate(text_entry, unsupported, message, time_scale):
+    driver = SimulatedDriver(text_entry=text_entry, unsupported_entry=unsupported,
+                             entry_delay=lambda strategy, text: modeled_entry_seconds(strategy, text) * time_scale)
+    started = time.perf_counter()
+    driver.send_message(message)
+    chosen = driver.actions[-1][1]
+    return (time.perf_counter() - started) / time_scale, chosen
+
+
+def live(text_entry, unsupported, message, box):
+    """Compose `message` with the strategies plan() gives, without sending it; (seconds, strategy or None)."""
+    started = time.perf_counter()
+    chosen = None
+    for name in plan(message, text_entry):
+        if name in unsupported or (text_entry not in (None, "auto") and name != text_entry):
+            continue
+        try:
+            STRATEGIES[name].enter(box, message)
+        except Exception:
+            continue
+        composed = composed_text(box)
+        if composed is None or same_text(composed, message):
+            chosen = name
+            break
+        clear(box)
+    seconds = time.perf_counter() - started
+    clear(box)
+    return seconds, chosen
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--time-scale", type=float, default=0.05)
+    parser.add_argument("--live", metavar="NUMBER", help="compose in this chat for real (Windows only; nothing is sent)")
+    args = parser.parse_args()
+
+    box = None
+    if args.live:
+        from backend.drivers import DesktopDriver
+        from backend.whatsapp_controller_after_update import message_box
+
+        if DesktopDriver().open_chat(args.live) is not True:
+            raise RuntimeError(f"could not open the chat with {args.live}")
+        box = message_box()
+
+    width = max(len(name) for name in MESSAGES)
+    print(f"{'message':<{width}}  {'chars':>5}  " + "  ".join(f"{label:>16}" for label, _, _ in COLUMNS))
+    for name, message in MESSAGES.items():
+        cells = []
+        for label, text_entry, unsupported in COLUMNS:
+            text_entry = text_entry or label
+            if args.live:
+                seconds, chosen = live(text_entry, unsupported, message, box)
+            else:
+                seconds, chosen = simulate(text_entry, unsupported, message, args.time_scale)
+            chosen = chosen or "FAILED"
+            cells.append(f"{seconds:>6.2f}s" + (f" {chosen:>8}" if text_entry == "auto" or chosen != label else " " * 9))
+        print(f"{name:<{width}}  {len(message):>5}  " + "  ".join(f"{cell:>16}" for cell in cells))
+    if args.live:
+        print("FAILED: the box never read back as the message with that strategy")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,19 +1,62 @@
 import PyInstaller.__main__
+import argparse
 import os
 import shutil
 import sys
 
-def build_backend():
+# onedir: dist/backend/backend.exe next to its libraries. Starts fast, nothing to unpack on launch.
+# onefile: dist/backend.exe. A single file, but it re-extracts the whole archive to a temp dir on every launch.
+BUILD_MODES = ("onedir", "onefile")
+
+# Imported dynamically by uvicorn (by name from its config), so PyInstaller can't see them
+UVICORN_SUBMODULES = [
+    'uvicorn.logging',
+    'uvicorn.loops',
+    'uvicorn.loops.auto',
+    'uvicorn.loops.asyncio',
+    'uvicorn.protocols',
+    'uvicorn.protocols.http',
+    'uvicorn.protocols.http.auto',
+    'uvicorn.protocols.http.h11_impl',
+    'uvicorn.protocols.websockets',
+    'uvicorn.protocols.websockets.auto',
+    'uvicorn.lifespan',
+    'uvicorn.lifespan.on',
+]
+
+# Pulled in by pandas/PIL/numpy optional code paths we never use
+EXCLUDED_MODULES = [
+    'tkinter',
+    'matplotlib',
+    'IPython',
+    'jedi',
+    'scipy',
+    'pytest',
+    'sqlalchemy',
+    'pyarrow',
+    'openpyxl',
+    'xlrd',
+    'lxml',
+    'bs4',
+    'html5lib',
+    'jinja2',
+]
+
+
+def build_backend(mode="onedir"):
     # Define paths (assuming we're already in backend directory)
     uploads_dir = "uploads"
     thumbnail_dir = "thumbnails"
     dist_dir = "dist"
     build_dir = "build"
 
-    # Clean previous builds
-    for dir_path in [dist_dir, build_dir]:
-        if os.path.exists(dir_path):
-            shutil.rmtree(dir_path)
+    # Clean the previous build of this mode only, so both modes can sit side by side for comparison
+    output = os.path.join(dist_dir, "backend") if mode == "onedir" else os.path.join(dist_dir, "backend.exe")
+    for path in [output, os.path.join(build_dir, mode)]:
+        if os.path.isdir(path):
+            shutil.rmtree(path)
+        elif os.path.exists(path):
+            os.remove(path)
 
     # Create required directories
     for dir_path in [uploads_dir, thumbnail_dir]:
@@ -22,40 +65,26 @@ def build_backend():
     # PyInstaller configuration
     pyinstaller_args = [
         'server.py',
-        '--onefile',
+        f'--{mode}',
         '--noconsole',
         '--clean',
-        '--distpath=dist',
-        '--workpath=build',
+        '--noconfirm',
+        f'--distpath={dist_dir}',
+        f'--workpath={os.path.join(build_dir, mode)}',
         '--specpath=.',
         '--name=backend',
-        
+        '--paths=..',  # main.py imports the modules as the `backend` package
+
         # Hidden imports
-        *[f'--hidden-import={mod}' for mod in [
-            'uvicorn.logging',
-            'uvicorn.loops',
-            'uvicorn.loops.auto',
-            'uvicorn.protocols',
-            'uvicorn.protocols.http',
-            'uvicorn.protocols.http.auto',
-            'uvicorn.protocols.websockets',
-            'uvicorn.protocols.websockets.auto',
-            'uvicorn.lifespan',
-            'uvicorn.lifespan.on',
-            'uiautomation',
-            'pandas',
-            'numpy'
-        ]],
-        
-        # Collect all (for dynamic imports)
-        *[f'--collect-all={pkg}' for pkg in [
-            'fastapi',
-            'uvicorn',
-            'starlette',
-            'uiautomation',
-            'pandas'
-        ]],
-        
+        *[f'--hidden-import={mod}' for mod in UVICORN_SUBMODULES],
+
+        # uiautomation loads its UIAutomationClient DLLs from its own bin/ folder at runtime.
+        # fastapi, starlette and pandas are found by import analysis (pandas through
+        # PyInstaller's own hook), so collecting all of them only bloated the bundle.
+        '--collect-all=uiautomation',
+
+        *[f'--exclude-module={mod}' for mod in EXCLUDED_MODULES],
+
         # Add data files
         f'--add-data={uploads_dir}{os.pathsep}{uploads_dir}',
         f'--add-data={thumbnail_dir}{os.pathsep}{thumbnail_dir}'
@@ -63,6 +92,12 @@ def build_backend():
 
     # Run PyInstaller
     PyInstaller.__main__.run(pyinstaller_args)
+    return output
+
 
 if __name__ == "__main__":
-    build_backend()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Build the backend executable with PyInstaller")
+    parser.add_argument("--mode", choices=BUILD_MODES, default="onedir",
+                        help="onedir (default) starts fastest; onefile gives a single backend.exe")
+    args = parser.parse_args()
+    print(f"Built {build_backend(args.mode)}")
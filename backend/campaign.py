@@ -0,0 +1,401 @@
+# backend/campaign.py
+import logging
+import math
+import random
+from datetime import datetime
+from typing import Dict
+
+from backend.config import Settings
+from backend.helper import random_sleep
+from backend.history import file_hashes, history, text_hash
+from backend.jobs import checkpoint, report_progress, shielded
+from backend.media_optimizer import send_path
+from backend.phone import contact_number, is_blank, normalize
+from backend.rate_limit import rate_limiter
+from backend.scheduler import before_batch, before_contact, cool_down, wait_for_start
+from backend.settings_store import current_settings
+from backend.tracing import span
+
+log = logging.getLogger(__name__)
+
+
+def timestamp():
+    return datetime.now().strftime("%d-%m-%Y %H:%M:%S")
+
+
+def deliver_balance(driver, entry, number):
+    """Open the chat with `number` and send the entry its balance message. Returns the result record, or None if the chat didn't open."""
+    number_searching = driver.open_chat(number)
+    random_sleep(0.8, 1.3)
+
+    if number_searching is True:
+        message_template = entry.get("messageTemplate", "")
+        message = message_template.format(
+            name=entry["name"].upper(),
+            balance=int(float(entry["balance"]))
+        )
+
+        random_sleep(1.0, 2.0)
+        checkpoint()
+
+        if driver.send_message(message):
+            return {
+                "name": entry["name"],
+                "number": entry["number"],
+                "balance": float(entry["balance"]),
+                "status": "success",
+                "message": "Message sent successfully",
+                "timestamp": timestamp()
+            }
+
+        return {
+            "name": entry["name"],
+            "number": entry["number"],
+            "balance": float(entry["balance"]),
+            "status": "error",
+            "message": "Failed to send message",
+            "timestamp": timestamp()
+        }
+
+    if number_searching == "Invalid Number":
+        return invalid_balance_record(entry)
+
+    return None
+
+
+def invalid_balance_record(entry):
+    return {
+        "name": entry["name"],
+        "number": entry["number"],
+        "balance": float(entry["balance"]),
+        "status": "Skipped Invalid Number",
+        "message": "Number is Invalid",
+        "timestamp": timestamp()
+    }
+
+
+def balances_campaign(driver, data, admin_no, account_id="default"):
+    """Send each entry its balance message. Yields one result record per entry."""
+    no_number = []
+    invalid_number = []
+    pause_after = random.randint(12, 20)
+    admin_no = normalize(admin_no)
+    min_balance = current_settings().min_balance
+    wait_for_start()
+
+    try:
+        for index, entry in enumerate(data):
+            checkpoint(pausable=True)
+            before_contact()
+            report_progress(contact=index, total_contacts=len(data))
+            random_sleep(0.6, 1.4, pausable=True)
+
+            if int(float(str(entry["balance"]))) < min_balance:
+                yield {
+                    "name": entry["name"],
+                    "number": entry["number"],
+                    "balance": float(entry["balance"]),
+                    "status": "Skipped Insufficient Balance",
+                    "message": "Insufficient balance",
+                    "timestamp": timestamp()
+                }
+                random_sleep(0.5, 1.0, pausable=True)
+                continue
+
+            number = contact_number(entry)
+            if number is None and is_blank(entry["number"]):
+                yield {
+                    "name": entry["name"],
+                    "number": entry["number"],
+                    "balance": float(entry["balance"]),
+                    "status": "Skipped No Number",
+                    "message": "No number entered",
+                    "timestamp": timestamp()
+                }
+                no_number.append((entry["name"], entry["balance"]))
+                random_sleep(0.5, 1.0, pausable=True)
+                continue
+
+            if number is None:
+                # Not a phone number at all: no point opening a chat for it
+                invalid_number.append((entry["name"], entry["balance"]))
+                yield invalid_balance_record(entry)
+                continue
+
+            try:
+                with span("rate_limit_wait", account=account_id):
+                    rate_limiter.acquire(account_id)
+                with span("contact", number=number):
+                    record = deliver_balance(driver, entry, number)
+
+                if record is not None:
+                    if record["status"] == "Skipped Invalid Number":
+                        invalid_number.append((entry["name"], entry["balance"]))
+                    elif record["status"] == "success":
+                        history.record(number, "balances",
+                                       {text_hash(entry.get("messageTemplate", "")): "message"}, "success")
+                    yield record
+
+                    if record["status"] == "success" and random.random() < 0.15:
+                        random_sleep(2, 4, pausable=True)
+
+                random_sleep(1.0, 2.0, pausable=True)
+
+                # Extra rest every few messages (VERY IMPORTANT)
+                if index > 0 and index % pause_after == 0:
+                    log.info("Taking a longer break after sending %d messages.", index)
+                    random_sleep(80, 100, pausable=True)
+                    pause_after = random.randint(12, 20)
+                    log.debug("New pause after: %d messages.", pause_after)
+
+            except Exception as e:
+                yield {
+                    "name": entry["name"],
+                    "number": entry["number"],
+                    "balance": float(entry["balance"]),
+                    "status": "error",
+                    "message": str(e),
+                    "timestamp": timestamp()
+                }
+
+        checkpoint(pausable=True)
+    finally:
+        # A stopped run still reports what it did and closes WhatsApp, as it did before it ran as a job
+        with shielded():
+            try:
+                with span("report_to_admin"):
+                    driver.report_to_admin(no_number, invalid_number, batch_no=None, admin_no=admin_no)
+            finally:
+                driver.close()
+
+
+def deliver_attachments(driver, name, number, full_media_paths, full_pdf_paths, message_template):
+    """
+    Open the chat with `number` and send it the media, PDFs and message.
+    Returns the contact's result record, or None if the chat didn't open.
+    """
+    number_searching = driver.open_chat(number)
+    random_sleep(2.0, 3.0)
+
+    if number_searching == "Invalid Number":
+        return {
+            "name": name,
+            "number": number,
+            "status": "skipped",
+            "message": "invalid number",
+            "timestamp": timestamp()
+        }
+
+    if number_searching is not True:
+        return None
+
+    # Initialize all status as None (not attempted)
+    message_sent = None
+    pdf_sent = None
+    media_sent = None
+
+    # Send media if it exists
+    if full_media_paths:
+        checkpoint()
+        with span("send_media", files=len(full_media_paths)):
+            media_sent = driver.send_attachments(full_media_paths)
+        random_sleep(1.4, 2.0)
+
+    # Send PDF if it exists
+    if full_pdf_paths:
+        checkpoint()
+        with span("send_pdf", files=len(full_pdf_paths)):
+            pdf_sent = driver.send_attachments(full_pdf_paths)
+        random_sleep(1.4, 2.0)
+
+    # Send message if it exists
+    if message_template:
+        checkpoint()
+        if "{name}" in message_template:
+            formatted_message = message_template.format(name=name)
+        else:
+            formatted_message = message_template
+
+        with span("send_message", length=len(formatted_message)):
+            message_sent = driver.send_message(formatted_message)
+        random_sleep(1.4, 2.0)
+
+    # Determine status and summary message
+    # Only consider operations that were attempted (not None)
+    attempted_results = []
+    attempted_names = []
+
+    if message_sent is not None:
+        attempted_results.append(message_sent)
+        attempted_names.append("message")
+    if media_sent is not None:
+        attempted_results.append(media_sent)
+        attempted_names.append("media")
+    if pdf_sent is not None:
+        attempted_results.append(pdf_sent)
+        attempted_names.append("pdf")
+
+    # Handle case where nothing was attempted
+    if not attempted_results:
+        status = "skipped"
+        summary = "Nothing to send"
+    else:
+        # Calculate success/failure
+        failed_ops = [op for op, result in zip(attempted_names, attempted_results) if not result]
+        succeeded_ops = [op for op, result in zip(attempted_names, attempted_results) if result]
+
+        if all(attempted_results):
+            status = "success"
+            summary = "All operations completed successfully"
+        elif not any(attempted_results):
+            status = "error"
+            summary = "All operations failed"
+        else:
+            status = "partial"
+            summary = f"{' and '.join(succeeded_ops).capitalize()} sent, but {' and '.join(failed_ops)} failed"
+
+    return {
+        "name": name,
+        "number": number,
+        "status": status,
+        "message_sent": message_sent,
+        "media_sent": media_sent,
+        "pdf_sent": pdf_sent,
+        "message": summary,
+        "timestamp": timestamp()
+    }
+
+
+def delivered_items(record, media_hashes, pdf_hashes, message_template) -> Dict[str, str]:
+    """The content items ({content_hash: kind}) a contact's result record says were delivered."""
+    items = {}
+    if record.get("media_sent"):
+        items.update(dict.fromkeys(media_hashes, "media"))
+    if record.get("pdf_sent"):
+        items.update(dict.fromkeys(pdf_hashes, "pdf"))
+    if record.get("message_sent"):
+        items[text_hash(message_template)] = "message"
+    return items
+
+
+def attachment_campaign(driver, data, media_paths, pdf_paths, admin_no, min_batch_size=15, max_batch_size=35,
+                        min_batch_delay=60, max_batch_delay=120, account_id="default", skip_recent_days=0):
+    """
+    Send media, PDFs and/or a message to every contact in batches. Yields one result record per contact.
+    With `skip_recent_days`, contacts that were already sent all of these files (or, without files, this
+    message) in that many days, by any campaign, are skipped.
+    """
+    wait_for_start()
+    admin_no = normalize(admin_no)
+    processed_numbers = set()
+    # The optimized variant of each media file when it's ready (see media_optimizer.py), else the original
+    full_media_paths = [send_path(Settings.UPLOAD_DIR / filename) for filename in media_paths]
+    full_pdf_paths = [str(Settings.UPLOAD_DIR / filename) for filename in pdf_paths]
+
+    # Content identity for the delivery history: the uploaded originals, whichever variant gets sent
+    media_hashes = file_hashes(Settings.UPLOAD_DIR / filename for filename in media_paths)
+    pdf_hashes = file_hashes(Settings.UPLOAD_DIR / filename for filename in pdf_paths)
+    if media_paths or pdf_paths:
+        content_hashes = media_hashes + pdf_hashes
+    else:
+        content_hashes = [text_hash(entry.get("messageTemplate", "")) for entry in data]
+    # One query for the whole list; the loop below only looks numbers up. With files, only contacts that
+    # already got every one of them are skipped: re-sending one old brochure with new media skips nobody.
+    if len(media_hashes) + len(pdf_hashes) < len(media_paths) + len(pdf_paths):
+        recently_sent = {}  # A file couldn't be read, so no one can have had the whole set
+    else:
+        recently_sent = history.recently_sent(content_hashes, skip_recent_days,
+                                              match_all=bool(media_paths or pdf_paths))
+
+    batch_size = random.randint(min_batch_size, max_batch_size)
+    batches = [data[i:i + batch_size] for i in range(0, len(data), batch_size)]
+    total_batches = math.ceil(len(data) / batch_size)
+
+    for batch_index, batch in enumerate(batches):
+        invalid_number = []
+        report_progress(batch=batch_index, total_batches=total_batches)
+        before_batch(len(batch), len(data) - batch_index * batch_size)
+
+        random_sleep(1, 2, pausable=True)
+
+        for contact_index, entry in enumerate(batch):
+            checkpoint(pausable=True)
+            before_contact()
+            report_progress(contact=batch_index * batch_size + contact_index, total_contacts=len(data))
+            number = contact_number(entry)
+            name = entry.get("name")
+
+            if number is None:
+                invalid_number.append((name, entry.get("number")))
+                yield {
+                    "name": name,
+                    "number": entry.get("number"),
+                    "status": "skipped",
+                    "message": "invalid number",
+                    "batch": batch_index + 1,
+                    "timestamp": timestamp()
+                }
+                continue
+            if number in processed_numbers:
+                yield {
+                    "name": name,
+                    "number": number,
+                    "status": "error",
+                    "message": "Already Processed (Duplicate Entry)",
+                    "batch": batch_index + 1,
+                    "timestamp": timestamp()
+                }
+                continue
+            if number in recently_sent:
+                sent_on = datetime.fromtimestamp(recently_sent[number]).strftime("%d-%m-%Y %H:%M")
+                yield {
+                    "name": name,
+                    "number": number,
+                    "status": "skipped",
+                    "message": f"Already sent this content on {sent_on}",
+                    "batch": batch_index + 1,
+                    "timestamp": timestamp()
+                }
+                continue
+            try:
+                with span("rate_limit_wait", account=account_id):
+                    rate_limiter.acquire(account_id)
+                with span("contact", number=number):
+                    record = deliver_attachments(driver, name, number, full_media_paths, full_pdf_paths,
+                                                 entry.get("messageTemplate", ""))
+            except Exception as e:
+                record = {
+                    "name": name,
+                    "number": number,
+                    "status": "error",
+                    "message": f"An exception occurred: {str(e)}",
+                    "timestamp": timestamp()
+                }
+
+            if record is None:
+                continue
+            if record["message"] == "invalid number":
+                invalid_number.append((name, number))
+            elif record["status"] in ("success", "partial"):
+                # Add to processed numbers if any operation succeeded
+                processed_numbers.add(number)
+                history.record(number, "attachments", delivered_items(
+                    record, media_hashes, pdf_hashes, entry.get("messageTemplate", "")), record["status"])
+            yield {**record, "batch": batch_index + 1}
+
+        checkpoint(pausable=True)
+        batch_no = f"{batch_index + 1}/{total_batches}"
+        with span("report_to_admin", batch=batch_no):
+            driver.report_to_admin(None, invalid_number, batch_no, admin_no)
+
+        # If there are more batches remaining, wait before processing next batch
+        if batch_index < len(batches) - 1:
+            yield {
+                "status": "batch_complete",
+                "message": f"Completed batch {batch_index + 1}/{len(batches)}. Waiting longer before next batch.",
+                "timestamp": timestamp()
+            }
+            with span("batch_delay"):
+                cool_down(min_batch_delay, max_batch_delay, len(batches[batch_index + 1]))
+
+    driver.close()
@@ -0,0 +1,248 @@
+# backend/clipboard.py
+import hashlib
+import logging
+import os
+import struct
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import List, Optional, Tuple
+
+from backend.jobs import current_job, finish_hooks
+from backend.metrics import CLIPBOARD_RESTORES, CLIPBOARD_WRITES
+from backend.tracing import span
+
+log = logging.getLogger(__name__)
+
+OPEN_ATTEMPTS = 50  # Another program may hold the clipboard for a moment: retry opening it for up to half a second
+OPEN_RETRY_SECONDS = 0.01
+MAX_SAVED_BYTES = 64 * 1024 * 1024  # The operator's clipboard isn't saved (or restored) when it holds more than this
+
+CF_DIB = 8
+CF_UNICODETEXT = 13
+CF_HDROP = 15
+FIRST_REGISTERED_FORMAT = 0xC000  # Formats applications register by name ("HTML Format", "Rich Text Format", ...)
+
+Items = List[Tuple[int, object]]  # (clipboard format, str or bytes) pairs
+
+
+class ClipboardError(RuntimeError):
+    """Another program kept the clipboard open."""
+
+
+def drop_files(file_paths) -> bytes:
+    """CF_HDROP data: `file_paths` as a file-drop list, like copying them in Explorer."""
+    # DROPFILES header: offset of the file list, drop point (x, y), fNC, fWide (the list is UTF-16)
+    header = struct.pack("<IiiII", 20, 0, 0, 0, 1)
+    file_list = "".join(f"{os.path.abspath(path)}\0" for path in file_paths) + "\0"
+    return header + file_list.encode("utf-16-le")
+
+
+def image_dib(file_path) -> bytes:
+    """CF_DIB data: the image as a bitmap, which pastes as a picture rather than a file."""
+    import io
+    from PIL import Image
+
+    # Both images are closed right away, not whenever the GC gets to them
+    with Image.open(file_path) as img, img.convert("RGB") as rgb, io.BytesIO() as output:
+        rgb.save(output, "BMP")
+        return output.getvalue()[14:]  # skip BMP header
+
+
+class Win32Clipboard:
+    """The Windows clipboard, through pywin32."""
+
+    def __init__(self):
+        import win32clipboard
+        self._win32 = win32clipboard
+
+    def sequence(self) -> int:
+        """Windows bumps this number on every change to the clipboard, by any program."""
+        return self._win32.GetClipboardSequenceNumber()
+
+    @contextmanager
+    def _opened(self):
+        for attempt in range(OPEN_ATTEMPTS):
+            try:
+                self._win32.OpenClipboard()
+                break
+            except Exception as e:  # pywintypes.error: another program has it open
+                if attempt == OPEN_ATTEMPTS - 1:
+                    raise ClipboardError(f"The clipboard is in use by another program: {e}")
+                time.sleep(OPEN_RETRY_SECONDS)
+        try:
+            yield
+        finally:
+            self._win32.CloseClipboard()
+
+    def read(self) -> Optional[Items]:
+        """The formats of the current contents that can be written back; None when they are too large to keep."""
+        items, size = [], 0
+        with self._opened():
+            fmt = self._win32.EnumClipboardFormats(0)
+            while fmt:
+                # Text, bitmaps, file lists and registered formats are plain data; GDI handles
+                # (CF_BITMAP, metafiles) can't be copied, and Windows synthesizes the rest from these
+                if fmt in (CF_UNICODETEXT, CF_DIB, CF_HDROP) or fmt >= FIRST_REGISTERED_FORMAT:
+                    try:
+                        data = self._win32.GetClipboardData(fmt)
+                    except Exception:
+                        data = None
+                    if fmt == CF_HDROP and isinstance(data, tuple):
+                        data = drop_files(data)
+                    if isinstance(data, (str, bytes)):
+                        size += len(data) * (2 if isinstance(data, str) else 1)
+                        if size > MAX_SAVED_BYTES:
+                            return None
+                        items.append((fmt, data))
+                fmt = self._win32.EnumClipboardFormats(fmt)
+        return items
+
+    def write(self, items: Items):
+        with self._opened():
+            self._win32.EmptyClipboard()
+            for fmt, data in items:
+                self._win32.SetClipboardData(fmt, data)
+
+
+class MemoryClipboard:
+    """A clipboard in this process, where there is no Windows clipboard (benchmarks, other platforms)."""
+
+    def __init__(self, items: Items = ()):
+        self.items = list(items)
+        self._sequence = 0
+        self.writes = 0
+
+    def sequence(self) -> int:
+        return self._sequence
+
+    def read(self) -> Optional[Items]:
+        return list(self.items)
+
+    def write(self, items: Items):
+        self.items = list(items)
+        self._sequence += 1
+        self.writes += 1
+
+
+class ClipboardSession:
+    """
+    The clipboard as a campaign uses it. A write is skipped when the clipboard
+    still holds exactly what the last write put there: the content is hashed,
+    and the clipboard's sequence number tells whether anything else changed it
+    since. The operator's own contents are saved before the session's first
+    write and put back by restore() once every job that wrote through the
+    session has ended: campaigns and shards running at once share it.
+    """
+
+    def __init__(self, backend_factory):
+        self._backend_factory = backend_factory
+        self._backend = None
+        self._lock = threading.Lock()
+        self._key: Optional[bytes] = None  # Hash of what the last write put on the clipboard
+        self._sequence: Optional[int] = None  # The clipboard's sequence number right after that write
+        self._active = False  # Whether this session has written since the last restore
+        self._saved: Optional[Items] = None  # The operator's contents to restore, None if they couldn't be saved
+        self._users = set()  # Ids of the jobs that have written since the last restore (None: outside a job)
+        self.written = 0
+        self.skipped = 0
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            self._backend = self._backend_factory()
+        return self._backend
+
+    def put_text(self, text: str):
+        self._put("text", hashlib.sha256(text.encode("utf-8")).digest(), lambda: [(CF_UNICODETEXT, text)])
+
+    def put_image(self, file_path):
+        # Keyed on the file, not its pixels, so an unchanged image isn't even converted again
+        stat = os.stat(file_path)
+        key = hashlib.sha256(f"{os.path.abspath(file_path)}\0{stat.st_mtime_ns}\0{stat.st_size}".encode()).digest()
+        self._put("image", key, lambda: [(CF_DIB, image_dib(file_path))])
+
+    def put_files(self, file_paths):
+        data = drop_files(file_paths)
+        self._put("files", hashlib.sha256(data).digest(), lambda: [(CF_HDROP, data)])
+
+    def _put(self, kind: str, key: bytes, render):
+        job = current_job()
+        with self._lock:
+            self._users.add(job.id if job is not None else None)
+            backend = self.backend
+            sequence = backend.sequence()
+            if self._active and sequence == self._sequence and key == self._key:
+                self.skipped += 1
+                CLIPBOARD_WRITES.inc(kind=kind, result="skipped")
+                return
+            if not self._active or sequence != self._sequence:
+                # First write, or the operator copied something since the last one: that's what to restore
+                self._saved = self._save(backend)
+                self._active = True
+            items = render()  # Before opening the clipboard, which is then held only for the write itself
+            with span("clipboard.write", kind=kind):
+                backend.write(items)
+            self._key, self._sequence = key, backend.sequence()
+            self.written += 1
+            CLIPBOARD_WRITES.inc(kind=kind, result="written")
+
+    @staticmethod
+    def _save(backend) -> Optional[Items]:
+        try:
+            saved = backend.read()
+        except Exception as e:
+            log.warning("Could not save the clipboard, it won't be restored: %s", e)
+            return None
+        if saved is None:
+            log.info("The clipboard holds more than %d MB, it won't be restored", MAX_SAVED_BYTES // (1024 * 1024))
+        return saved
+
+    def release(self, job_id):
+        """The job is done with the clipboard: restore it, unless another job is still using the session."""
+        with self._lock:
+            if job_id not in self._users:
+                return
+            self._users.discard(job_id)
+            if self._users:
+                log.debug("Not restoring the clipboard yet, %d more jobs are using it", len(self._users))
+                return
+            self._restore()
+
+    def restore(self):
+        """Put the operator's clipboard back, unless they copied something after the last write."""
+        with self._lock:
+            self._restore()
+
+    def _restore(self):
+        if not self._active:
+            return
+        saved, sequence, written, skipped = self._saved, self._sequence, self.written, self.skipped
+        self._active, self._saved, self._key, self._sequence = False, None, None, None
+        self.written = self.skipped = 0
+        self._users.clear()
+        backend = self.backend
+        if saved is None:
+            result = "unsaved"
+        elif backend.sequence() != sequence:
+            result = "changed"
+        else:
+            try:
+                backend.write(saved)
+                result = "restored"
+            except Exception as e:
+                log.warning("Could not restore the clipboard: %s", e)
+                result = "failed"
+        CLIPBOARD_RESTORES.inc(result=result)
+        log.info("Clipboard %s after %d writes (%d more skipped as unchanged)", result, written, skipped)
+
+
+clipboard = ClipboardSession(Win32Clipboard if sys.platform == "win32" else MemoryClipboard)
+
+
+def restore_clipboard(job):
+    clipboard.release(job.id)
+
+
+finish_hooks.append(restore_clipboard)
@@ -3,22 +3,75 @@ from pathlib import Path
 import os
 
 class Settings:
-    FILE_DIALOG_INITIAL_STEP = True  # This is used for adding the upload directory address to the file dialog initially
     BACKEND_PORT = 5690 # Change this to the port you want to run the server on
     BACKEND_HOST = "localhost"
+    BACKEND_BIND = os.environ.get("WHATSAPP_BIND_HOST", "127.0.0.1")  # 0.0.0.0 to accept driver agents on other machines
     FRONTEND_PORT = 3434
     
     UPLOAD_DIR = Path(os.environ.get("UPLOADS_DIR", "./uploads")).resolve()
     THUMBNAIL_DIR = Path(os.environ.get("THUMBNAIL_DIR", "./thumbnails")).resolve()
     CONTACTS_DIR = Path(os.environ.get("CONTACTS_DIR", "./contacts")).resolve()
-    ADMIN_NUMBER_FILE = CONTACTS_DIR / "admin_number.json"  # Rebuild it from CONTACTS_DIR
-    
-    print(f"Uploads Directory: {UPLOAD_DIR}")
-    print(f"Thumbnail Directory: {THUMBNAIL_DIR}")
-    print(f"Contacts Directory: {CONTACTS_DIR}")
-    print(f"Admin Number File: {ADMIN_NUMBER_FILE}")
+    ADMIN_NUMBER_FILE = CONTACTS_DIR / "admin_number.json"  # Before settings_store.py; only read to migrate it
+    STATE_DIR = Path(os.environ.get("STATE_DIR", "./state")).resolve()  # Runtime state that must survive restarts
+    TRACE_DIR = STATE_DIR / "traces"
+    LOG_DIR = Path(os.environ.get("LOGS_DIR", "./logs")).resolve()
+    OPTIMIZED_DIR = Path(os.environ.get("OPTIMIZED_DIR", "./optimized")).resolve()  # Send-ready variants of uploads
 
     BASE_URL = f"http://localhost:{BACKEND_PORT}/"
     BASE_URL_UPLOAD = f"http://localhost:{BACKEND_PORT}/uploads"
 
-    MAX_FILE_SIZE = 100 * 1024 * 1024  # 100 MB
\ No newline at end of file
+    MAX_FILE_SIZE = 100 * 1024 * 1024  # 100 MB
+
+    # Country of phone numbers entered without a country code (phone.REGIONS lists the known ones)
+    DEFAULT_REGION = os.environ.get("WHATSAPP_DEFAULT_REGION", "PK")
+
+    # Per-account sending budgets (recipients per hour and per day, 0 = no limit), enforced by the token-bucket
+    # limiter in rate_limit.py. The hourly default is above what the batch pacing reaches (about 250 an hour), so
+    # it only holds back jobs sharing an account; there's no daily limit unless one is set. These are the defaults
+    # of the operator settings (PUT /settings/), which apply to every account without limits of its own.
+    RATE_LIMIT_PER_HOUR = int(os.environ.get("WHATSAPP_RATE_LIMIT_PER_HOUR", "300"))
+    RATE_LIMIT_PER_DAY = int(os.environ.get("WHATSAPP_RATE_LIMIT_PER_DAY", "0"))
+
+    # Span tracing of campaign hot paths, written per job to TRACE_DIR (off by default)
+    TRACE_ENABLED = os.environ.get("WHATSAPP_TRACE", "0") == "1"
+
+    # Upload-time optimization: images and videos are re-encoded in a process pool to these limits and
+    # campaigns send the smaller variant. Videos need ffmpeg (on PATH or FFMPEG_PATH); originals are kept.
+    MEDIA_OPTIMIZE = os.environ.get("WHATSAPP_OPTIMIZE_MEDIA", "1") == "1"
+    MEDIA_OPTIMIZE_WORKERS = 2
+    FFMPEG_PATH = os.environ.get("FFMPEG_PATH")
+    IMAGE_MAX_SIDE = 1600
+    IMAGE_QUALITY = 82
+    VIDEO_MAX_SIDE = 1280
+    VIDEO_BITRATE = "1500k"
+    AUDIO_BITRATE = "128k"
+
+    # "batch": all of a recipient's media in one paste (and all documents in another); "per_file": one paste each
+    ATTACHMENT_MODE = os.environ.get("WHATSAPP_ATTACHMENT_MODE", "batch")
+
+    # How messages are entered: "auto" picks per message (text_entry.plan), "value", "clipboard" or "typing"
+    # is tried first instead. Whichever it is, the next one is tried when the composed text doesn't match.
+    TEXT_ENTRY = os.environ.get("WHATSAPP_TEXT_ENTRY", "auto")
+
+    # Attachment campaigns skip contacts that were sent every one of the same files within this many days
+    # (0 = off, the default); the send form can override it per campaign. This and SENDING_WINDOWS are only
+    # the defaults of the operator settings (settings_store.py), which can be changed at runtime.
+    HISTORY_SKIP_DAYS = 0
+
+    # Default daily sending windows (local time, e.g. ["10:00-20:00"]) for campaigns that don't set their own;
+    # empty sends at any hour. The scheduler plans batches with this many seconds per contact until it has
+    # measured the real pace.
+    SENDING_WINDOWS = []
+    SCHEDULE_CONTACT_SECONDS = 20
+
+    # Driver agents (agent.py) run the UI automation on other desktops and pull work from this server. Without
+    # AGENT_TOKEN only agents on this machine may connect. An agent that stops polling for AGENT_TIMEOUT seconds
+    # is dropped; a single driver action (open a chat, send the attachments) may take up to AGENT_ACTION_TIMEOUT.
+    # With LOCAL_DRIVER off this server drives no desktop itself: campaigns without accounts use the agents.
+    AGENT_TOKEN = os.environ.get("WHATSAPP_AGENT_TOKEN")
+    AGENT_TIMEOUT = 60
+    AGENT_ACTION_TIMEOUT = 600
+    LOCAL_DRIVER = os.environ.get("WHATSAPP_LOCAL_DRIVER", "1") == "1"
+
+    # DEBUG also logs every pacing sleep; WARNING keeps only problems
+    LOG_LEVEL = os.environ.get("WHATSAPP_LOG_LEVEL", "INFO")
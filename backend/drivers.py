@@ -0,0 +1,97 @@
+# backend/drivers.py
+from backend.attachments import paste_groups
+from backend.helper import random_sleep
+from backend.jobs import current_job
+from backend.text_entry import plan
+from backend.tracing import span
+
+
+class DesktopDriver:
+    """Drives the WhatsApp desktop app on this machine through UI automation."""
+
+    name = "desktop"
+
+    def open_chat(self, number):
+        from backend.whatsapp_controller_after_update import open_chat_with_number
+        return open_chat_with_number(number)
+
+    def send_message(self, message):
+        from backend.whatsapp_controller_after_update import send_text_message
+        return send_text_message(message)
+
+    def send_attachments(self, file_paths):
+        from backend.whatsapp_controller_after_update import send_attachment_clipboard
+        return send_attachment_clipboard(file_paths)
+
+    def report_to_admin(self, no_number, invalid_number, batch_no, admin_no):
+        from backend.whatsapp_controler import send_defaulters_to_admin
+        return send_defaulters_to_admin(no_number, invalid_number, batch_no, admin_no)
+
+    def close(self):
+        from backend.clipboard import clipboard
+        from backend.whatsapp_controler import close_whatsapp
+        if current_job() is None:
+            clipboard.restore()  # On an agent no job ends here, so this is where the campaign is over
+        # In a job, other shards may still be pasting: the clipboard is restored once the job (and any other) ends
+        return close_whatsapp()
+
+
+class SimulatedDriver:
+    """
+    Stand-in for DesktopDriver that touches no UI. Every action just sleeps for
+    `action_delay` seconds, so campaigns can be exercised on any machine.
+
+    Args:
+        invalid_numbers: Numbers for which open_chat reports "Invalid Number"
+        action_delay: (min, max) seconds each action takes
+        attachment_mode: "batch" or "per_file", see attachments.paste_groups (default: Settings.ATTACHMENT_MODE)
+        paste_delay: Optional function giving the seconds one paste of a group of files takes,
+            instead of `action_delay`
+        text_entry: The text entry strategy tried first, see text_entry.plan (default: Settings.TEXT_ENTRY)
+        entry_delay: Optional function giving the seconds entering a message with a strategy takes,
+            called as entry_delay(strategy, message), instead of `action_delay`
+        unsupported_entry: Text entry strategies the simulated message box doesn't support, e.g. ("value",)
+    """
+
+    name = "simulated"
+
+    def __init__(self, invalid_numbers=(), action_delay=(0.05, 0.15), attachment_mode=None, paste_delay=None,
+                 text_entry=None, entry_delay=None, unsupported_entry=()):
+        self.invalid_numbers = set(invalid_numbers)
+        self.action_delay = action_delay
+        self.attachment_mode = attachment_mode
+        self.paste_delay = paste_delay
+        self.text_entry = text_entry
+        self.entry_delay = entry_delay
+        self.unsupported_entry = set(unsupported_entry)
+        self.actions = []  # (action, detail) tuples, in the order they were performed
+
+    def _act(self, action, detail=None, delay=None):
+        with span(f"simulated.{action}"):
+            random_sleep(*(self.action_delay if delay is None else (delay, delay)))
+        self.actions.append((action, detail))
+
+    def open_chat(self, number):
+        self._act("open_chat", number)
+        if number in self.invalid_numbers:
+            return "Invalid Number"
+        return True
+
+    def send_message(self, message):
+        strategy = next(name for name in plan(message, self.text_entry) if name not in self.unsupported_entry)
+        self._act("send_message", message, self.entry_delay(strategy, message) if self.entry_delay else None)
+        self.actions.append(("text_entry", strategy))
+        return True
+
+    def send_attachments(self, file_paths):
+        for group in paste_groups(file_paths, self.attachment_mode):
+            self._act("paste", len(group), self.paste_delay(group) if self.paste_delay else None)
+            self.actions.extend(("send_attachment", file_path) for file_path in group)
+        return True
+
+    def report_to_admin(self, no_number, invalid_number, batch_no, admin_no):
+        self._act("report_to_admin", batch_no)
+        return True
+
+    def close(self):
+        self.actions.append(("close", None))
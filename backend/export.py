@@ -0,0 +1,183 @@
+# backend/export.py
+import csv
+import io
+import re
+import zipfile
+from datetime import datetime
+from typing import Iterable, Iterator, Sequence, Tuple
+from xml.sax.saxutils import escape
+
+ROWS_PER_CHUNK = 500  # Rows rendered between two chunks handed to the response
+SHEET_NAME = "Results"
+
+_INVALID_XML = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+
+
+def _cell_text(value) -> str:
+    if value is None:
+        return ""
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return str(value)
+
+
+def format_rows(columns: Sequence[str], rows: Iterable[Tuple]) -> Iterator[Tuple]:
+    """Rows as exported: `recorded_at` (epoch seconds) as a local date and time."""
+    if "recorded_at" not in columns:
+        yield from rows
+        return
+    index = columns.index("recorded_at")
+    for row in rows:
+        row = list(row)
+        row[index] = datetime.fromtimestamp(row[index]).strftime("%Y-%m-%d %H:%M:%S")
+        yield tuple(row)
+
+
+def csv_chunks(columns: Sequence[str], rows: Iterable[Tuple]) -> Iterator[bytes]:
+    """UTF-8 CSV (with a BOM, so Excel reads non-Latin names right), ROWS_PER_CHUNK rows per chunk."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    buffer.write("\ufeff")
+    writer.writerow(columns)
+    for count, row in enumerate(rows, 1):
+        writer.writerow([_cell_text(value) for value in row])
+        if count % ROWS_PER_CHUNK == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+
+class _DrainBuffer:
+    """Write-only, unseekable file for ZipFile: what it writes is taken out between chunks."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _column_letter(index: int) -> str:
+    letters = ""
+    index += 1
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
+
+
+def _xml_cell(value, style: int = 0) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"<c><v>{value}</v></c>"
+    text = escape(_INVALID_XML.sub("", _cell_text(value)))
+    style_attribute = f' s="{style}"' if style else ""
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    # Inline strings: nothing to collect for a shared string table, and numbers stay text (no +92... -> 9.2E+11)
+    return f'<c t="inlineStr"{style_attribute}><is><t{space}>{text}</t></is></c>'
+
+
+_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_XML_HEADER = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+
+_CONTENT_TYPES = _XML_HEADER + (
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+_ROOT_RELS = _XML_HEADER + (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Id="rId1" Type="{_REL_NS}/officeDocument" Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+_WORKBOOK_RELS = _XML_HEADER + (
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    f'<Relationship Id="rId1" Type="{_REL_NS}/worksheet" Target="worksheets/sheet1.xml"/>'
+    f'<Relationship Id="rId2" Type="{_REL_NS}/styles" Target="styles.xml"/>'
+    '</Relationships>'
+)
+_STYLES = _XML_HEADER + (
+    f'<styleSheet xmlns="{_NS}">'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+
+def _workbook(filter_range: str) -> str:
+    return _XML_HEADER + (
+        f'<workbook xmlns="{_NS}" xmlns:r="{_REL_NS}">'
+        f'<sheets><sheet name="{SHEET_NAME}" sheetId="1" r:id="rId1"/></sheets>'
+        '<definedNames><definedName name="_xlnm._FilterDatabase" localSheetId="0" hidden="1">'
+        f'{SHEET_NAME}!{filter_range}</definedName></definedNames>'
+        '</workbook>'
+    )
+
+
+def xlsx_chunks(columns: Sequence[str], rows: Iterable[Tuple]) -> Iterator[bytes]:
+    """
+    A one-sheet XLSX workbook, written row by row into a deflated zip stream
+    and handed out ROWS_PER_CHUNK rows at a time: memory stays flat whatever
+    the row count. The header row is bold, frozen and has Excel's filters on.
+    """
+    buffer = _DrainBuffer()
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        archive.writestr("_rels/.rels", _ROOT_RELS)
+        archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        archive.writestr("xl/styles.xml", _STYLES)
+
+        row_count = 1
+        with archive.open("xl/worksheets/sheet1.xml", "w") as sheet:
+            sheet.write((
+                _XML_HEADER + f'<worksheet xmlns="{_NS}"><sheetViews><sheetView workbookViewId="0">'
+                '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/>'
+                '</sheetView></sheetViews><sheetData>'
+                '<row>' + "".join(_xml_cell(column, style=1) for column in columns) + '</row>'
+            ).encode("utf-8"))
+            lines = []
+            for row in rows:
+                lines.append("<row>" + "".join(_xml_cell(value) for value in row) + "</row>")
+                row_count += 1
+                if len(lines) == ROWS_PER_CHUNK:
+                    sheet.write("".join(lines).encode("utf-8"))
+                    lines.clear()
+                    yield buffer.drain()
+            filter_range = f"$A$1:${_column_letter(len(columns) - 1)}${row_count}"
+            sheet.write(("".join(lines) + f'</sheetData><autoFilter ref="{filter_range.replace("$", "")}"/>'
+                         '</worksheet>').encode("utf-8"))
+
+        archive.writestr("xl/workbook.xml", _workbook(filter_range))
+    yield buffer.drain()
+
+
+FORMATS = {
+    "csv": (csv_chunks, "text/csv; charset=utf-8"),
+    "xlsx": (xlsx_chunks, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+}
@@ -1,32 +1,25 @@
 # backend/helper.py
 import hashlib
+import logging
+import os
 from typing import Dict, Optional
 from pathlib import Path
 from fastapi import UploadFile, HTTPException
 import string
 import random
+import time
 from time import sleep
-import cv2
 from fastapi import HTTPException
 from collections import deque
+from backend.clipboard import clipboard
 from backend.config import Settings
+from backend.jobs import current_job
+from backend.metrics import THUMBNAIL_SECONDS, UPLOAD_BYTES, UPLOAD_SECONDS
+from backend.media_optimizer import discard_variant, schedule_optimization
+from backend.static import content_hash, remember_hash, versioned_url
+from backend.tracing import span
 
-def clean_number(number):
-    number = str(int(float(number)))
-    
-def clean_number(number):
-    number = str(int(float(number)))  # Convert to string and remove decimals
-
-    if number.startswith("+92"):
-        return number
-    elif number.startswith("92"):
-        return "+" + number
-    elif number.startswith("0"):
-        return "+92" + number[1:]
-    else:
-        return "+92" + number
-
-
+log = logging.getLogger(__name__)
 
 cleanup_queue = deque(maxlen=20)
 # Dictionary to store file hashes and their corresponding filenames
@@ -54,15 +47,28 @@ def generate_unique_filename(original_extension: str, upload_dir: Path, length:
         if not file_path.exists():
             return new_filename
 
+def thumbnail_url(thumbnail_filename: str) -> str:
+    """Content-versioned URL of a generated thumbnail, or the default one if it doesn't exist."""
+    thumbnail_path = Settings.THUMBNAIL_DIR / thumbnail_filename
+    if not thumbnail_path.exists():
+        return f"{Settings.BASE_URL}thumbnails/default.jpg"
+    return versioned_url(f"{Settings.BASE_URL}thumbnails", thumbnail_filename, content_hash(thumbnail_path))
+
 def generate_video_thumbnail(video_path: str, thumbnail_path: str) -> str:
     """
     Generates a high-quality JPEG thumbnail for the given video.
     Picks a representative frame (10s or middle), resizes if needed.
     """
+    with THUMBNAIL_SECONDS.time():
+        return _generate_video_thumbnail(video_path, thumbnail_path)
+
+def _generate_video_thumbnail(video_path: str, thumbnail_path: str) -> str:
+    import cv2  # Heavy, loaded on the first video upload (or by the startup warm-up) instead of at import
+    cap = None
     try:
         cap = cv2.VideoCapture(video_path)
         if not cap.isOpened():
-            print(f"Could not open video file: {video_path}")
+            log.warning("Could not open video file: %s", video_path)
             return f"{Settings.BASE_URL}thumbnails/default.jpg"
 
         fps = cap.get(cv2.CAP_PROP_FPS)
@@ -102,18 +108,18 @@ def generate_video_thumbnail(video_path: str, thumbnail_path: str) -> str:
             thumbnail_path = str(Path(thumbnail_path).with_suffix('.jpg'))
 
             cv2.imwrite(thumbnail_path, resized_frame, [int(cv2.IMWRITE_JPEG_QUALITY), 95])
+            return thumbnail_url(Path(thumbnail_path).name)
 
-            cap.release()
-            thumbnail_url = f"{Settings.BASE_URL}thumbnails/{Path(thumbnail_path).name}"
-            return thumbnail_url
-
-        cap.release()
-        print(f"Could not extract frame: {video_path}")
+        log.warning("Could not extract frame: %s", video_path)
         return f"{Settings.BASE_URL}thumbnails/default.jpg"
 
     except Exception as e:
-        print(f"Error generating thumbnail: {e}")
+        log.error("Error generating thumbnail: %s", e)
         return f"{Settings.BASE_URL}thumbnails/default.jpg"
+    finally:
+        # Also on the early returns and errors: an unreleased capture keeps the file and decoder open
+        if cap is not None:
+            cap.release()
     
 
 async def save_uploaded_file(file: UploadFile, allowed_extensions: tuple) -> dict:
@@ -125,25 +131,33 @@ async def save_uploaded_file(file: UploadFile, allowed_extensions: tuple) -> dic
             detail=f"Only {', '.join(allowed_extensions)} files are allowed"
         )
     
+    kind = "pdf" if extension == ".pdf" else "media"
+    with UPLOAD_SECONDS.time(kind=kind):
+        return await _save_uploaded_file(file, extension, kind)
+
+async def _save_uploaded_file(file: UploadFile, extension: str, kind: str) -> dict:
     # Read file content and calculate hash
     content = await file.read()
+    UPLOAD_BYTES.inc(len(content), kind=kind)
     file_hash = calculate_file_hash(content)
     
     # Check if this file has been uploaded before
     existing_filename = get_existing_file_by_hash(file_hash)
 
     if existing_filename:
+        schedule_optimization(Settings.UPLOAD_DIR / existing_filename)  # No-op if the variant is already there
+        existing_url = versioned_url(Settings.BASE_URL_UPLOAD, existing_filename, file_hash)
         if extension in ['.mp4', '.avi', '.mov', '.mkv']:
-            existing_thumbnail_url = f"{Settings.BASE_URL}thumbnails/{Path(existing_filename).stem}.jpg"
+            existing_thumbnail_url = thumbnail_url(f"{Path(existing_filename).stem}.jpg")
         else:
-            existing_thumbnail_url = f"{Settings.BASE_URL_UPLOAD}/{existing_filename}"
+            existing_thumbnail_url = existing_url
             
         return {
             "original_name": file.filename,
             "saved_name": existing_filename,
             "thumbnail": existing_thumbnail_url,
             "path": str(Settings.UPLOAD_DIR / existing_filename),
-            "url": f"{Settings.BASE_URL_UPLOAD}/{existing_filename}",
+            "url": existing_url,
             "is_duplicate": True
         }
     
@@ -153,15 +167,18 @@ async def save_uploaded_file(file: UploadFile, allowed_extensions: tuple) -> dic
     
     with open(file_path, "wb") as f:
         f.write(content)
+    remember_hash(file_path, file_hash)
+    schedule_optimization(file_path)
+    url = versioned_url(Settings.BASE_URL_UPLOAD, filename, file_hash)
 
     # If the file is a video, generate a thumbnail
     if extension in ['.mp4', '.avi', '.mov', '.mkv']:
         thumbnail_filename = f"{Path(filename).stem}.jpg" # Thumbnail saved with .jpg extension
         thumbnail_path = str(Settings.THUMBNAIL_DIR / thumbnail_filename)
-        thumbnail_url = generate_video_thumbnail(str(file_path), (thumbnail_path))
+        thumbnail = generate_video_thumbnail(str(file_path), (thumbnail_path))
 
     else:
-        thumbnail_url = f"{Settings.BASE_URL_UPLOAD}/{filename}"
+        thumbnail = url
         
     # Store hash mappings
     file_hash_map[file_hash] = filename
@@ -179,9 +196,9 @@ async def save_uploaded_file(file: UploadFile, allowed_extensions: tuple) -> dic
     return {
         "original_name": file.filename,
         "saved_name": filename,
-        "thumbnail": thumbnail_url,
+        "thumbnail": thumbnail,
         "path": str(file_path),
-        "url": f"{Settings.BASE_URL_UPLOAD}/{filename}",
+        "url": url,
         "is_duplicate": False
     }
 
@@ -212,7 +229,8 @@ async def remove_file(filename: str, file_type: str = "file") -> dict:
             del file_hash_map[file_hash]
             del filename_to_hash[filename]
 
-        # Delete the file
+        # Delete the file and its send-ready variant
+        discard_variant(file_path)
         file_path.unlink()
 
         return {
@@ -229,30 +247,48 @@ async def remove_file(filename: str, file_type: str = "file") -> dict:
         )
 
 
-def random_sleep(min_s=0.8, max_s=2.5):
+def random_sleep(min_s=0.8, max_s=2.5, pausable=False):
     duration = random.uniform(min_s, max_s)
-    print(f"Sleeping for {duration:.2f} seconds")
-    sleep(duration)
-
-from PIL import Image
-import win32clipboard
-import io
+    log.debug("Sleeping for %.2f seconds", duration)
+    job = current_job()
+    if job is not None:
+        with span("sleep", seconds=round(duration, 3), pausable=pausable):
+            job.sleep(duration, pausable)  # Wakes up (and raises JobCancelled) as soon as the job is cancelled
+    else:
+        sleep(duration)
+
+def wait_until(predicate, timeout, interval=0.25):
+    """Poll `predicate` until it is true or `timeout` expires; gives up as soon as the running job is cancelled."""
+    job = current_job()
+    if job is not None:
+        return job.wait_until(predicate, timeout, interval)
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return False
+        sleep(min(interval, remaining))
+    return True
+
+def wait_exists(control, timeout):
+    """Like `control.Exists(timeout)`, but gives up as soon as the running job is cancelled."""
+    job = current_job()
+    if job is None:
+        return control.Exists(timeout)
+    with span("wait_exists", timeout=timeout):
+        return job.wait_until(lambda: control.Exists(0, 0), timeout)
 
 def copy_file_to_clipboard(file_path):
-    # Open image
-    img = Image.open(file_path)
-
-    # Convert to DIB format
-    output = io.BytesIO()
-    img.convert("RGB").save(output, "BMP")
-    data = output.getvalue()[14:]  # skip BMP header
-    output.close()
-
-    # Copy to clipboard
-    win32clipboard.OpenClipboard()
-    win32clipboard.EmptyClipboard()
-    win32clipboard.SetClipboardData(win32clipboard.CF_DIB, data)
-    win32clipboard.CloseClipboard()
-
-def human_typing():
-    ...
\ No newline at end of file
+    """Put an image on the clipboard as a bitmap (CF_DIB); skipped when it is already there."""
+    with span("copy_file_to_clipboard", file=Path(file_path).name):
+        clipboard.put_image(file_path)
+
+def copy_files_to_clipboard(file_paths):
+    """Put `file_paths` on the clipboard as a file-drop list (CF_HDROP), like copying them in Explorer."""
+    with span("copy_files_to_clipboard", files=len(file_paths)):
+        clipboard.put_files(file_paths)
+
+def human_typing(control, text):
+    """Type `text` into `control` as key presses (the legacy controller's number and message boxes)."""
+    from backend.text_entry import STRATEGIES
+    STRATEGIES["typing"].enter(control, text)
\ No newline at end of file
@@ -0,0 +1,136 @@
+# backend/history.py
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+from typing import Dict, Iterable, List, Optional
+
+from backend.config import Settings
+from backend.jobs import current_job
+from backend.static import content_hash
+
+log = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS deliveries (
+    id INTEGER PRIMARY KEY,
+    number TEXT NOT NULL,
+    job_id TEXT,
+    campaign TEXT NOT NULL,
+    content_hash TEXT NOT NULL,
+    content_kind TEXT NOT NULL,
+    status TEXT NOT NULL,
+    sent_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS deliveries_content ON deliveries (content_hash, sent_at);
+CREATE INDEX IF NOT EXISTS deliveries_number ON deliveries (number, sent_at);
+CREATE INDEX IF NOT EXISTS deliveries_job ON deliveries (job_id);
+"""
+DELIVERED_STATUSES = ("success", "partial")
+DAY = 86400
+
+
+def text_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+def file_hashes(paths: Iterable) -> List[str]:
+    """
+    Content hashes of the files that can be read. A missing file is left out,
+    so it only fails the contacts it is sent to, not the whole campaign.
+    """
+    hashes = []
+    for path in paths:
+        try:
+            hashes.append(content_hash(path))
+        except OSError as e:
+            log.warning("Leaving %s out of the delivery history: %s", path, e)
+    return hashes
+
+
+class DeliveryHistory:
+    """
+    What was sent to whom: one row per content item (a file, or the message
+    text) delivered to a number, across every campaign and restart. Lives in
+    an SQLite database in STATE_DIR.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self.db_file.parent.mkdir(parents=True, exist_ok=True)
+            self._conn = sqlite3.connect(self.db_file, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.executescript(SCHEMA)
+        return self._conn
+
+    def record(self, number: str, campaign: str, items: Dict[str, str], status: str):
+        """Record that `items` ({content_hash: kind}) were delivered to `number` by the running job."""
+        if not items:
+            return
+        job = current_job()
+        now = time.time()
+        rows = [(number, job.id if job else None, campaign, item_hash, kind, status, now)
+                for item_hash, kind in items.items()]
+        with self._lock:
+            conn = self._connection()
+            with conn:
+                conn.executemany(
+                    "INSERT INTO deliveries (number, job_id, campaign, content_hash, content_kind, status, sent_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)", rows
+                )
+
+    def recently_sent(self, content_hashes: Iterable[str], days: float, match_all: bool = False) -> Dict[str, float]:
+        """
+        Every number that was delivered any of `content_hashes` (with
+        `match_all`, every one of them) in the last `days` days, with the latest
+        time it was. One query for a whole contact list, so the campaign loop
+        only does a dict lookup per contact.
+        """
+        content_hashes = list(set(content_hashes))
+        if not content_hashes or days <= 0:
+            return {}
+        placeholders = ",".join("?" * len(content_hashes))
+        statuses = ",".join("?" * len(DELIVERED_STATUSES))
+        having = "HAVING COUNT(DISTINCT content_hash) = ?" if match_all else ""
+        with self._lock:
+            rows = self._connection().execute(
+                f"SELECT number, MAX(sent_at) FROM deliveries "
+                f"WHERE content_hash IN ({placeholders}) AND sent_at >= ? AND status IN ({statuses}) "
+                f"GROUP BY number {having}",
+                [*content_hashes, time.time() - days * DAY, *DELIVERED_STATUSES,
+                 *([len(content_hashes)] if match_all else [])]
+            ).fetchall()
+        return dict(rows)
+
+    def query(self, number: Optional[str] = None, job_id: Optional[str] = None, limit: int = 100) -> List[dict]:
+        conditions, params = [], []
+        if number:
+            conditions.append("number = ?")
+            params.append(number)
+        if job_id:
+            conditions.append("job_id = ?")
+            params.append(job_id)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with self._lock:
+            cursor = self._connection().execute(
+                f"SELECT number, job_id, campaign, content_hash, content_kind, status, sent_at FROM deliveries "
+                f"{where} ORDER BY sent_at DESC, id DESC LIMIT ?", [*params, limit]
+            )
+            columns = [column[0] for column in cursor.description]
+            return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+history = DeliveryHistory(Settings.STATE_DIR / "history.sqlite3")
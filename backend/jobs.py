@@ -0,0 +1,338 @@
+# backend/jobs.py
+import asyncio
+import itertools
+import json
+import logging
+import threading
+import time
+import uuid
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Callable, Dict, Iterator, List, Optional
+
+from backend.metrics import CAMPAIGN_OUTCOMES, Gauge
+
+POLL_INTERVAL = 0.05  # Granularity of cancellable waits, keeps stop latency far below a second
+FINISHED_STATUSES = ("completed", "cancelled", "failed")
+LOG_BUFFER_SIZE = 1000  # Most recent log records kept per job for /jobs/{id}/logs
+TRACE_BUFFER_SIZE = 100_000  # Most recent trace spans kept per job (about 30 MB); older ones are dropped
+
+log = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class JobCancelled(BaseException):
+    """
+    Raised inside a running job as soon as it has been cancelled. Derives from
+    BaseException (like asyncio.CancelledError) so the broad `except Exception`
+    handlers around UI actions don't swallow it.
+    """
+
+
+class Job:
+    """A campaign running in its own worker thread, with a cancellation signal."""
+
+    def __init__(self, kind: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.kind = kind
+        self.status = "queued"
+        self.created_at = datetime.now().isoformat()
+        self.finished_at: Optional[str] = None
+        self.results: List[dict] = []
+        self.progress: dict = {}
+        self.schedule = None  # Start time and sending windows, see scheduler.py
+        self.settings = None  # Snapshot of the operator settings when the job was created, see settings_store.py
+        # Filled by tracing.span() when tracing is enabled; the count of spans recorded tells how many were dropped
+        self.trace_events = deque(maxlen=TRACE_BUFFER_SIZE)
+        self.trace_recorded = itertools.count(1)
+        self.trace_threads: Dict[int, str] = {}  # Thread id -> name, for the trace's thread_name events
+        self.log_records = deque(maxlen=LOG_BUFFER_SIZE)  # Filled by the log listener, see logs.py
+        self._cancelled = False
+        self._paused = False
+        self._state = threading.Condition()  # Notified whenever the job is cancelled, paused or resumed
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    @property
+    def done(self) -> bool:
+        return self.status in FINISHED_STATUSES
+
+    def cancel(self):
+        with self._state:
+            self._cancelled = True
+            self._state.notify_all()
+
+    def pause(self):
+        """Hold the job at its next pausable boundary until resume() is called."""
+        with self._state:
+            if not self.done:
+                self._paused = True
+                self.status = "paused"
+                self._state.notify_all()
+
+    def resume(self):
+        with self._state:
+            if self._paused:
+                self._paused = False
+                self.status = "running"
+                self._state.notify_all()
+
+    def _raise_if_cancelled(self):
+        if self._cancelled and not getattr(_local, "shielded", False):
+            raise JobCancelled(self.id)
+
+    def checkpoint(self, pausable: bool = False):
+        """
+        Action boundary: raise JobCancelled if the job has been cancelled.
+
+        With `pausable`, also block here while the job is paused. Only pass it
+        where nothing is half-done in the UI (e.g. before opening the next chat),
+        since the operator uses the machine while the job is paused.
+        """
+        with self._state:
+            self._raise_if_cancelled()
+            while pausable and self._paused:
+                self._state.wait()
+                self._raise_if_cancelled()
+
+    def sleep(self, seconds: float, pausable: bool = False):
+        """
+        Sleep for `seconds`, waking up immediately if the job is cancelled.
+
+        With `pausable`, time spent paused doesn't count: the countdown freezes on
+        pause and the remaining budget is slept after resume. Only use it for
+        pacing between actions, never in the middle of one.
+        """
+        remaining = max(seconds, 0)
+        with self._state:
+            while True:
+                self._raise_if_cancelled()
+                if pausable:
+                    while self._paused:
+                        self._state.wait()
+                        self._raise_if_cancelled()
+                if remaining <= 0:
+                    return
+                started = time.monotonic()
+                self._state.wait(remaining)
+                remaining -= time.monotonic() - started
+
+    def wait_until(self, predicate: Callable[[], bool], timeout: float, interval: float = 0.25) -> bool:
+        """Poll `predicate` until it is true or `timeout` expires, checking for cancellation in between."""
+        deadline = time.monotonic() + timeout
+        while True:
+            self._raise_if_cancelled()
+            if predicate():
+                return True
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return False
+            self.sleep(min(interval, remaining))
+
+    def emit(self, record: dict):
+        with self._lock:
+            self.results.append(record)
+        if record.get("status") != "batch_complete":
+            CAMPAIGN_OUTCOMES.inc(kind=self.kind, status=record.get("status"))
+        for hook in record_hooks:
+            try:
+                hook(self, record)
+            except Exception as e:
+                log.exception("Job %s record hook failed: %s", self.id, e)
+
+    def start(self, work: Callable[[], Iterator[dict]]):
+        """Run `work` (a generator of result records) in a background thread."""
+        self._thread = threading.Thread(target=self._run, args=(work,), name=f"job-{self.id}", daemon=True)
+        self._thread.start()
+
+    def spawn(self, target: Callable, *args, shard: Optional[str] = None) -> threading.Thread:
+        """Start a helper thread that belongs to this job (same cancel/pause signal)."""
+        def run():
+            _local.job = self
+            _local.shard = shard
+            try:
+                target(*args)
+            finally:
+                _local.job = None
+                _local.shard = None
+
+        thread = threading.Thread(target=run, name=f"job-{self.id}-{shard or 'worker'}", daemon=True)
+        thread.start()
+        return thread
+
+    def join(self, timeout: Optional[float] = None):
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def _run(self, work: Callable[[], Iterator[dict]]):
+        _local.job = self
+        with self._state:
+            if not self._paused:
+                self.status = "running"
+        try:
+            for record in work():
+                self.emit(record)
+            self.status = "completed"
+        except JobCancelled:
+            self.emit({
+                "status": "stopped",
+                "message": "Operation stopped",
+                "timestamp": datetime.now().strftime("%d-%m-%Y %H:%M:%S")
+            })
+            self.status = "cancelled"
+        except Exception as e:
+            log.exception("Job %s failed: %s", self.id, e)
+            self.emit({
+                "status": "error",
+                "message": f"An exception occurred: {str(e)}",
+                "timestamp": datetime.now().strftime("%d-%m-%Y %H:%M:%S")
+            })
+            self.status = "failed"
+        finally:
+            self.finished_at = datetime.now().isoformat()
+            for hook in finish_hooks:
+                try:
+                    hook(self)
+                except Exception as e:
+                    log.exception("Job %s finish hook failed: %s", self.id, e)
+            _local.job = None
+
+    async def stream(self):
+        """Yield the job's records as NDJSON lines until the job has finished."""
+        index = 0
+        while True:
+            done = self.done
+            with self._lock:
+                pending = self.results[index:]
+            for record in pending:
+                yield json.dumps(record) + "\n"
+            index += len(pending)
+            if done:
+                return
+            await asyncio.sleep(POLL_INTERVAL)
+
+    def remaining_contacts(self) -> Dict[str, int]:
+        """Contacts still to be sent to, per account, from the reported progress."""
+        progress = dict(self.progress)
+        if "total_contacts" in progress:
+            return {"default": progress["total_contacts"] - progress.get("contact", 0)}
+        return {
+            account_id: shard["total_contacts"] - shard.get("contact", 0)
+            for account_id, shard in progress.items()
+            if isinstance(shard, dict) and "total_contacts" in shard
+        }
+
+    def summary(self) -> Dict[str, dict]:
+        """Count result statuses per sending account (a single "default" account unless sharded)."""
+        with self._lock:
+            records = list(self.results)
+        accounts: Dict[str, dict] = {}
+        for record in records:
+            status = record.get("status")
+            if status == "batch_complete":
+                continue
+            account = accounts.setdefault(record.get("account", "default"), {"statuses": {}, "invalid_numbers": []})
+            account["statuses"][status] = account["statuses"].get(status, 0) + 1
+            if record.get("message") == "invalid number" or status == "Skipped Invalid Number":
+                account["invalid_numbers"].append({"name": record.get("name"), "number": record.get("number")})
+        return accounts
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+            "processed": len(self.results),
+            "progress": dict(self.progress),
+            "schedule": self.schedule.to_dict() if self.schedule is not None else None,
+        }
+
+
+jobs: Dict[str, Job] = {}
+finish_hooks: List[Callable[[Job], None]] = []  # Called on the job's thread once it has finished
+record_hooks: List[Callable[[Job, dict], None]] = []  # Called on the job's thread with every result record
+finished_queue = deque()
+MAX_FINISHED_JOBS = 50
+
+
+def create_job(kind: str) -> Job:
+    # Forget the oldest finished jobs so the registry doesn't grow for the lifetime of the server
+    for job_id, job in list(jobs.items()):
+        if job.done and job_id not in finished_queue:
+            finished_queue.append(job_id)
+    while len(finished_queue) > MAX_FINISHED_JOBS:
+        jobs.pop(finished_queue.popleft(), None)
+
+    job = Job(kind)
+    jobs[job.id] = job
+    return job
+
+
+def get_job(job_id: str) -> Optional[Job]:
+    return jobs.get(job_id)
+
+
+def active_jobs() -> List[Job]:
+    return [job for job in jobs.values() if not job.done]
+
+
+def current_job() -> Optional[Job]:
+    """The job running on this thread, if any."""
+    return getattr(_local, "job", None)
+
+
+def current_shard() -> Optional[str]:
+    """The account this thread sends for, inside a sharded job."""
+    return getattr(_local, "shard", None)
+
+
+def checkpoint(pausable: bool = False):
+    """Action boundary for code that runs inside a job; a no-op outside of one."""
+    job = current_job()
+    if job is not None:
+        job.checkpoint(pausable)
+
+
+@contextmanager
+def shielded():
+    """
+    Let the block run to the end even if the job is cancelled meanwhile: its
+    checkpoints, sleeps and waits don't raise JobCancelled. For the clean-up a
+    stopped job still owes (the admin report, closing WhatsApp), never for sending.
+    """
+    previous = getattr(_local, "shielded", False)
+    _local.shielded = True
+    try:
+        yield
+    finally:
+        _local.shielded = previous
+
+
+def report_progress(**fields):
+    """Record where the running job is (batch, contact, ...) for status queries."""
+    job = current_job()
+    if job is None:
+        return
+    shard = current_shard()
+    if shard is None:
+        job.progress.update(fields)
+    else:
+        job.progress.setdefault(shard, {}).update(fields)
+
+
+Gauge("whatsapp_active_jobs", "Campaign jobs that are queued, running or paused",
+      callback=lambda: len(active_jobs()))
+Gauge("whatsapp_campaign_queue_depth", "Contacts still waiting to be sent to across all active jobs",
+      callback=lambda: sum(sum(job.remaining_contacts().values()) for job in active_jobs()))
@@ -0,0 +1,106 @@
+# backend/logs.py
+import atexit
+import json
+import logging
+import queue
+import sys
+from datetime import datetime
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+from typing import Optional
+
+from backend.config import Settings
+from backend.jobs import current_job, current_shard, get_job
+
+LOG_FILE_MAX_BYTES = 5 * 1024 * 1024
+LOG_FILE_BACKUPS = 5
+
+_listener: Optional[QueueListener] = None
+
+
+class JobContextFilter(logging.Filter):
+    """Stamps each record with the job (and shard) of the thread that logged it."""
+
+    def filter(self, record):
+        job = current_job()
+        record.job_id = job.id if job is not None else None
+        record.shard = current_shard()
+        return True
+
+
+def to_dict(record: logging.LogRecord) -> dict:
+    entry = {
+        "ts": datetime.fromtimestamp(record.created).isoformat(timespec="milliseconds"),
+        "level": record.levelname,
+        "logger": record.name,
+        "message": record.getMessage(),
+        "thread": record.threadName,
+    }
+    if getattr(record, "job_id", None):
+        entry["job_id"] = record.job_id
+    if getattr(record, "shard", None):
+        entry["shard"] = record.shard
+    return entry
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line, so log files can be grepped and parsed."""
+
+    def format(self, record):
+        return json.dumps(to_dict(record), ensure_ascii=False)
+
+
+class JobBufferHandler(logging.Handler):
+    """Keeps the most recent records of each job on the job itself, for /jobs/{id}/logs."""
+
+    def emit(self, record):
+        job_id = getattr(record, "job_id", None)
+        if not job_id:
+            return
+        job = get_job(job_id)
+        if job is not None:
+            job.log_records.append(to_dict(record))
+
+
+def setup_logging(level: Optional[str] = None):
+    """
+    Route the `backend.*` loggers through a queue: callers only enqueue the
+    record, and a listener thread formats it and writes the rotating JSON log
+    file, the console (when there is one) and the per-job buffers. Safe to call
+    more than once.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    Settings.LOG_DIR.mkdir(parents=True, exist_ok=True)
+    file_handler = RotatingFileHandler(Settings.LOG_DIR / "backend.log", maxBytes=LOG_FILE_MAX_BYTES,
+                                       backupCount=LOG_FILE_BACKUPS, encoding="utf-8")
+    file_handler.setFormatter(JsonFormatter())
+    handlers = [file_handler, JobBufferHandler()]
+
+    # The --noconsole build has no stdout at all
+    if sys.stderr is not None:
+        console_handler = logging.StreamHandler(sys.stderr)
+        console_handler.setFormatter(logging.Formatter("[%(levelname)s]: %(message)s"))
+        handlers.append(console_handler)
+
+    log_queue = queue.SimpleQueue()
+    queue_handler = QueueHandler(log_queue)
+    queue_handler.addFilter(JobContextFilter())
+
+    logger = logging.getLogger("backend")
+    logger.setLevel((level or Settings.LOG_LEVEL).upper())
+    logger.addHandler(queue_handler)
+    logger.propagate = False
+
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+
+def shutdown_logging():
+    """Flush the queue and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -1,31 +1,56 @@
 from backend.paths import setup_directories
 setup_directories()
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Request
+from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Query, Request
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from fastapi.staticfiles import StaticFiles
-import pandas as pd
-import random
-import asyncio
-import math
-from datetime import datetime
+from fastapi.responses import FileResponse, PlainTextResponse, Response, StreamingResponse
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta
 import json
+import logging
 import os
+import time
 from typing import List, Optional
-from threading import Event
-import asyncio
 from pydantic import BaseModel
 import uvicorn
-from backend.whatsapp_controler import (number_search, open_whatsapp, send_message, check_whatsapp_focus,
-                                send_defaulters_to_admin, send_image_attachments, send_pdf_attachments,
-                                close_whatsapp)
-from backend.whatsapp_controller_after_update import open_chat_with_number, send_message_clipboard, send_attachment_clipboard
-from backend.helper import clean_number, random_sleep, save_uploaded_file, remove_file
+from backend.campaign import attachment_campaign, balances_campaign
+from backend.drivers import DesktopDriver
+from backend.jobs import active_jobs, create_job, get_job, jobs
+from backend.sharding import accounts, sharded_attachment_campaign
+from backend.rate_limit import predict_completion, rate_limiter
+from backend.helper import save_uploaded_file, remove_file
+from backend.phone import canonicalize, is_blank, normalize
 from backend.config import Settings
-
-stop_event = Event()
-
-app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None)
+from backend import metrics
+from backend.tracing import trace_path
+from backend.logs import setup_logging
+from backend.warmup import start_warm_up
+from backend.static import CachedStaticFiles
+from backend.middleware import CompressionMiddleware, SecurityHeadersMiddleware
+from backend.responses import FastJSONResponse, loads
+from backend.wait_model import wait_model
+from backend.history import history
+from backend.results import COLUMNS as RESULT_COLUMNS, result_store
+from backend.export import FORMATS as EXPORT_FORMATS, format_rows
+from backend.scheduler import Schedule, SendingWindows, parse_start
+from backend.agents import registry as agent_registry
+from backend.settings_store import settings_store
+from backend.spreadsheet import iter_rows
+
+setup_logging()
+log = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Load pandas, cv2, the UI automation modules, ... once the server already answers requests
+    start_warm_up()
+    settings_store.start_watching()
+    yield
+    settings_store.stop_watching()
+
+
+app = FastAPI(docs_url=None, redoc_url=None, openapi_url=None, lifespan=lifespan,
+              default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -36,44 +61,83 @@ app.add_middleware(
     expose_headers=["*"]
 )
 
-# CSP Middleware
-@app.middleware("http")
-async def add_security_headers(request: Request, call_next):
-    response = await call_next(request)
-    response.headers["Content-Security-Policy"] = (
-        "default-src 'self'; "
-        "img-src 'self' data: https://fastapi.tiangolo.com; "
-        "media-src 'self' blob:; "
-        "script-src 'self' https://cdn.jsdelivr.net; "
-        "style-src 'self' https://cdn.jsdelivr.net; "
-        "connect-src 'self' http://localhost:{Settings.FRONTEND_PORT} http://localhost:{Settings.BACKEND_PORT}; "
-        "font-src 'self' https://cdn.jsdelivr.net; "
-        "object-src 'none'; "
-        "frame-ancestors 'none'; "
-        "base-uri 'self'; "
-        "form-action 'self';"
-    )
-    return response
-
-app.mount("/uploads", StaticFiles(directory=Settings.UPLOAD_DIR), name="uploads")
-app.mount("/thumbnails", StaticFiles(directory=Settings.THUMBNAIL_DIR), name="thumbnails")
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(SecurityHeadersMiddleware)
+
+# Uploaded files and thumbnails never change once written: content-hash ETags, immutable ?v= URLs, Range
+app.mount("/uploads", CachedStaticFiles(directory=Settings.UPLOAD_DIR), name="uploads")
+app.mount("/thumbnails", CachedStaticFiles(directory=Settings.THUMBNAIL_DIR), name="thumbnails")
+
+
+def record_csv_throughput(endpoint: str, rows: int, started: float):
+    elapsed = time.perf_counter() - started
+    metrics.CSV_ROWS.inc(rows, endpoint=endpoint)
+    metrics.CSV_ROWS_PER_SECOND.set(rows / elapsed if elapsed > 0 else 0, endpoint=endpoint)
+
+
+def build_schedule(start_at: Optional[str], sending_windows, pacing: Optional[dict] = None) -> Optional[Schedule]:
+    """
+    The campaign's Schedule from the request's start time and sending windows (a list, JSON list or
+    comma-separated "10:00-20:00" ranges; the operator settings' windows when not given). None sends right away.
+    """
+    try:
+        if isinstance(sending_windows, str):
+            sending_windows = (json.loads(sending_windows) if sending_windows.strip().startswith("[")
+                               else [spec for spec in sending_windows.split(",") if spec.strip()])
+        windows = sending_windows or list(settings_store.get().sending_windows)
+        if not start_at and not windows:
+            return None
+        return Schedule(start_at=parse_start(start_at) if start_at else None,
+                        windows=SendingWindows.parse(windows) if windows else None, pacing=pacing)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def default_accounts() -> List[str]:
+    """
+    Accounts for a campaign that didn't pick any: none (the local desktop) unless Settings.LOCAL_DRIVER is
+    off, then every connected driver agent.
+    """
+    if Settings.LOCAL_DRIVER:
+        return []
+    agents = agent_registry.connected()
+    if not agents:
+        raise HTTPException(status_code=503, detail="No driver agent is connected")
+    return [agent.id for agent in agents]
+
+
+def campaign_response(job, contacts: int):
+    """
+    The started job's NDJSON stream. A campaign with a later start time answers right away instead, with
+    its projected finish; its records can be followed with GET /jobs/{job_id}/stream.
+    """
+    headers = {"X-Job-Id": job.id}
+    if job.schedule is None:
+        return StreamingResponse(job.stream(), media_type="application/json", headers=headers)
+    projected_finish = job.schedule.project_finish(contacts).isoformat(timespec="seconds")
+    headers["X-Projected-Finish"] = projected_finish
+    if job.schedule.start_at is None or job.schedule.start_at <= datetime.now():
+        return StreamingResponse(job.stream(), media_type="application/json", headers=headers)
+    return FastJSONResponse({"job": job.to_dict(), "projected_finish": projected_finish}, status_code=202,
+                            headers=headers)
 
 
 @app.post("/upload-csv-balances/")
-async def upload_csv_balances(file: UploadFile = File(...)):
+def upload_csv_balances(file: UploadFile = File(...)):
+    """Name, balance and number per row, from a CSV, XLSX or ODS file (a sync def: parsing runs off the event loop)"""
     try:
-        contents = await file.read()
-        df = pd.read_csv(pd.io.common.BytesIO(contents), header=None)
-        if df.shape[1] < 3:
-            raise HTTPException(status_code=400, detail="CSV must have at least three columns: Name, Number, and Balance")
-        
+        started = time.perf_counter()
         data = []
-        for _, row in df.iterrows():
-            name = str(row[0]).strip().upper()
-            balance_str = str(row[1]).strip()
-            number = str(row[2]).strip()
+        columns = 0
+        for row in iter_rows(file.file, file.filename):
+            columns = max(columns, len(row))
+            row += [""] * (3 - len(row))
+            name = row[0].upper()
+            balance_str = row[1]
+            number = row[2]
             
-            number = clean_number(number)
+            # Canonical once, here: the campaign sends to "e164" without parsing the number again
+            e164 = normalize(number)
             
             try:
                 balance = int(float(balance_str))
@@ -83,10 +147,14 @@ async def upload_csv_balances(file: UploadFile = File(...)):
             data.append({
                 "name": name,
                 "balance": balance,
-                "number": number
+                "number": e164 or ("" if is_blank(number) else number),
+                "e164": e164
             })
-            
-        return {"data": data}
+
+        if data and columns < 3:
+            raise HTTPException(status_code=400, detail="The file must have at least three columns: Name, Balance and Number")
+        record_csv_throughput("upload-csv-balances", len(data), started)
+        return FastJSONResponse({"data": data})
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -94,127 +162,30 @@ async def upload_csv_balances(file: UploadFile = File(...)):
 @app.post("/send-balances/")
 async def send_balances(request: dict):
     try:
-        admin_no = request.get("admin_no", "")
-        data = request.get("data", [])
+        # One snapshot for the whole campaign: later settings changes apply to the next one
+        settings = settings_store.get()
+        admin_no = request.get("admin_no") or settings.admin_number
+        data = canonicalize(request.get("data", []))
         
         if not admin_no or not admin_no.strip():
             raise HTTPException(status_code=400, detail="Admin number is required.")
+        if normalize(admin_no) is None:
+            raise HTTPException(status_code=400, detail=f"Admin number {admin_no!r} is not a valid phone number.")
         
-        no_number = []
-        invalid_number = []
-        
-        async def balances_sender():
-            pause_after = random.randint(12, 20)
-
-            try:
-                for index, entry in enumerate(data):
-                    await asyncio.sleep(random.uniform(0.6, 1.4))
-
-                    if int(float(str(entry["balance"]))) < 500:
-                        yield json.dumps({
-                            "name": entry["name"],
-                            "number": entry["number"],
-                            "balance": float(entry["balance"]),
-                            "status": "Skipped Insufficient Balance",
-                            "message": "Insufficient balance",
-                            "timestamp": datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-                        }) + "\n"
-                        await asyncio.sleep(random.uniform(0.5, 1.0))
-                        continue
-                    
-                    if int(str(entry["number"])) == 0:
-                        yield json.dumps({
-                            "name": entry["name"],
-                            "number": entry["number"],
-                            "balance": float(entry["balance"]),
-                            "status": "Skipped No Number",
-                            "message": "No number entered",
-                            "timestamp": datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-                        }) + "\n"
-                        no_number.append((entry["name"], entry["balance"]))
-                        await asyncio.sleep(random.uniform(0.5, 1.0))
-                        continue
-                    
-                    try:
-                        clean_number_entry = clean_number(entry["number"])
-                        number_searching = open_chat_with_number(clean_number_entry)
-                        # number_searching = number_search(window, entry["number"])
-                        await asyncio.sleep(random.uniform(0.8, 1.3))
-
-                        if number_searching is True:
-                            message_template = entry.get("messageTemplate", "")
-                            message = message_template.format(
-                                name=entry["name"].upper(), 
-                                balance=int(float(entry["balance"]))
-                            )
-
-                            random_sleep(1.0, 2.0)
-
-                            # if send_message(window, message):
-                            if send_message_clipboard(message):
-                                yield json.dumps({
-                                    "name": entry["name"],
-                                    "number": entry["number"],
-                                    "balance": float(entry["balance"]),
-                                    "status": "success",
-                                    "message": "Message sent successfully",
-                                    "timestamp": datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-                                }) + "\n"
-                                
-                                if random.random() < 0.15:
-                                    await random_sleep(2, 4)
-                                
-                            else:
-                                yield json.dumps({
-                                    "name": entry["name"],
-                                    "number": entry["number"],
-                                    "balance": float(entry["balance"]),
-                                    "status": "error",
-                                    "message": "Failed to send message",
-                                    "timestamp": datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-                                }) + "\n"
-                                
-                        elif number_searching == "Invalid Number":
-                            invalid_number.append((entry["name"], entry["balance"]))
-                            yield json.dumps({
-                                "name": entry["name"],
-                                "number": entry["number"],
-                                "balance": float(entry["balance"]),
-                                "status": "Skipped Invalid Number",
-                                "message": "Number is Invalid",
-                                "timestamp": datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-                            }) + "\n"
-
-                        random_sleep(1.0, 2.0)
-
-                        # Extra rest every few messages (VERY IMPORTANT)
-                        if index > 0 and index % pause_after == 0:
-                            await asyncio.sleep(random.uniform(80, 100))
-                            print(f"Taking a longer break after sending {index} messages.")
-                            pause_after = random.randint(12, 20)
-                            print(f"New pause after: {pause_after} messages.")
-                            
-                    except Exception as e:
-                        yield json.dumps({
-                            "name": entry["name"],
-                            "number": entry["number"],
-                            "balance": float(entry["balance"]),
-                            "status": "error",
-                            "message": str(e),
-                            "timestamp": datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-                        }) + "\n"
-
-            finally:
-                send_defaulters_to_admin(
-                    no_number,
-                    invalid_number,
-                    batch_no=None,
-                    admin_no=clean_number(admin_no)
-                )
-                close_whatsapp()
-            
-        return StreamingResponse(balances_sender(), media_type="application/json")
+        schedule = build_schedule(request.get("start_at"), request.get("sending_windows"))
+        # One session sends a balances campaign: this desktop's, or the first agent's when it drives none
+        account_ids = default_accounts()
+        account_id = account_ids[0] if account_ids else "default"
+        driver_factory = accounts[account_id].driver_factory
+        job = create_job("balances")
+        job.schedule = schedule
+        job.settings = settings
+        # The account's own send budget: an agent's isn't the local desktop's
+        job.start(lambda: balances_campaign(driver_factory(), data, admin_no, account_id=account_id))
+        return campaign_response(job, len(data))
     
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -244,195 +215,63 @@ async def send_attachments(
     media_paths: str = Form(None),
     pdf_paths: str = Form(None),
     message: str = Form(None),
-    admin_no: str = Form(...),
-    min_batch_size: int = Form(15),
-    max_batch_size: int = Form(35),
-    min_batch_delay: int = Form(60),
-    max_batch_delay: int = Form(120)
+    admin_no: str = Form(None),
+    min_batch_size: int = Form(None),
+    max_batch_size: int = Form(None),
+    min_batch_delay: int = Form(None),
+    max_batch_delay: int = Form(None),
+    account_ids: str = Form(None),
+    skip_recent_days: float = Form(None),
+    start_at: str = Form(None),
+    sending_windows: str = Form(None)
 ):
     try:
-        # Settings.FILE_DIALOG_INITIAL_STEP = True  # This is used for adding the upload directory to the file dialog initially when the endpoint is called
-
+        # One snapshot for the whole campaign; fields the form leaves out come from it
+        settings = settings_store.get()
+        admin_no = admin_no or settings.admin_number
         if not admin_no or not admin_no.strip():
             raise HTTPException(status_code=400, detail="Admin number is required.")
-        stop_event.clear()
-        processed_numbers = set()
+        if normalize(admin_no) is None:
+            raise HTTPException(status_code=400, detail=f"Admin number {admin_no!r} is not a valid phone number.")
         
-        data = json.loads(data)
+        data = canonicalize(json.loads(data))
         media_paths = json.loads(media_paths) if media_paths and media_paths != "[]" else []
         pdf_paths = json.loads(pdf_paths) if pdf_paths and pdf_paths != "[]" else []
+        account_ids = json.loads(account_ids) if account_ids and account_ids != "[]" else default_accounts()
         if message:
             for entry in data:
                 entry["messageTemplate"] = message
-                
-        batch_size = random.randint(min_batch_size, max_batch_size)
-        batches = [data[i:i + batch_size] for i in range(0, len(data), batch_size)]
-        total_batches = math.ceil(len(data) / batch_size)
-        
-        async def sender():
-            for batch_index, batch in enumerate(batches):
-                invalid_number = []
-                # window = open_whatsapp()
-                # if not window:
-                #     yield json.dumps({"status": "error", "message": "Failed to open WhatsApp"}) + "\n"
-                #     return
-                
-                await asyncio.sleep(random.uniform(1, 2))
-                
-                for entry in batch:
-                    number = clean_number(entry.get("number"))
-                    name = entry.get("name")
-                    # if stop_event.is_set() or not check_whatsapp_focus(window):
-                    #     stop_event.set()
-                    #     yield json.dumps({
-                    #         "name": name,
-                    #         "number": number,
-                    #         "status": "stopped",
-                    #         "message": "Operation stopped",
-                    #         "timestamp": datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-                    #     }) + "\n"
-                    #     return
-
-                    if number in processed_numbers:
-                            yield json.dumps({
-                                "name": name,
-                                "number": number,
-                                "status": "error",
-                                "message": "Already Processed (Duplicate Entry)",
-                                "timestamp": datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-                            }) + "\n"
-                            continue
-                    try:
-                        # number_searching = number_search(window, number)
-                        number_searching = open_chat_with_number(number)
-                        random_sleep(2.0, 3.0)
-                        
-                        if number_searching == "Invalid Number":
-                            invalid_number.append((name, number))
-                            yield json.dumps({
-                                "name": name,
-                                "number": number,
-                                "status": "skipped",
-                                "message": "invalid number",
-                                "timestamp": datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-                            }) + "\n"
-                            continue
-                        
-                        # Initialize all status as None (not attempted)
-                        message_sent = None
-                        pdf_sent = None
-                        media_sent = None
-                        
-                        if number_searching is True:
-                            # Send media if it exists
-                            if media_paths:
-                                # media_sent = send_image_attachments(window, media_paths)
-                                full_media_paths = [
-                                    str(Settings.UPLOAD_DIR / filename)
-                                    for filename in media_paths
-                                ]
-                                media_sent = send_attachment_clipboard(full_media_paths)
-                                random_sleep(1.4, 2.0)
-                                    
-                            # Send PDF if it exists
-                            if pdf_paths:
-                                # pdf_sent = send_pdf_attachments(window, pdf_paths)
-                                full_pdf_paths = [
-                                    str(Settings.UPLOAD_DIR / filename)
-                                    for filename in pdf_paths
-                                ]
-                                pdf_sent = send_attachment_clipboard(full_pdf_paths)
-                                await asyncio.sleep(random.uniform(1.4, 2.0))
-                                    
-                            # Send message if it exists
-                            message_template = entry.get("messageTemplate", "")
-                            if message_template:
-                                if "{name}" in message_template:
-                                    formatted_message = message_template.format(name=name)
-                                else:
-                                    formatted_message = message_template
-                                    
-                                # message_sent = send_message(window, formatted_message)
-                                message_sent = send_message_clipboard(formatted_message)
-                                random_sleep(1.4, 2.0)
-                                
-                                
-                            # Determine status and summary message
-                            # Only consider operations that were attempted (not None)
-                            attempted_results = []
-                            attempted_names = []
-                            
-                            if message_sent is not None:
-                                attempted_results.append(message_sent)
-                                attempted_names.append("message")
-                            if media_sent is not None:
-                                attempted_results.append(media_sent)
-                                attempted_names.append("media")
-                            if pdf_sent is not None:
-                                attempted_results.append(pdf_sent)
-                                attempted_names.append("pdf")
-                            
-                            # Handle case where nothing was attempted
-                            if not attempted_results:
-                                status = "skipped"
-                                summary = "Nothing to send"
-                            else:
-                                # Calculate success/failure
-                                failed_ops = [name for name, result in zip(attempted_names, attempted_results) if not result]
-                                succeeded_ops = [name for name, result in zip(attempted_names, attempted_results) if result]
-                                
-                                if all(attempted_results):
-                                    status = "success"
-                                    summary = "All operations completed successfully"
-                                elif not any(attempted_results):
-                                    status = "error"
-                                    summary = "All operations failed"
-                                else:
-                                    status = "partial"
-                                    summary = f"{' and '.join(succeeded_ops).capitalize()} sent, but {' and '.join(failed_ops)} failed"
-                            
-                            yield json.dumps({
-                                "name": name,
-                                "number": number,
-                                "status": status,
-                                "message_sent": message_sent,
-                                "media_sent": media_sent,
-                                "pdf_sent": pdf_sent,
-                                "message": summary,
-                                "timestamp": datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-                            }) + "\n"
-                            
-                            # Add to processed numbers if any operation succeeded
-                            if attempted_results and any(attempted_results):
-                                processed_numbers.add(number)
-                                
-                    except Exception as e: 
-                        yield json.dumps({
-                            "name": name,
-                            "number": number,
-                            "status": "error",
-                            "message": f"An exception occurred: {str(e)}",
-                            "timestamp": datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-                        }) + "\n"
-                        
-                batch_no = f"{batch_index + 1}/{total_batches}"
-                send_defaulters_to_admin(None, invalid_number, batch_no, clean_number(admin_no))
-                # close_whatsapp(window)
-                # window = None
-
-                # If there are more batches remaining, wait before processing next batch
-                if batch_index < len(batches) - 1:
-                    yield json.dumps({
-                        "status": "batch_complete",
-                        "message": f"Completed batch {batch_index + 1}/{len(batches)}. Waiting longer before next batch.",
-                        "timestamp": datetime.now().strftime("%d-%m-%Y %H:%M:%S")
-                    }) + "\n"
-                    await random_sleep(min_batch_delay, max_batch_delay)
-                    
-            close_whatsapp()
-                
-        return StreamingResponse(sender(), media_type="application/json")
+
+        unknown_accounts = [account_id for account_id in account_ids if account_id not in accounts]
+        if unknown_accounts:
+            raise HTTPException(status_code=400, detail=f"Unknown accounts: {', '.join(unknown_accounts)}")
+
+        requested = {
+            "min_batch_size": min_batch_size,
+            "max_batch_size": max_batch_size,
+            "min_batch_delay": min_batch_delay,
+            "max_batch_delay": max_batch_delay,
+        }
+        pacing = {
+            **settings.pacing(),
+            **{key: value for key, value in requested.items() if value is not None},
+            # Skip contacts sent the same content in the last N days (0 turns the rule off)
+            "skip_recent_days": settings.history_skip_days if skip_recent_days is None else skip_recent_days
+        }
+        # Not before start_at (ISO date-time) and only inside the daily sending windows
+        schedule = build_schedule(start_at, sending_windows, pacing)
+        job = create_job("attachments")
+        job.schedule = schedule
+        job.settings = settings
+        if account_ids:
+            # Shard the contacts across the selected accounts, each sending in parallel with its own pacing
+            job.start(lambda: sharded_attachment_campaign(account_ids, data, media_paths, pdf_paths, admin_no, **pacing))
+        else:
+            job.start(lambda: attachment_campaign(DesktopDriver(), data, media_paths, pdf_paths, admin_no, **pacing))
+        return campaign_response(job, len(data))
     
+    except HTTPException as e:
+        raise e
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
     
@@ -505,11 +344,183 @@ async def remove_pdf(filename: str):
 @app.post("/stop/")
 async def stop_operation():
     try:
-        stop_event.set()
+        for job in active_jobs():
+            job.cancel()
         return {"message": "Stop signal sent. Running operations will be stopped."}
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
+@app.get("/jobs/")
+async def list_jobs():
+    """List running and recently finished jobs"""
+    return [job.to_dict() for job in jobs.values()]
+
+@app.get("/jobs/{job_id}")
+async def get_job_status(job_id: str):
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
+@app.get("/jobs/{job_id}/stream")
+async def stream_job(job_id: str):
+    """The job's NDJSON records from the first one, following it until it finishes (e.g. a scheduled campaign)"""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return StreamingResponse(job.stream(), media_type="application/json", headers={"X-Job-Id": job.id})
+
+@app.get("/jobs/{job_id}/report")
+async def get_job_report(job_id: str):
+    """Merged outcome counts and invalid numbers, per sending account"""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {"job": job.to_dict(), "accounts": job.summary()}
+
+@app.get("/jobs/{job_id}/logs")
+async def get_job_logs(job_id: str, limit: int = 100, level: Optional[str] = None):
+    """The job's last `limit` log records, optionally only those at `level` or above"""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    records = list(job.log_records)
+    if level:
+        min_level = logging.getLevelName(level.upper())
+        if not isinstance(min_level, int):
+            raise HTTPException(status_code=400, detail=f"Unknown log level: {level}")
+        records = [r for r in records if logging.getLevelName(r["level"]) >= min_level]
+    return {"job_id": job_id, "records": records[-limit:] if limit > 0 else []}
+
+@app.get("/jobs/{job_id}/trace")
+async def get_job_trace(job_id: str):
+    """Chrome trace of a finished job (load in chrome://tracing or ui.perfetto.dev); needs WHATSAPP_TRACE=1"""
+    path = trace_path(job_id)
+    if not path.exists():
+        raise HTTPException(status_code=404, detail="No trace recorded for this job")
+    return FileResponse(path, media_type="application/json", filename=f"trace_{job_id}.json")
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Cancel a single running job, leaving any others untouched"""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    job.cancel()
+    return {"message": f"Stop signal sent to job {job_id}.", "job": job.to_dict()}
+
+@app.post("/jobs/{job_id}/pause")
+async def pause_job(job_id: str):
+    """Pause a job before its next contact; its position and pacing state are kept"""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if job.done:
+        raise HTTPException(status_code=409, detail=f"Job already {job.status}")
+    job.pause()
+    return {"message": f"Job {job_id} will pause before its next contact.", "job": job.to_dict()}
+
+@app.post("/jobs/{job_id}/resume")
+async def resume_job(job_id: str):
+    """Resume a paused job at the contact and batch where it stopped"""
+    job = get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    if not job.paused:
+        raise HTTPException(status_code=409, detail="Job is not paused")
+    job.resume()
+    return {"message": f"Job {job_id} resumed.", "job": job.to_dict()}
+
+
+@app.get("/accounts/")
+async def list_accounts():
+    """List the sending accounts a campaign can be sharded across"""
+    return [account.to_dict() for account in accounts.values()]
+
+def _check_agent_token(request: Request):
+    """Agents must send Settings.AGENT_TOKEN as X-Agent-Token; without a token set, only local ones may connect."""
+    if Settings.AGENT_TOKEN:
+        if request.headers.get("X-Agent-Token") != Settings.AGENT_TOKEN:
+            raise HTTPException(status_code=401, detail="Invalid agent token")
+    elif request.client is None or request.client.host not in ("127.0.0.1", "::1", "localhost"):
+        raise HTTPException(status_code=403, detail="Set WHATSAPP_AGENT_TOKEN to accept agents from other machines")
+
+def _agent(agent_id: str):
+    agent = agent_registry.get(agent_id)
+    if agent is None:
+        raise HTTPException(status_code=404, detail="Agent not registered")
+    return agent
+
+class AgentRegistration(BaseModel):
+    agent_id: str
+    name: Optional[str] = None
+    driver: str = "desktop"
+
+class AgentResult(BaseModel):
+    result: object = None
+    error: Optional[str] = None
+
+@app.post("/agents/register")
+async def register_agent(registration: AgentRegistration, request: Request):
+    """A driver agent announces itself; it becomes a sending account named by its id"""
+    _check_agent_token(request)
+    if registration.agent_id == "default":
+        raise HTTPException(status_code=400, detail="'default' is the local desktop's account id")
+    agent = agent_registry.register(registration.agent_id, registration.name, registration.driver)
+    return agent.to_dict()
+
+@app.get("/agents/")
+async def list_agents():
+    """Connected driver agents and their work counts"""
+    return [agent.to_dict() for agent in agent_registry.connected()]
+
+@app.get("/agents/{agent_id}/work")
+def next_agent_work(agent_id: str, request: Request, wait: float = 25):
+    """Long poll for the agent's next driver action; 204 when none came within `wait` seconds"""
+    _check_agent_token(request)
+    _agent(agent_id)
+    item = agent_registry.next_item(agent_id, min(max(wait, 0), 60))
+    if item is None:
+        return Response(status_code=204)
+    return item.to_dict()
+
+@app.post("/agents/{agent_id}/results/{item_id}")
+async def report_agent_result(agent_id: str, item_id: int, outcome: AgentResult, request: Request):
+    """The agent's result (or error) for a driver action it ran"""
+    _check_agent_token(request)
+    _agent(agent_id)
+    if not agent_registry.complete(agent_id, item_id, outcome.result, outcome.error):
+        return {"accepted": False}  # Cancelled or timed out meanwhile
+    return {"accepted": True}
+
+@app.delete("/agents/{agent_id}")
+async def unregister_agent(agent_id: str, request: Request):
+    """The agent is shutting down; actions waiting for it fail"""
+    _check_agent_token(request)
+    _agent(agent_id)
+    agent_registry.unregister(agent_id)
+    return {"message": f"Agent {agent_id} unregistered"}
+
+@app.get("/agents/files/{file_hash}")
+async def download_agent_file(file_hash: str, request: Request):
+    """An attachment a campaign sends through an agent, by content hash"""
+    _check_agent_token(request)
+    path = agent_registry.shared_files.get(file_hash)
+    if path is None or not os.path.exists(path):
+        raise HTTPException(status_code=404, detail="File not shared with agents")
+    return FileResponse(path, filename=os.path.basename(path))
+
+@app.get("/rate-limits/")
+async def get_rate_limits():
+    """Remaining hourly/daily budget per account and predicted completion of running and queued jobs"""
+    try:
+        return {
+            "accounts": {account_id: rate_limiter.status(account_id) for account_id in accounts},
+            "jobs": predict_completion(active_jobs())
+        }
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
 
 # Contact Management Models
 class Contact(BaseModel):
@@ -522,43 +533,44 @@ class ContactList(BaseModel):
     contacts: List[Contact]
 
 @app.post("/api/contacts/upload-csv")
-async def upload_csv_contacts(file: UploadFile = File(...)):
-    """Upload and parse CSV file for contacts"""
+def upload_csv_contacts(file: UploadFile = File(...)):
+    """Upload and parse a CSV, XLSX or ODS file of contacts (a sync def: parsing runs off the event loop)"""
     try:
-        contents = await file.read()
-        df = pd.read_csv(pd.io.common.BytesIO(contents))
+        started = time.perf_counter()
+        rows = iter_rows(file.file, file.filename)
+        header = next(rows, [])
         
         # Check if Number column exists (Name is optional)
-        if 'Number' not in df.columns:
+        if 'Number' not in header:
             raise HTTPException(
                 status_code=400, 
-                detail="CSV must have 'Number' column"
+                detail="The file must have a 'Number' column"
             )
         
-        has_name_column = 'Name' in df.columns
+        number_column = header.index('Number')
+        name_column = header.index('Name') if 'Name' in header else None
         
         contacts = []
-        for i, row in df.iterrows():
-            number = str(row['Number']).strip()
+        for i, row in enumerate(rows):
+            number = row[number_column] if number_column < len(row) else ""
             
             # Handle name (optional)
-            if has_name_column:
-                name = str(row['Name']).strip()
-                if name.upper() == "NAN" or pd.isna(row['Name']) or name == "":
-                    name = f"Contact_{i+1}"
-            else:
+            name = row[name_column] if name_column is not None and name_column < len(row) else ""
+            if name.upper() == "NAN" or name == "":
                 name = f"Contact_{i+1}"
             
-            # Clean and validate the number
-            cleaned_number = clean_number(number)
+            # Canonical once, here: the campaign sends to "e164" without parsing the number again
+            e164 = normalize(number)
             
             contacts.append({
                 "name": name,
-                "number": cleaned_number,
+                "number": e164 or ("" if is_blank(number) else number),
+                "e164": e164,
                 "id": i + 1
             })
         
-        return {"contacts": contacts}
+        record_csv_throughput("contacts-upload-csv", len(contacts), started)
+        return FastJSONResponse({"contacts": contacts})
     except Exception as e:
         raise HTTPException(status_code=400, detail=str(e))
 
@@ -623,11 +635,13 @@ async def save_contact_list(contact_list: ContactList):
         duplicates = []
         
         for contact in contact_list.contacts:
-            number = contact.number
+            e164 = normalize(contact.number)
+            number = e164 or contact.number
             name = contact.name if contact.name else f'Contact_{len(unique_contacts) + 1}'
+            # "0300 1234567" and "+923001234567" are the same contact
             if number not in seen_numbers:
                 seen_numbers.add(number)
-                unique_contacts.append({"name": name, "number": number})
+                unique_contacts.append({"name": name, "number": number, "e164": e164})
             else:
                 duplicates.append({"name": name, "number": number})
 
@@ -656,10 +670,11 @@ async def load_contact_list(list_id: str):
         if not os.path.exists(file_path):
             raise HTTPException(status_code=404, detail="Contact list not found")
             
-        with open(file_path, "r", encoding='utf-8') as f:
-            data = json.load(f)
-            
-        return data
+        with open(file_path, "rb") as f:
+            raw = f.read()
+        loads(raw)  # Only to reject a corrupt file; the saved JSON is sent as is
+
+        return Response(content=raw, media_type="application/json")
         
     except FileNotFoundError:
         raise HTTPException(status_code=404, detail="Contact list not found")
@@ -686,30 +701,40 @@ async def delete_contact_list(list_id: str):
         raise HTTPException(status_code=500, detail=str(e))
 
 @app.get("/admin-number")
-def get_admin_number():
-    try:
-        if not Settings.ADMIN_NUMBER_FILE.exists() or Settings.ADMIN_NUMBER_FILE.stat().st_size == 0:
-            return {"admin_number": ""}
-        with Settings.ADMIN_NUMBER_FILE.open("r", encoding="utf-8") as f:
-            data = json.load(f)
-            return {"admin_number": data.get("admin_number", "")}
-    except (json.JSONDecodeError, IOError) as e:
-        print(f"Error reading admin number file: {e}")
-        return {"admin_number": ""}
+async def get_admin_number():
+    return {"admin_number": settings_store.get().admin_number}
 
 @app.post("/admin-number")
 def save_admin_number(data: dict):
     if "admin_number" not in data:
         raise HTTPException(status_code=400, detail="Key 'admin_number' is required")
+    update_settings({"admin_number": data["admin_number"] or ""})
+    return {"message": "Admin number saved"}
 
-    number = data["admin_number"]
+@app.get("/settings/")
+async def get_settings():
+    """Operator settings (admin number, pacing, thresholds) and the storage locations, which are fixed at startup"""
+    return {
+        "settings": settings_store.get().to_dict(),
+        "paths": {
+            "uploads": str(Settings.UPLOAD_DIR),
+            "thumbnails": str(Settings.THUMBNAIL_DIR),
+            "contacts": str(Settings.CONTACTS_DIR),
+            "state": str(Settings.STATE_DIR),
+            "logs": str(Settings.LOG_DIR),
+            "optimized": str(Settings.OPTIMIZED_DIR),
+        },
+    }
 
+@app.put("/settings/")
+def update_settings(changes: dict):
+    """Change some operator settings; running jobs keep the settings they started with"""
     try:
-        with Settings.ADMIN_NUMBER_FILE.open("w", encoding="utf-8") as f:
-            json.dump({"admin_number": number}, f)
-        return {"message": "Admin number saved"}
-    except IOError as e:
-        raise HTTPException(status_code=500, detail=f"Failed to write to file: {str(e)}")
+        return {"settings": settings_store.update(**changes).to_dict()}
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except OSError as e:
+        raise HTTPException(status_code=500, detail=f"Failed to save the settings: {str(e)}")
 
 @app.get("/api/health")
 async def health_check():
@@ -727,6 +752,73 @@ async def health_check():
             "error": str(e)
         }
 
+@app.get("/history/")
+async def get_history(number: Optional[str] = None, job_id: Optional[str] = None, limit: int = 100):
+    """Most recent deliveries, optionally for one number or job"""
+    return {"deliveries": history.query(number=(normalize(number) or number) if number else None, job_id=job_id,
+                                        limit=limit)}
+
+def _export_bound(value: Optional[str], name: str, end: bool = False) -> Optional[float]:
+    """An ISO date or date-time query parameter as epoch seconds; a bare end date includes that whole day."""
+    if not value:
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"{name} must be an ISO date or date-time, got {value!r}")
+    if end and len(value) == 10:
+        moment += timedelta(days=1)
+    return moment.timestamp()
+
+@app.get("/results/export")
+def export_results(
+    format: str = "csv",
+    job_id: Optional[str] = None,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    status: List[str] = Query([]),
+    batch: List[int] = Query([]),
+    reason: List[str] = Query([]),
+    account: Optional[str] = None
+):
+    """
+    Stream campaign results as CSV or XLSX, for a job and/or a date range, filtered by status, batch and skip
+    reason (invalid_number, insufficient_balance, no_number, recently_sent, duplicate, nothing_to_send)
+    """
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(status_code=400, detail=f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+    filters = {
+        "job_id": job_id,
+        "since": _export_bound(start, "start"),
+        "until": _export_bound(end, "end", end=True),
+        "statuses": status,
+        "batches": batch,
+        "reasons": reason,
+        "account": account,
+    }
+    render, media_type = EXPORT_FORMATS[format]
+    rows = format_rows(RESULT_COLUMNS, result_store.iter_rows(**filters))
+    filename = f"results_{job_id or datetime.now().strftime('%Y%m%d_%H%M%S')}.{format}"
+    # A sync generator: Starlette pulls it in a worker thread, the event loop keeps serving
+    return StreamingResponse(render(RESULT_COLUMNS, rows), media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
+@app.get("/jobs/{job_id}/export")
+def export_job_results(job_id: str, format: str = "csv", status: List[str] = Query([]),
+                       batch: List[int] = Query([]), reason: List[str] = Query([])):
+    """Stream one job's results as CSV or XLSX (see /results/export)"""
+    return export_results(format=format, job_id=job_id, status=status, batch=batch, reason=reason)
+
+@app.get("/wait-model/")
+async def get_wait_model():
+    """Learned attachment ready/sent timings per file type, used when the preview can't be detected"""
+    return wait_model.status()
+
+@app.get("/metrics")
+async def get_metrics():
+    """Prometheus text-format metrics: driver action latencies, outcomes, uploads, CSV throughput, queue depth"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/api/health/simple")
 async def simple_health_check():
     """Simple health check"""
@@ -736,5 +828,5 @@ async def simple_health_check():
     }
 
 if __name__ == "__main__":
-    print("Starting FastAPI server...")
-    uvicorn.run(app, host="127.0.0.1", port=5690)  # Change to 0.0.0.0 for broader access
\ No newline at end of file
+    log.info("Starting FastAPI server...")
+    uvicorn.run(app, host=Settings.BACKEND_BIND, port=Settings.BACKEND_PORT)  # WHATSAPP_BIND_HOST=0.0.0.0 for remote agents
\ No newline at end of file
@@ -0,0 +1,161 @@
+# backend/media_optimizer.py
+import atexit
+import logging
+import os
+import shutil
+import subprocess
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional
+
+from backend.config import Settings
+from backend.static import content_hash
+
+log = logging.getLogger(__name__)
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png")
+VIDEO_EXTENSIONS = (".mp4", ".mkv", ".avi", ".mov", ".wmv", ".3gp")
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_lock = threading.Lock()
+_pending: Dict[str, Future] = {}  # Variant path -> running optimization
+
+
+def variant_path(original) -> Path:
+    """
+    Where the optimized variant of `original` lives. Named after the original's
+    content hash, so a reused upload name can never pick up a stale variant.
+    """
+    extension = ".mp4" if Path(original).suffix.lower() in VIDEO_EXTENSIONS else ".jpg"
+    return Settings.OPTIMIZED_DIR / f"{content_hash(original)[:16]}{extension}"
+
+
+def optimize_image(source: str, target: str, max_side: int, quality: int):
+    from PIL import Image, ImageOps
+
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        img.thumbnail((max_side, max_side), Image.LANCZOS)  # Only ever shrinks
+        if img.mode not in ("RGB", "L"):
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel("A") if "A" in img.getbands() else None)
+            img = background
+        img.save(target, "JPEG", quality=quality, optimize=True, progressive=True)
+
+
+def optimize_video(source: str, target: str, ffmpeg: str, max_side: int, video_bitrate: str, audio_bitrate: str):
+    scale = f"scale='if(gt(iw,ih),min({max_side},iw),-2)':'if(gt(iw,ih),-2,min({max_side},ih))'"
+    subprocess.run([
+        ffmpeg, "-y", "-v", "error", "-i", source,
+        "-vf", scale,
+        "-c:v", "libx264", "-preset", "veryfast", "-b:v", video_bitrate, "-maxrate", video_bitrate,
+        "-bufsize", "2M", "-pix_fmt", "yuv420p",
+        "-c:a", "aac", "-b:a", audio_bitrate,
+        "-movflags", "+faststart",
+        target
+    ], check=True, capture_output=True, timeout=30 * 60,
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0))
+
+
+def optimize_file(source: str, target: str, options: dict) -> dict:
+    """
+    Runs in a worker process: write the optimized variant of `source` to
+    `target`. The variant is only kept when it is smaller than the original.
+    """
+    temporary = f"{target}.part{Path(target).suffix}"
+    try:
+        if source.lower().endswith(VIDEO_EXTENSIONS):
+            optimize_video(source, temporary, options["ffmpeg"], options["video_max_side"],
+                           options["video_bitrate"], options["audio_bitrate"])
+        else:
+            optimize_image(source, temporary, options["image_max_side"], options["image_quality"])
+
+        original_size = os.path.getsize(source)
+        optimized_size = os.path.getsize(temporary)
+        if optimized_size >= original_size:
+            os.remove(temporary)
+            return {"source": source, "kept": False, "original_bytes": original_size, "optimized_bytes": optimized_size}
+        os.replace(temporary, target)  # Atomic: a campaign never sees a half-written variant
+        return {"source": source, "kept": True, "original_bytes": original_size, "optimized_bytes": optimized_size}
+    finally:
+        if os.path.exists(temporary):
+            os.remove(temporary)
+
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ProcessPoolExecutor(max_workers=Settings.MEDIA_OPTIMIZE_WORKERS)
+            atexit.register(_pool.shutdown, wait=False, cancel_futures=True)
+        return _pool
+
+
+def _options() -> dict:
+    return {
+        "ffmpeg": Settings.FFMPEG_PATH or shutil.which("ffmpeg"),
+        "image_max_side": Settings.IMAGE_MAX_SIDE,
+        "image_quality": Settings.IMAGE_QUALITY,
+        "video_max_side": Settings.VIDEO_MAX_SIDE,
+        "video_bitrate": Settings.VIDEO_BITRATE,
+        "audio_bitrate": Settings.AUDIO_BITRATE,
+    }
+
+
+def schedule_optimization(original) -> Optional[Future]:
+    """
+    Queue the optimization of an uploaded file in the process pool and return
+    right away. Returns None when optimization is off or the file type can't
+    be optimized (videos need ffmpeg).
+    """
+    if not Settings.MEDIA_OPTIMIZE:
+        return None
+    original = str(original)
+    options = _options()
+    extension = Path(original).suffix.lower()
+    if extension not in IMAGE_EXTENSIONS + VIDEO_EXTENSIONS:
+        return None
+    if extension in VIDEO_EXTENSIONS and not options["ffmpeg"]:
+        log.info("ffmpeg not found, sending %s unoptimized", Path(original).name)
+        return None
+
+    target = variant_path(original)
+    if target.exists() or str(target) in _pending:
+        return _pending.get(str(target))
+    target.parent.mkdir(parents=True, exist_ok=True)
+
+    future = _get_pool().submit(optimize_file, original, str(target), options)
+    _pending[str(target)] = future
+
+    def done(finished: Future):
+        _pending.pop(str(target), None)
+        try:
+            result = finished.result()
+        except Exception as e:
+            log.warning("Could not optimize %s: %s", Path(original).name, e)
+            return
+        log.info("Optimized %s: %d -> %d bytes%s", Path(original).name, result["original_bytes"],
+                 result["optimized_bytes"], "" if result["kept"] else " (original kept, it was smaller)")
+
+    future.add_done_callback(done)
+    return future
+
+
+def send_path(original) -> str:
+    """The file a campaign should send: the optimized variant once it's ready, else the original."""
+    if not Settings.MEDIA_OPTIMIZE or Path(original).suffix.lower() not in IMAGE_EXTENSIONS + VIDEO_EXTENSIONS:
+        return str(original)
+    try:
+        variant = variant_path(original)
+    except OSError:
+        return str(original)
+    return str(variant) if variant.exists() else str(original)
+
+
+def discard_variant(original):
+    """Delete the optimized variant of an upload that is being removed."""
+    try:
+        variant_path(original).unlink(missing_ok=True)
+    except OSError:
+        pass
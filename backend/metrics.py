@@ -0,0 +1,187 @@
+# backend/metrics.py
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+ACTION_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 3, 5, 8, 13, 21, 34, 60, 120)
+FAST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+registry: List["Metric"] = []
+
+
+def _format_labels(labelnames: Tuple[str, ...], values: Tuple[str, ...], extra: str = "") -> str:
+    pairs = [f'{name}="{str(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Metric:
+    """Base for the Prometheus-style metrics below; instances register themselves for /metrics."""
+
+    type = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: Dict[Tuple[str, ...], object] = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def _key(self, labels: dict) -> Tuple[str, ...]:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def samples(self) -> List[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(Metric):
+    type = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in values.items()]
+
+
+class Gauge(Metric):
+    """A value that goes up and down. With `callback`, it is computed at scrape time instead of set()."""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 callback: Optional[Callable[[], float]] = None):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def samples(self) -> List[str]:
+        if self.callback is not None:
+            return [f"{self.name} {self.callback()}"]
+        with self._lock:
+            values = dict(self._values)
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}" for key, value in values.items()]
+
+
+class Histogram(Metric):
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (),
+                 buckets: Tuple[float, ...] = ACTION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total, count = self._values.get(key, ([0] * len(self.buckets), 0.0, 0))
+            counts = [c + 1 if value <= bound else c for c, bound in zip(counts, self.buckets)]
+            self._values[key] = (counts, total + value, count + 1)
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe how long the `with` block took, whether it returned or raised."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = dict(self._values)
+        lines = []
+        for key, (counts, total, count) in values.items():
+            for bound, bucket_count in zip(self.buckets, counts):
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {bucket_count}")
+            le = 'le="+Inf"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+def render() -> str:
+    """All registered metrics in the Prometheus text exposition format."""
+    return "\n".join(metric.render() for metric in registry) + "\n"
+
+
+DRIVER_ACTION_SECONDS = Histogram(
+    "whatsapp_driver_action_seconds",
+    "Time spent in each WhatsApp UI action, including its pacing waits",
+    ("action",)
+)
+CAMPAIGN_OUTCOMES = Counter(
+    "whatsapp_campaign_outcomes_total",
+    "Per-contact campaign results by status",
+    ("kind", "status")
+)
+UPLOAD_BYTES = Counter(
+    "whatsapp_upload_bytes_total",
+    "Bytes received through the media and PDF upload endpoints",
+    ("kind",)
+)
+UPLOAD_SECONDS = Histogram(
+    "whatsapp_upload_seconds",
+    "Time to hash, store and thumbnail one uploaded file",
+    ("kind",),
+    buckets=FAST_BUCKETS
+)
+THUMBNAIL_SECONDS = Histogram(
+    "whatsapp_thumbnail_seconds",
+    "Time to generate one video thumbnail",
+    buckets=FAST_BUCKETS
+)
+CSV_ROWS = Counter(
+    "whatsapp_csv_rows_total",
+    "Rows parsed from uploaded CSV files",
+    ("endpoint",)
+)
+CSV_ROWS_PER_SECOND = Gauge(
+    "whatsapp_csv_rows_per_second",
+    "Parse throughput of the most recent CSV upload",
+    ("endpoint",)
+)
+ATTACHMENT_SECONDS = Histogram(
+    "whatsapp_attachment_seconds",
+    "Time until a pasted attachment was ready in the preview (phase=ready) or sent (phase=sent); "
+    "source=detected when seen in the UI, source=model when the learned fallback wait was used",
+    ("kind", "phase", "source")
+)
+CLIPBOARD_WRITES = Counter(
+    "whatsapp_clipboard_writes_total",
+    "Clipboard writes by campaigns per content kind; result=skipped when the clipboard already held that content",
+    ("kind", "result")
+)
+CLIPBOARD_RESTORES = Counter(
+    "whatsapp_clipboard_restores_total",
+    "End-of-job restores of the operator's clipboard: restored, changed (the operator copied something since, "
+    "left as is), unsaved (too large or unreadable when saved) or failed",
+    ("result",)
+)
+TEXT_ENTRY_RESULTS = Counter(
+    "whatsapp_text_entry_total",
+    "Messages composed per text entry strategy; result=verified when the box read back as the message, mismatch "
+    "when it didn't (the next strategy was tried), unverified when the box couldn't be read",
+    ("strategy", "result")
+)
+TRACE_EVENTS_DROPPED = Counter(
+    "whatsapp_trace_events_dropped_total",
+    "Trace spans dropped because a job's trace buffer was full (its oldest spans go first)"
+)
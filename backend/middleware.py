@@ -0,0 +1,125 @@
+# backend/middleware.py
+import gzip
+
+from starlette.datastructures import Headers, MutableHeaders
+
+from backend.config import Settings
+
+try:
+    import brotli
+except ImportError:  # Optional: without it only gzip is offered
+    brotli = None
+
+CONTENT_SECURITY_POLICY = (
+    "default-src 'self'; "
+    "img-src 'self' data: https://fastapi.tiangolo.com; "
+    "media-src 'self' blob:; "
+    "script-src 'self' https://cdn.jsdelivr.net; "
+    "style-src 'self' https://cdn.jsdelivr.net; "
+    f"connect-src 'self' http://localhost:{Settings.FRONTEND_PORT} http://localhost:{Settings.BACKEND_PORT}; "
+    "font-src 'self' https://cdn.jsdelivr.net; "
+    "object-src 'none'; "
+    "frame-ancestors 'none'; "
+    "base-uri 'self'; "
+    "form-action 'self';"
+)
+
+MINIMUM_COMPRESS_SIZE = 1024
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+GZIP_LEVEL = 5  # The client is on the same machine: favour speed over ratio
+BROTLI_QUALITY = 4
+
+
+class SecurityHeadersMiddleware:
+    """Adds the static security headers, built once at import instead of per request."""
+
+    def __init__(self, app):
+        self.app = app
+        self.headers = [(b"content-security-policy", CONTENT_SECURITY_POLICY.encode("latin-1"))]
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_headers(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + self.headers
+            await send(message)
+
+        await self.app(scope, receive, send_with_headers)
+
+
+def choose_encoding(accept_encoding: str):
+    accepted = {token.split(";")[0].strip().lower() for token in accept_encoding.split(",")}
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class CompressionMiddleware:
+    """
+    Compresses large JSON/text bodies with brotli or gzip, whichever the client
+    accepts (brotli preferred when installed). Only responses with a known
+    length sent in one piece are compressed: streamed ones (campaign NDJSON,
+    file downloads) pass through untouched, chunks and headers unbuffered, and
+    so do HEAD requests and bodiless responses (204, 304, an empty body).
+    """
+
+    def __init__(self, app, minimum_size: int = MINIMUM_COMPRESS_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        # A HEAD response has no body to compress: its headers must match the GET's uncompressed ones
+        if encoding is None or scope["method"] == "HEAD":
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+
+        async def compressing_send(message):
+            nonlocal start_message
+            if message["type"] == "http.response.start":
+                headers = Headers(raw=message.get("headers", []))
+                content_type = headers.get("content-type", "")
+                # No content-length means a streamed response: never hold back its headers.
+                # Only a 200 is compressed: a 204 or 304 has no body and must not get a Content-Encoding
+                if (message["status"] != 200 or "content-encoding" in headers or "content-length" not in headers
+                        or int(headers["content-length"]) < self.minimum_size
+                        or not content_type.startswith(COMPRESSIBLE_TYPES)):
+                    await send(message)
+                    return
+                start_message = message  # Held back until the body is in
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            body = message.get("body", b"")
+            if message.get("more_body", False) or not body:
+                await send(start)
+                await send(message)
+                return
+
+            if encoding == "br":
+                compressed = brotli.compress(body, quality=BROTLI_QUALITY)
+            else:
+                compressed = gzip.compress(body, compresslevel=GZIP_LEVEL)
+            headers = MutableHeaders(raw=list(start.get("headers", [])))
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(compressed))
+            headers.add_vary_header("Accept-Encoding")
+            start["headers"] = headers.raw
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed, "more_body": False})
+
+        await self.app(scope, receive, compressing_send)
@@ -5,6 +5,9 @@ from pathlib import Path
 
 def get_persistent_storage():
     """Get a persistent storage location based on OS"""
+    if os.environ.get("WHATSAPP_DATA_DIR"):
+        # Explicit location, e.g. throwaway storage for a load test
+        return Path(os.environ["WHATSAPP_DATA_DIR"])
     if getattr(sys, 'frozen', False):
         # When packaged as executable
         if sys.platform == "win32":
@@ -27,24 +30,36 @@ def setup_directories():
     UPLOADS_DIR = PERSISTENT_DIR / "uploads"
     THUMBNAILS_DIR = PERSISTENT_DIR / "thumbnails"
     CONTACTS_DIR = PERSISTENT_DIR / "contacts"
+    STATE_DIR = PERSISTENT_DIR / "state"
+    LOGS_DIR = PERSISTENT_DIR / "logs"
+    OPTIMIZED_DIR = PERSISTENT_DIR / "optimized"
     ADMIN_NUMBER_FILE = CONTACTS_DIR / "admin_number.json"
 
     # Create directories if they don't exist
     UPLOADS_DIR.mkdir(exist_ok=True, parents=True)
     THUMBNAILS_DIR.mkdir(exist_ok=True, parents=True)
     CONTACTS_DIR.mkdir(exist_ok=True, parents=True)
+    STATE_DIR.mkdir(exist_ok=True, parents=True)
+    LOGS_DIR.mkdir(exist_ok=True, parents=True)
+    OPTIMIZED_DIR.mkdir(exist_ok=True, parents=True)
     ADMIN_NUMBER_FILE.touch(exist_ok=True)
 
     # Set environment variables as strings (from Path objects)
     os.environ["UPLOADS_DIR"] = str(UPLOADS_DIR.resolve())
     os.environ["THUMBNAIL_DIR"] = str(THUMBNAILS_DIR.resolve())
     os.environ["CONTACTS_DIR"] = str(CONTACTS_DIR.resolve())
+    os.environ["STATE_DIR"] = str(STATE_DIR.resolve())
+    os.environ["LOGS_DIR"] = str(LOGS_DIR.resolve())
+    os.environ["OPTIMIZED_DIR"] = str(OPTIMIZED_DIR.resolve())
     os.environ["ADMIN_NUMBER_FILE"] = str(ADMIN_NUMBER_FILE.resolve())
     
     return {
         'uploads_dir': UPLOADS_DIR,
         'thumbnails_dir': THUMBNAILS_DIR,
         'contacts_dir': CONTACTS_DIR,
+        'state_dir': STATE_DIR,
+        'logs_dir': LOGS_DIR,
+        'optimized_dir': OPTIMIZED_DIR,
         'admin_number_file': ADMIN_NUMBER_FILE
     }
 
@@ -0,0 +1,125 @@
+# backend/phone.py
+import math
+import re
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Iterable, List, Optional
+
+from backend.config import Settings
+
+# Region -> (calling code, national number lengths). Numbers of other countries must be entered with their
+# + or 00 prefix and are only checked against E.164's overall length.
+REGIONS = {
+    "PK": ("92", (9, 10)),
+    "IN": ("91", (10,)),
+    "BD": ("880", (10,)),
+    "AE": ("971", (8, 9)),
+    "SA": ("966", (8, 9)),
+    "QA": ("974", (8,)),
+    "OM": ("968", (8,)),
+    "KW": ("965", (8,)),
+    "BH": ("973", (8,)),
+    "GB": ("44", (9, 10)),
+    "US": ("1", (10,)),
+    "CA": ("1", (10,)),
+}
+TRUNK_PREFIX = "0"  # Dialled before national numbers in most of these regions (0300... in Pakistan)
+MIN_DIGITS = 8  # Shortest plausible number with its country code
+MAX_DIGITS = 15  # E.164
+CACHE_SIZE = 1 << 16  # Contact lists repeat numbers across uploads, saves and campaigns
+
+_NON_DIGITS = re.compile(r"[^0-9]")
+_NUMERIC = re.compile(r"^\d+(\.\d*)?([eE][+]?\d+)?$")  # How pandas and Excel hand numbers over: 3001234567.0, 9.23E+11
+# Arabic-Indic and Extended Arabic-Indic (Urdu) digits to ASCII
+_LOCAL_DIGITS = str.maketrans("\u0660\u0661\u0662\u0663\u0664\u0665\u0666\u0667\u0668\u0669"
+                              "\u06f0\u06f1\u06f2\u06f3\u06f4\u06f5\u06f6\u06f7\u06f8\u06f9",
+                              "01234567890123456789")
+
+
+@lru_cache(maxsize=CACHE_SIZE)
+def _normalize(text: str, region: str) -> Optional[str]:
+    try:
+        calling_code, national_lengths = REGIONS[region]
+    except KeyError:
+        raise ValueError(f"Unknown phone region {region!r}, expected one of: {', '.join(REGIONS)}")
+
+    text = text.strip()
+    if text.endswith(".0"):
+        text = text[:-2]  # A number pandas read as a float
+    if text.isascii() and text.isdigit():
+        # The common case, no separators: 03001234567, 923001234567, 3001234567, 0092...
+        international = text.startswith("00")
+        digits = text[2:] if international else text
+    else:
+        if not text.isascii():
+            text = text.translate(_LOCAL_DIGITS)
+        if ("e" in text or "E" in text or "." in text) and _NUMERIC.match(text):
+            try:
+                text = str(int(Decimal(text)))  # Exact, unlike float(), for numbers of any length
+            except (InvalidOperation, ValueError):
+                return None
+        international = text.startswith("+") or text.startswith("00")
+        digits = text.replace(" ", "").replace("-", "").lstrip("+")  # Much faster than translate() or re.sub
+        if not (digits.isascii() and digits.isdigit()):
+            digits = _NON_DIGITS.sub("", digits)
+        if text.startswith("00"):
+            digits = digits[2:]
+    if not digits.strip("0"):
+        return None  # Empty or all zeros: no number entered
+
+    if not international:
+        if digits.startswith(TRUNK_PREFIX):
+            digits = calling_code + digits.lstrip(TRUNK_PREFIX)
+        elif not (digits.startswith(calling_code) and len(digits) - len(calling_code) in national_lengths):
+            digits = calling_code + digits
+
+    if not MIN_DIGITS <= len(digits) <= MAX_DIGITS:
+        return None
+    if digits.startswith(calling_code) and len(digits) - len(calling_code) not in national_lengths:
+        return None
+    return "+" + digits
+
+
+def normalize(number, region: Optional[str] = None) -> Optional[str]:
+    """
+    The E.164 form of a phone number as it comes from a CSV, a form or a saved
+    list ("0300-1234567", 3001234567.0, "+92 300 1234567", "0092...") or None
+    when there is no number or it can't be one. Numbers without a country code
+    are read as `region`'s (Settings.DEFAULT_REGION by default).
+    """
+    if type(number) is not str:
+        if number is None or isinstance(number, bool):
+            return None
+        if isinstance(number, float):
+            if math.isnan(number) or not number.is_integer():
+                return None
+            number = int(number)
+        number = str(number)
+    return _normalize(number, region.upper() if region else Settings.DEFAULT_REGION)
+
+
+def is_blank(number) -> bool:
+    """No number entered: empty, NaN, or nothing but zeros."""
+    return not _NON_DIGITS.sub("", str(number if number is not None else "")).strip("0")
+
+
+def contact_number(entry: dict) -> Optional[str]:
+    """A contact's canonical number: the one stored at ingestion, else normalized now (older saved lists)."""
+    if "e164" in entry:
+        return entry["e164"]
+    return normalize(entry.get("number"))
+
+
+def canonicalize(contacts: Iterable[dict]) -> List[dict]:
+    """Store each contact's canonical number under "e164" (None if it has no valid one), once, at ingestion."""
+    contacts = list(contacts)
+    for entry in contacts:
+        if "e164" not in entry:
+            entry["e164"] = normalize(entry.get("number"))
+    return contacts
+
+
+def national_number(e164: str, region: Optional[str] = None) -> str:
+    """The number without `region`'s country code, as typed into a dial pad that already has it."""
+    calling_code = "+" + REGIONS[(region or Settings.DEFAULT_REGION).upper()][0]
+    return e164[len(calling_code):] if e164.startswith(calling_code) else e164
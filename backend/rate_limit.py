@@ -0,0 +1,216 @@
+# backend/rate_limit.py
+import json
+import logging
+import os
+import threading
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from backend.config import Settings
+from backend.jobs import Job, current_job
+from backend.settings_store import settings_store
+
+log = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Holds up to `capacity` tokens, refilled continuously at `refill_per_second`."""
+
+    def __init__(self, capacity: float, refill_per_second: float, tokens: Optional[float] = None,
+                 updated_at: Optional[float] = None):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity if tokens is None else min(tokens, capacity)
+        self.updated_at = time.time() if updated_at is None else updated_at
+
+    def refill(self, now: float):
+        elapsed = max(now - self.updated_at, 0)
+        self.tokens = min(self.capacity, self.tokens + elapsed * self.refill_per_second)
+        self.updated_at = now
+
+    def seconds_until(self, amount: float) -> float:
+        """Seconds until `amount` tokens are available (after refill())."""
+        missing = amount - self.tokens
+        if missing <= 0:
+            return 0.0
+        if self.refill_per_second <= 0:
+            return float("inf")
+        return missing / self.refill_per_second
+
+    def to_dict(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "refill_per_second": self.refill_per_second,
+            "tokens": self.tokens,
+            "updated_at": self.updated_at,
+        }
+
+
+class RateLimiter:
+    """
+    Hourly and daily message budgets per sending account, shared by every job in
+    the process and persisted to STATE_DIR so restarts don't reset them. One token
+    is one recipient, whatever mix of media, PDFs and text they are sent. An
+    account without budgets of its own gets the defaults (the operator settings);
+    a budget of 0 is no limit in that window.
+    """
+
+    WINDOWS = {"hourly": 3600, "daily": 86400}
+
+    def __init__(self, state_file):
+        self.state_file = state_file
+        self.defaults = {"hourly": Settings.RATE_LIMIT_PER_HOUR, "daily": Settings.RATE_LIMIT_PER_DAY}
+        self.overrides: Dict[str, Dict[str, Optional[int]]] = {}  # Accounts' own budgets, None for the default
+        self.limits: Dict[str, Dict[str, int]] = {}
+        self.buckets: Dict[str, Dict[str, TokenBucket]] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        for account_id, buckets in state.items():
+            self.buckets[account_id] = {window: TokenBucket(**bucket) for window, bucket in buckets.items()}
+
+    def _save(self):
+        state = {
+            account_id: {window: bucket.to_dict() for window, bucket in buckets.items()}
+            for account_id, buckets in self.buckets.items()
+        }
+        # Write to a temp file and swap it in, so a crash never leaves a half-written state file
+        Path(self.state_file).parent.mkdir(parents=True, exist_ok=True)
+        temp_file = f"{self.state_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temp_file, self.state_file)
+
+    def configure(self, account_id: str, per_hour: Optional[int] = None, per_day: Optional[int] = None):
+        """Set an account's own budgets (None keeps the default); tokens already spent stay spent."""
+        with self._lock:
+            self.overrides[account_id] = {"hourly": per_hour, "daily": per_day}
+            self._buckets(account_id)
+            self._save()
+
+    def configure_defaults(self, per_hour: int, per_day: int):
+        """Set the budgets of every account without its own, including those already sending."""
+        with self._lock:
+            if self.defaults == {"hourly": per_hour, "daily": per_day}:
+                return
+            self.defaults = {"hourly": per_hour, "daily": per_day}
+            for account_id in list(self.buckets):
+                self._buckets(account_id)
+            self._save()
+        log.info("Default rate limits: %s an hour, %s a day", per_hour or "no limit", per_day or "no limit")
+
+    def _buckets(self, account_id: str) -> Dict[str, TokenBucket]:
+        overrides = self.overrides.get(account_id, {})
+        limits = self.limits[account_id] = {
+            window: self.defaults[window] if overrides.get(window) is None else overrides[window]
+            for window in self.WINDOWS
+        }
+        buckets = self.buckets.setdefault(account_id, {})
+        for window, seconds in self.WINDOWS.items():
+            capacity = limits[window]
+            if not capacity:
+                buckets.pop(window, None)  # No limit in this window
+                continue
+            bucket = buckets.setdefault(window, TokenBucket(capacity, capacity / seconds))
+            # Limits may have changed since the state was saved
+            bucket.capacity = capacity
+            bucket.refill_per_second = capacity / seconds
+            bucket.tokens = min(bucket.tokens, capacity)
+        return buckets
+
+    def try_acquire(self, account_id: str, amount: float = 1) -> float:
+        """Take `amount` tokens if every budget has them and return 0, else return the seconds to wait."""
+        with self._lock:
+            now = time.time()
+            buckets = self._buckets(account_id)
+            for bucket in buckets.values():
+                bucket.refill(now)
+            wait = max((bucket.seconds_until(amount) for bucket in buckets.values()), default=0.0)
+            if wait > 0:
+                return wait
+            for bucket in buckets.values():
+                bucket.tokens -= amount
+            self._save()
+            return 0.0
+
+    def acquire(self, account_id: str, amount: float = 1):
+        """Block until `amount` tokens are available. Inside a job the wait is cancellable and pausable."""
+        while True:
+            wait = self.try_acquire(account_id, amount)
+            if wait <= 0:
+                return
+            log.info("Rate limit reached for account %s, waiting %.0f seconds", account_id, wait)
+            job = current_job()
+            if job is not None:
+                job.sleep(wait, pausable=True)
+            else:
+                time.sleep(wait)
+
+    def predict_seconds(self, account_id: str, messages: int) -> float:
+        """Seconds until `messages` more sends fit in every budget, ignoring pacing."""
+        with self._lock:
+            now = time.time()
+            buckets = self._buckets(account_id)
+            for bucket in buckets.values():
+                bucket.refill(now)
+            return max((bucket.seconds_until(messages) for bucket in buckets.values()), default=0.0)
+
+    def status(self, account_id: str) -> dict:
+        """The account's budgets per window; a window without a limit isn't listed."""
+        with self._lock:
+            now = time.time()
+            buckets = self._buckets(account_id)
+            for bucket in buckets.values():
+                bucket.refill(now)
+            return {
+                window: {
+                    "limit": self.limits[account_id][window],
+                    "remaining": int(bucket.tokens),
+                    "refill_per_hour": round(bucket.refill_per_second * 3600, 2),
+                }
+                for window, bucket in buckets.items()
+            }
+
+
+rate_limiter = RateLimiter(Settings.STATE_DIR / "rate_limits.json")
+
+
+def apply_rate_limits(settings):
+    rate_limiter.configure_defaults(settings.rate_limit_per_hour, settings.rate_limit_per_day)
+
+
+settings_store.change_hooks.append(apply_rate_limits)
+
+
+def predict_completion(jobs: List[Job]) -> List[dict]:
+    """
+    Estimate when each job will finish. Jobs on the same account queue behind each
+    other for its budget; the estimate is the later of the rate limit and the
+    job's own measured pace.
+    """
+    queued: Dict[str, int] = {}
+    predictions = []
+    now = datetime.now()
+    for job in sorted(jobs, key=lambda job: job.created_at):
+        elapsed = (now - datetime.fromisoformat(job.created_at)).total_seconds()
+        processed = max(len(job.results), 1)
+        finish_in = 0.0
+        for account_id, remaining in job.remaining_contacts().items():
+            queued[account_id] = queued.get(account_id, 0) + remaining
+            paced = remaining * elapsed / processed
+            finish_in = max(finish_in, rate_limiter.predict_seconds(account_id, queued[account_id]), paced)
+        predictions.append({
+            "job_id": job.id,
+            "status": job.status,
+            "remaining_contacts": job.remaining_contacts(),
+            "predicted_completion": (now + timedelta(seconds=finish_in)).isoformat(timespec="seconds"),
+        })
+    return predictions
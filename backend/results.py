@@ -0,0 +1,135 @@
+# backend/results.py
+import sqlite3
+import threading
+import time
+from typing import Iterator, List, Optional, Sequence, Tuple
+
+from backend.config import Settings
+from backend.jobs import Job, record_hooks
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY,
+    job_id TEXT NOT NULL,
+    job_kind TEXT NOT NULL,
+    account TEXT,
+    batch INTEGER,
+    name TEXT,
+    number TEXT,
+    status TEXT NOT NULL,
+    reason TEXT,
+    message TEXT,
+    balance REAL,
+    timestamp TEXT,
+    recorded_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_job ON results (job_id, id);
+CREATE INDEX IF NOT EXISTS results_recorded ON results (recorded_at);
+"""
+COLUMNS = ("job_id", "job_kind", "account", "batch", "name", "number", "status", "reason", "message", "balance",
+           "timestamp", "recorded_at")
+NOT_RESULTS = ("batch_complete",)  # Progress notices on the stream, not contact outcomes
+
+# Why a contact was skipped, from the message the campaign gave it
+SKIP_REASONS = (
+    ("invalid number", "invalid_number"),
+    ("Number is Invalid", "invalid_number"),
+    ("Insufficient balance", "insufficient_balance"),
+    ("No number entered", "no_number"),
+    ("Already sent this content", "recently_sent"),
+    ("Already Processed", "duplicate"),
+    ("Nothing to send", "nothing_to_send"),
+)
+
+
+def skip_reason(record: dict) -> Optional[str]:
+    message = str(record.get("message") or "")
+    for prefix, reason in SKIP_REASONS:
+        if message.startswith(prefix):
+            return reason
+    return None
+
+
+class ResultStore:
+    """
+    Every contact outcome of every campaign, as the jobs emit them, in an
+    SQLite database in STATE_DIR. The jobs only keep their records in memory
+    for streaming; this is what exports read.
+    """
+
+    def __init__(self, db_file):
+        self.db_file = db_file
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        self.db_file.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.db_file, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(SCHEMA)
+        return conn
+
+    def record(self, job: Job, record: dict):
+        if record.get("status") in NOT_RESULTS:
+            return
+        balance = record.get("balance")
+        row = (job.id, job.kind, record.get("account"), record.get("batch"), record.get("name"),
+               None if record.get("number") is None else str(record["number"]), str(record.get("status")),
+               skip_reason(record), record.get("message"), balance if isinstance(balance, (int, float)) else None,
+               record.get("timestamp"), time.time())
+        with self._lock:
+            if self._conn is None:
+                self._conn = self._connect()
+            with self._conn:
+                self._conn.execute(f"INSERT INTO results ({', '.join(COLUMNS)}) "
+                                   f"VALUES ({', '.join('?' * len(COLUMNS))})", row)
+
+    def iter_rows(self, job_id: Optional[str] = None, since: Optional[float] = None, until: Optional[float] = None,
+                  statuses: Sequence[str] = (), batches: Sequence[int] = (), reasons: Sequence[str] = (),
+                  account: Optional[str] = None, chunk_size: int = 1000) -> Iterator[Tuple]:
+        """
+        Matching rows (in COLUMNS order) oldest first, fetched `chunk_size` at a
+        time on a connection of their own, so a large export neither holds the
+        writers' lock nor loads the whole table.
+        """
+        conditions: List[str] = []
+        params: list = []
+        if job_id:
+            conditions.append("job_id = ?")
+            params.append(job_id)
+        if since is not None:
+            conditions.append("recorded_at >= ?")
+            params.append(since)
+        if until is not None:
+            conditions.append("recorded_at < ?")
+            params.append(until)
+        if account:
+            conditions.append("account = ?")
+            params.append(account)
+        for column, values in (("status", statuses), ("batch", batches), ("reason", reasons)):
+            if values:
+                conditions.append(f"{column} IN ({', '.join('?' * len(values))})")
+                params.extend(values)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        conn = self._connect()
+        try:
+            cursor = conn.execute(f"SELECT {', '.join(COLUMNS)} FROM results {where} ORDER BY id", params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            conn.close()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+result_store = ResultStore(Settings.STATE_DIR / "results.sqlite3")
+record_hooks.append(result_store.record)
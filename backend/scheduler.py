@@ -0,0 +1,216 @@
+# backend/scheduler.py
+import logging
+import random
+import statistics
+import threading
+import time
+from collections import deque
+from datetime import datetime, time as clock, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from backend.config import Settings
+from backend.helper import random_sleep
+from backend.jobs import current_job, current_shard, report_progress
+
+log = logging.getLogger(__name__)
+
+MAX_SLEEP = 60  # Long waits are slept in steps, so a clock change or a suspended machine can't oversleep them
+PACE_SAMPLES = 20  # Recent contact durations the pace estimate is the median of
+MIN_PACE_SAMPLES = 3
+
+
+def parse_start(value: str) -> datetime:
+    """An ISO date-time as a naive local datetime, like the rest of the backend uses."""
+    moment = datetime.fromisoformat(value)
+    if moment.tzinfo is not None:
+        moment = moment.astimezone().replace(tzinfo=None)
+    return moment
+
+
+class SendingWindows:
+    """
+    The daily local-time windows a campaign may send in, e.g. ["10:00-20:00"].
+    A window whose end is before its start runs past midnight ("22:00-02:00").
+    """
+
+    def __init__(self, windows: List[Tuple[clock, clock]]):
+        self.windows = windows
+
+    @classmethod
+    def parse(cls, specs: List[str]) -> "SendingWindows":
+        windows = []
+        for spec in specs:
+            try:
+                start, end = (clock.fromisoformat(part.strip()) for part in spec.split("-"))
+            except ValueError:
+                raise ValueError(f"Sending windows look like 10:00-20:00, got {spec!r}")
+            if start == end:
+                raise ValueError(f"Sending window {spec!r} is empty")
+            windows.append((start, end))
+        if not windows:
+            raise ValueError("At least one sending window is needed")
+        return cls(windows)
+
+    def intervals(self, since: datetime, days: int = 8) -> List[Tuple[datetime, datetime]]:
+        """The open (opens, closes) intervals that end after `since`, in order, touching ones merged."""
+        spans = []
+        for offset in range(-1, days):
+            day = since.date() + timedelta(days=offset)
+            for start, end in self.windows:
+                opens = datetime.combine(day, start)
+                closes = datetime.combine(day + timedelta(days=1) if end <= start else day, end)
+                if closes > since:
+                    spans.append((opens, closes))
+        merged: List[Tuple[datetime, datetime]] = []
+        for opens, closes in sorted(spans):
+            if merged and opens <= merged[-1][1]:
+                merged[-1] = (merged[-1][0], max(merged[-1][1], closes))
+            else:
+                merged.append((opens, closes))
+        return merged
+
+    def earliest_start(self, moment: datetime, seconds: float) -> datetime:
+        """
+        The first time at or after `moment` when `seconds` of sending fit before
+        the window closes. Work longer than any window starts when one opens.
+        """
+        intervals = self.intervals(moment)
+        for opens, closes in intervals:
+            start = max(opens, moment)
+            if start + timedelta(seconds=seconds) <= closes:
+                return start
+        return max(intervals[0][0], moment)
+
+    def to_list(self) -> List[str]:
+        def text(moment: clock) -> str:
+            return moment.strftime("%H:%M:%S" if moment.second else "%H:%M")
+        return [f"{text(start)}-{text(end)}" for start, end in self.windows]
+
+
+class Schedule:
+    """
+    When a job may send: not before `start_at`, and only inside `windows`.
+    Batches that wouldn't finish before a window closes wait for the next one,
+    and the per-contact pace it plans with is measured as the job runs.
+    """
+
+    def __init__(self, start_at: Optional[datetime] = None, windows: Optional[SendingWindows] = None,
+                 pacing: Optional[dict] = None):
+        self.start_at = start_at
+        self.windows = windows
+        self.pacing = pacing or {}
+        self._durations = deque(maxlen=PACE_SAMPLES)
+        self._last_contact: Dict[Optional[str], float] = {}  # Per shard: when its previous contact started
+        self._lock = threading.Lock()
+
+    @property
+    def contact_seconds(self) -> float:
+        """Seconds one contact takes: the median of the recent ones (robust to the odd long break)."""
+        with self._lock:
+            if len(self._durations) < MIN_PACE_SAMPLES:
+                return Settings.SCHEDULE_CONTACT_SECONDS
+            return statistics.median(self._durations)
+
+    def observe_contact(self, shard: Optional[str]):
+        """Called as a contact starts: the time since the shard's previous one is a contact's duration."""
+        now = time.monotonic()
+        with self._lock:
+            previous = self._last_contact.get(shard)
+            if previous is not None:
+                self._durations.append(now - previous)
+            self._last_contact[shard] = now
+
+    def forget_contact(self, shard: Optional[str]):
+        """After a wait or a cool-down, which isn't part of any contact's duration."""
+        with self._lock:
+            self._last_contact.pop(shard, None)
+
+    def earliest_start(self, moment: datetime, seconds: float) -> datetime:
+        if self.start_at is not None:
+            moment = max(moment, self.start_at)
+        return moment if self.windows is None else self.windows.earliest_start(moment, seconds)
+
+    def project_finish(self, contacts: int, now: Optional[datetime] = None) -> datetime:
+        """When `contacts` more contacts will be done, with average batches and cool-downs, inside the windows."""
+        moment = now or datetime.now()
+        contact_seconds = self.contact_seconds
+        low, high = self.pacing.get("min_batch_size"), self.pacing.get("max_batch_size")
+        batch_size = max(int((low + high) / 2), 1) if low and high else 1  # No batches: each contact fits on its own
+        batch_delay = (self.pacing.get("min_batch_delay", 0) + self.pacing.get("max_batch_delay", 0)) / 2
+        remaining = contacts
+        while remaining > 0:
+            batch = min(batch_size, remaining)
+            moment = self.earliest_start(moment, batch * contact_seconds)
+            moment += timedelta(seconds=batch * contact_seconds)
+            remaining -= batch
+            if remaining > 0:
+                moment += timedelta(seconds=batch_delay)
+        return moment
+
+    def to_dict(self) -> dict:
+        return {
+            "start_at": self.start_at.isoformat(timespec="seconds") if self.start_at else None,
+            "windows": self.windows.to_list() if self.windows else None,
+            "contact_seconds": round(self.contact_seconds, 1),
+        }
+
+
+def _schedule() -> Optional[Schedule]:
+    job = current_job()
+    return getattr(job, "schedule", None) if job is not None else None
+
+
+def _wait_until(moment: datetime, reason: str):
+    """Hold the running job until `moment`: cancellable, and it stays held while paused."""
+    job = current_job()
+    if datetime.now() >= moment:
+        return
+    log.info("Job %s waiting for %s until %s", job.id, reason, moment.isoformat(timespec="minutes"))
+    report_progress(waiting_for=reason, waiting_until=moment.isoformat(timespec="seconds"))
+    while True:
+        remaining = (moment - datetime.now()).total_seconds()
+        if remaining <= 0:
+            break
+        job.sleep(min(remaining, MAX_SLEEP), pausable=True)
+    report_progress(waiting_for=None, waiting_until=None)
+    job.schedule.forget_contact(current_shard())
+
+
+def wait_for_start():
+    schedule = _schedule()
+    if schedule is not None and schedule.start_at is not None:
+        _wait_until(schedule.start_at, "start")
+
+
+def before_batch(batch_size: int, remaining_contacts: int):
+    """Start the batch only once all of it fits in a sending window, and report the projected finish."""
+    schedule = _schedule()
+    if schedule is None:
+        return
+    schedule.forget_contact(current_shard())
+    now = datetime.now()
+    _wait_until(schedule.earliest_start(now, batch_size * schedule.contact_seconds), "sending window")
+    report_progress(projected_finish=schedule.project_finish(remaining_contacts).isoformat(timespec="seconds"))
+
+
+def before_contact():
+    """Suspend at window close, even mid-batch if the batch ran longer than planned."""
+    schedule = _schedule()
+    if schedule is None:
+        return
+    schedule.observe_contact(current_shard())
+    _wait_until(schedule.earliest_start(datetime.now(), 0), "sending window")
+
+
+def cool_down(min_batch_delay: float, max_batch_delay: float, next_batch_size: int):
+    """
+    The pause between two batches. With sending windows, a closed period that
+    covers the cool-down counts as the cool-down: the next batch starts when
+    its window opens, not a cool-down after that.
+    """
+    schedule = _schedule()
+    if schedule is None or schedule.windows is None:
+        random_sleep(min_batch_delay, max_batch_delay, pausable=True)
+        return
+    rested = datetime.now() + timedelta(seconds=random.uniform(min_batch_delay, max_batch_delay))
+    _wait_until(schedule.earliest_start(rested, next_batch_size * schedule.contact_seconds), "cool-down")
@@ -1,13 +1,15 @@
 # backend/server.py
-from fastapi.staticfiles import StaticFiles
+import multiprocessing
+
+if __name__ == "__main__":
+    # The frozen executable is re-run as the media optimizer's worker processes; those stop here
+    multiprocessing.freeze_support()
+
 import uvicorn
 from main import app
 from config import Settings
 
-# Mount static files with correct relative path handling
-app.mount("/uploads", StaticFiles(directory=Settings.UPLOAD_DIR), name="uploads")
-app.mount("/thumbnails", StaticFiles(directory=Settings.THUMBNAIL_DIR), name="thumbnails")
+# /uploads and /thumbnails are mounted by main.py
 
 if __name__ == "__main__":
-    print("Starting FastAPI server...")
-    uvicorn.run(app, host="127.0.0.1", port=Settings.BACKEND_PORT)  # Change to 0.0.0.0 for broader access
\ No newline at end of file
+    uvicorn.run(app, host=Settings.BACKEND_BIND, port=Settings.BACKEND_PORT)  # WHATSAPP_BIND_HOST=0.0.0.0 for remote agents
\ No newline at end of file
@@ -0,0 +1,219 @@
+# backend/settings_store.py
+import dataclasses
+import json
+import logging
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, List, Optional
+
+from backend.config import Settings
+from backend.jobs import current_job
+from backend.phone import normalize
+from backend.scheduler import SendingWindows
+
+log = logging.getLogger(__name__)
+
+WATCH_INTERVAL = 1.0  # Seconds between checks of the settings file for edits made outside the API
+
+
+@dataclass(frozen=True)
+class OperatorSettings:
+    """
+    The settings operators change at runtime. Immutable: an update makes a new
+    instance, so a job's snapshot stays as it was when the job started.
+    """
+
+    admin_number: str = ""
+    min_batch_size: int = 15
+    max_batch_size: int = 35
+    min_batch_delay: int = 60  # Seconds of cool-down between two batches
+    max_batch_delay: int = 120
+    min_balance: int = 500  # Balances campaigns skip entries below this balance
+    history_skip_days: float = Settings.HISTORY_SKIP_DAYS
+    rate_limit_per_hour: int = Settings.RATE_LIMIT_PER_HOUR  # Default send budgets of the accounts (0 = no limit)
+    rate_limit_per_day: int = Settings.RATE_LIMIT_PER_DAY
+    sending_windows: List[str] = field(default_factory=lambda: list(Settings.SENDING_WINDOWS))
+
+    def __post_init__(self):
+        for f in dataclasses.fields(self):
+            value = getattr(self, f.name)
+            expected = {int: int, float: (int, float), str: str}.get(f.type, (list, tuple))
+            if not isinstance(value, expected) or isinstance(value, bool):
+                raise ValueError(f"{f.name} must be {getattr(f.type, '__name__', 'a list')}, got {value!r}")
+            if isinstance(value, (int, float)) and value < 0:
+                raise ValueError(f"{f.name} can't be negative")
+        if self.admin_number:
+            e164 = normalize(self.admin_number)
+            if e164 is None:
+                raise ValueError(f"{self.admin_number!r} is not a valid phone number")
+            object.__setattr__(self, "admin_number", e164)
+        if not 0 < self.min_batch_size <= self.max_batch_size:
+            raise ValueError("Batch sizes must be positive, the minimum at most the maximum")
+        if self.min_batch_delay > self.max_batch_delay:
+            raise ValueError("The minimum batch delay can't exceed the maximum")
+        if self.sending_windows:
+            SendingWindows.parse(self.sending_windows)  # Raises ValueError on a malformed window
+        object.__setattr__(self, "sending_windows", tuple(self.sending_windows))
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "OperatorSettings":
+        names = {f.name for f in dataclasses.fields(cls)}
+        unknown = set(data) - names
+        if unknown:
+            raise ValueError(f"Unknown settings: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    def pacing(self) -> dict:
+        return {
+            "min_batch_size": self.min_batch_size,
+            "max_batch_size": self.max_batch_size,
+            "min_batch_delay": self.min_batch_delay,
+            "max_batch_delay": self.max_batch_delay,
+        }
+
+    def to_dict(self) -> dict:
+        data = dataclasses.asdict(self)
+        data["sending_windows"] = list(self.sending_windows)
+        return data
+
+
+class SettingsStore:
+    """
+    OperatorSettings kept in memory and persisted to a JSON file. Reads never
+    touch the disk; a watcher thread reloads the file when it changes on disk
+    (a hand edit, a restore), and updates are written atomically. Each of
+    `change_hooks` is called with the settings whenever they are loaded or
+    changed, for state that lives outside any one job (the rate limits).
+    """
+
+    def __init__(self, settings_file, legacy_admin_file=None):
+        self.settings_file = Path(settings_file)
+        self.legacy_admin_file = Path(legacy_admin_file) if legacy_admin_file else None
+        self._current: Optional[OperatorSettings] = None
+        self._signature = None  # (mtime_ns, size) of the file the current settings were read from or written to
+        self._lock = threading.Lock()
+        self._watcher: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self.change_hooks: List[Callable[[OperatorSettings], None]] = []
+
+    def _stat(self):
+        try:
+            stat = self.settings_file.stat()
+        except FileNotFoundError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _read(self) -> OperatorSettings:
+        try:
+            with open(self.settings_file, "r", encoding="utf-8") as f:
+                return OperatorSettings.from_dict(json.load(f))
+        except FileNotFoundError:
+            return OperatorSettings(admin_number=self._legacy_admin_number())
+
+    def _legacy_admin_number(self) -> str:
+        """The admin number saved before this store existed (contacts/admin_number.json)."""
+        if self.legacy_admin_file is None:
+            return ""
+        try:
+            with open(self.legacy_admin_file, "r", encoding="utf-8") as f:
+                number = json.load(f).get("admin_number") or ""
+        except (OSError, ValueError, AttributeError):
+            return ""
+        return normalize(number) or ""
+
+    def _load(self) -> bool:
+        signature = self._stat()
+        try:
+            settings = self._read()
+        except (ValueError, TypeError) as e:
+            if self._current is None:
+                log.error("Ignoring invalid settings file %s: %s", self.settings_file, e)
+                settings = OperatorSettings()
+            else:
+                log.error("Keeping the current settings, %s is invalid: %s", self.settings_file, e)
+                self._signature = signature  # Don't report it again until it changes
+                return False
+        self._current, self._signature = settings, signature
+        return True
+
+    def get(self) -> OperatorSettings:
+        current = self._current
+        if current is None:
+            with self._lock:
+                loaded = self._current is None and self._load()
+                current = self._current
+            if loaded:
+                self._changed(current)
+        return current
+
+    def _changed(self, settings: OperatorSettings):
+        for hook in self.change_hooks:
+            try:
+                hook(settings)
+            except Exception as e:
+                log.exception("Settings change hook %s failed: %s", getattr(hook, "__name__", hook), e)
+
+    def update(self, **changes) -> OperatorSettings:
+        """Validate and persist `changes`; raises ValueError (and keeps the old settings) if they're invalid."""
+        with self._lock:
+            if self._current is None:
+                self._load()
+            settings = OperatorSettings.from_dict({**self._current.to_dict(), **changes})
+            self._write(settings)
+            self._current, self._signature = settings, self._stat()
+        log.info("Settings updated: %s", ", ".join(sorted(changes)))
+        self._changed(settings)
+        return settings
+
+    def _write(self, settings: OperatorSettings):
+        # Write to a temp file and swap it in, so a crash never leaves a half-written settings file
+        self.settings_file.parent.mkdir(parents=True, exist_ok=True)
+        temp_file = f"{self.settings_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(settings.to_dict(), f, indent=2)
+        os.replace(temp_file, self.settings_file)
+
+    def reload_if_changed(self) -> bool:
+        """Re-read the settings file if it changed since it was last read or written."""
+        with self._lock:
+            signature = self._stat()
+            if signature is None or signature == self._signature or not self._load():
+                return False
+            settings = self._current
+        log.info("Reloaded settings from %s", self.settings_file)
+        self._changed(settings)
+        return True
+
+    def start_watching(self):
+        if self._watcher is not None:
+            return
+        self.get()
+
+        def watch():
+            while not self._stop.wait(WATCH_INTERVAL):
+                try:
+                    self.reload_if_changed()
+                except Exception as e:
+                    log.exception("Settings watcher failed: %s", e)
+
+        self._stop.clear()
+        self._watcher = threading.Thread(target=watch, name="settings-watcher", daemon=True)
+        self._watcher.start()
+
+    def stop_watching(self):
+        self._stop.set()
+        if self._watcher is not None:
+            self._watcher.join()
+            self._watcher = None
+
+
+settings_store = SettingsStore(Settings.STATE_DIR / "settings.json", legacy_admin_file=Settings.ADMIN_NUMBER_FILE)
+
+
+def current_settings() -> OperatorSettings:
+    """The running job's settings snapshot (taken when it was created), else the current settings."""
+    job = current_job()
+    snapshot = getattr(job, "settings", None) if job is not None else None
+    return snapshot if snapshot is not None else settings_store.get()
@@ -0,0 +1,123 @@
+# backend/sharding.py
+import hashlib
+import logging
+import queue
+from typing import Callable, Dict, List, Optional
+
+from backend.campaign import attachment_campaign
+from backend.drivers import DesktopDriver
+from backend.jobs import JobCancelled, POLL_INTERVAL, checkpoint, current_job
+from backend.phone import contact_number
+from backend.rate_limit import rate_limiter
+
+log = logging.getLogger(__name__)
+
+
+class Account:
+    """
+    A WhatsApp account that can send on its own: a driver for its session plus
+    its own pacing and rate limits. Pacing values left as None fall back to the
+    campaign's, rate limits to the default ones (the operator settings).
+    """
+
+    def __init__(self, account_id: str, driver_factory: Callable, min_batch_size: Optional[int] = None,
+                 max_batch_size: Optional[int] = None, min_batch_delay: Optional[int] = None,
+                 max_batch_delay: Optional[int] = None, per_hour: Optional[int] = None,
+                 per_day: Optional[int] = None):
+        self.id = account_id
+        self.driver_factory = driver_factory
+        self.per_hour = per_hour
+        self.per_day = per_day
+        self.pacing = {
+            "min_batch_size": min_batch_size,
+            "max_batch_size": max_batch_size,
+            "min_batch_delay": min_batch_delay,
+            "max_batch_delay": max_batch_delay,
+        }
+
+    def to_dict(self) -> dict:
+        return {"id": self.id, "pacing": self.pacing, "rate_limits": rate_limiter.status(self.id)}
+
+
+accounts: Dict[str, Account] = {
+    "default": Account("default", DesktopDriver),
+}
+
+
+def register_account(account: Account) -> Account:
+    accounts[account.id] = account
+    rate_limiter.configure(account.id, account.per_hour, account.per_day)
+    return account
+
+
+def unregister_account(account_id: str):
+    if account_id != "default":
+        accounts.pop(account_id, None)
+
+
+def assign_account(number: str, account_ids: List[str]) -> str:
+    """
+    Pick the account that sends to `number` (rendezvous hashing). The same number
+    always lands on the same account, and adding or removing an account only moves
+    the contacts that belonged to it.
+    """
+    return max(account_ids, key=lambda account_id: hashlib.sha1(f"{account_id}:{number}".encode()).digest())
+
+
+def shard_contacts(data: List[dict], account_ids: List[str]) -> Dict[str, List[dict]]:
+    shards = {account_id: [] for account_id in account_ids}
+    for entry in data:
+        number = contact_number(entry) or str(entry.get("number"))
+        shards[assign_account(number, account_ids)].append(entry)
+    return shards
+
+
+def sharded_attachment_campaign(account_ids, data, media_paths, pdf_paths, admin_no, skip_recent_days=0, **pacing):
+    """
+    Split the contacts across `account_ids` and run one attachment campaign per
+    account in parallel. Yields the merged result records, each tagged with the
+    account that produced it.
+    """
+    job = current_job()
+    records = queue.Queue()
+    finished = object()
+    shards = shard_contacts(data, account_ids)
+
+    def run_shard(account, contacts):
+        try:
+            account_pacing = {key: value if value is not None else pacing.get(key)
+                              for key, value in account.pacing.items()}
+            account_pacing = {key: value for key, value in account_pacing.items() if value is not None}
+            for record in attachment_campaign(account.driver_factory(), contacts, media_paths, pdf_paths,
+                                              admin_no, account_id=account.id, skip_recent_days=skip_recent_days,
+                                              **account_pacing):
+                records.put({**record, "account": account.id})
+        except JobCancelled:
+            pass
+        except Exception as e:
+            log.exception("Shard %s failed: %s", account.id, e)
+            records.put({"status": "error", "account": account.id, "message": f"An exception occurred: {str(e)}"})
+        finally:
+            records.put(finished)
+
+    workers = [
+        job.spawn(run_shard, accounts[account_id], contacts, shard=account_id)
+        for account_id, contacts in shards.items() if contacts
+    ]
+
+    try:
+        remaining = len(workers)
+        while remaining:
+            checkpoint()
+            try:
+                record = records.get(timeout=POLL_INTERVAL)
+            except queue.Empty:
+                continue
+            if record is finished:
+                remaining -= 1
+            else:
+                yield record
+    finally:
+        # Workers notice a cancel within one poll interval; wait for them so the job is idle when it reports done
+        for worker in workers:
+            worker.join(timeout=5)
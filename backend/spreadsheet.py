@@ -0,0 +1,205 @@
+# backend/spreadsheet.py
+import codecs
+import csv
+import posixpath
+import re
+import zipfile
+from decimal import Decimal, InvalidOperation
+from pathlib import Path
+from typing import BinaryIO, Iterator, List
+from xml.etree.ElementTree import iterparse
+
+EXTENSIONS = (".csv", ".xlsx", ".ods")
+
+_XLSX = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+_REL = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}"
+_PACKAGE_REL = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+_TABLE = "{urn:oasis:names:tc:opendocument:xmlns:table:1.0}"
+_OFFICE = "{urn:oasis:names:tc:opendocument:xmlns:office:1.0}"
+_TEXT = "{urn:oasis:names:tc:opendocument:xmlns:text:1.0}"
+_COLUMN = re.compile(r"[A-Z]+")
+MAX_REPEAT = 1000  # ODS files declare the unused rest of the sheet as one cell/row repeated a million times
+
+
+def iter_rows(file: BinaryIO, filename: str) -> Iterator[List[str]]:
+    """
+    The rows of the first sheet of a CSV, XLSX or ODS file as lists of cell
+    text, streamed. Blank rows are skipped and trailing blank cells dropped.
+    Numbers keep all their digits: 9.23001234567E+11 in a cell reads as
+    "923001234567", as Excel shows it, never as a float.
+    """
+    extension = Path(filename or "").suffix.lower()
+    if extension == ".xlsx":
+        rows = _xlsx_rows(file)
+    elif extension == ".ods":
+        rows = _ods_rows(file)
+    elif extension in (".csv", ".txt", ""):
+        rows = _csv_rows(file)
+    elif extension == ".xls":
+        raise ValueError("Old .xls workbooks aren't supported, save the file as .xlsx or .csv")
+    else:
+        raise ValueError(f"Unsupported file type {extension}, expected one of: {', '.join(EXTENSIONS)}")
+    for row in rows:
+        while row and not row[-1]:
+            row.pop()
+        if row:
+            yield row
+
+
+def _csv_rows(file: BinaryIO) -> Iterator[List[str]]:
+    head = file.read(64 * 1024)
+    file.seek(0)
+    try:
+        head.decode("utf-8-sig")  # Only the start: a multi-byte character cut at the end is fine
+        encoding = "utf-8-sig"
+    except UnicodeDecodeError as e:
+        encoding = "utf-8-sig" if e.start > len(head) - 4 else "cp1252"  # Excel's "CSV" on Windows
+    reader = codecs.getreader(encoding)(file, errors="replace")
+    for row in csv.reader(reader):
+        yield [cell.strip() for cell in row]
+
+
+def _number_text(value: str) -> str:
+    """A numeric cell's text without float artifacts: "9.23001234567E+11" -> "923001234567", "500.0" -> "500"."""
+    if "E" not in value and "e" not in value and "." not in value:
+        return value
+    try:
+        number = Decimal(value)
+    except InvalidOperation:
+        return value
+    if number == number.to_integral_value():
+        return str(int(number))
+    return format(number.normalize(), "f")
+
+
+def _column_index(reference: str) -> int:
+    index = 0
+    for letter in _COLUMN.match(reference).group():
+        index = index * 26 + ord(letter) - 64
+    return index - 1
+
+
+def _parsed(file, tag: str, until: str = None):
+    """
+    The finished `tag` elements of an XML stream (up to the end of the first
+    `until` element), each detached from the tree once the caller is done with it.
+    """
+    stack = []
+    for event, element in iterparse(file, events=("start", "end")):
+        if event == "start":
+            stack.append(element)
+            continue
+        stack.pop()
+        if element.tag == until:
+            return
+        if element.tag == tag:
+            yield element
+            if stack:
+                stack[-1].remove(element)  # The parent's only child by now, so this is cheap
+
+
+def _first_sheet_path(archive: zipfile.ZipFile) -> str:
+    try:
+        with archive.open("xl/workbook.xml") as f:
+            sheet = next(element for _, element in iterparse(f) if element.tag == f"{_XLSX}sheet")
+        relation = sheet.get(f"{_REL}id")
+        with archive.open("xl/_rels/workbook.xml.rels") as f:
+            for _, element in iterparse(f):
+                if element.tag == f"{_PACKAGE_REL}Relationship" and element.get("Id") == relation:
+                    target = element.get("Target")
+                    return target.lstrip("/") if target.startswith("/") else posixpath.normpath(f"xl/{target}")
+    except (KeyError, StopIteration):
+        pass
+    return "xl/worksheets/sheet1.xml"
+
+
+def _string_item_text(item) -> str:
+    """Plain (<t>) or rich text (<r><t>) of a shared or inline string; phonetic hints (<rPh>) aren't part of it."""
+    text = []
+    for child in item:
+        if child.tag == f"{_XLSX}t":
+            text.append(child.text or "")
+        elif child.tag == f"{_XLSX}r":
+            text.append(child.findtext(f"{_XLSX}t") or "")
+    return "".join(text)
+
+
+def _shared_strings(archive: zipfile.ZipFile) -> List[str]:
+    try:
+        f = archive.open("xl/sharedStrings.xml")
+    except KeyError:
+        return []
+    with f:
+        return [_string_item_text(item) for item in _parsed(f, f"{_XLSX}si")]
+
+
+def _xlsx_rows(file: BinaryIO) -> Iterator[List[str]]:
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise ValueError("Not a valid .xlsx file")
+    with archive:
+        strings = _shared_strings(archive)
+        with archive.open(_first_sheet_path(archive)) as sheet:
+            for row in _parsed(sheet, f"{_XLSX}row"):
+                cells = []
+                for position, cell in enumerate(row.iter(f"{_XLSX}c")):
+                    reference = cell.get("r")
+                    index = _column_index(reference) if reference else position
+                    kind = cell.get("t", "n")
+                    value = cell.findtext(f"{_XLSX}v")
+                    if kind == "s":
+                        text = strings[int(value)] if value is not None else ""
+                    elif kind == "inlineStr":
+                        inline = cell.find(f"{_XLSX}is")
+                        text = _string_item_text(inline) if inline is not None else ""
+                    elif kind == "b":
+                        text = "TRUE" if value == "1" else "FALSE"
+                    elif kind == "n" and value is not None:
+                        text = _number_text(value)
+                    else:
+                        text = value or ""  # str (formula results) and e (errors) as written
+                    if index >= len(cells):
+                        cells.extend([""] * (index - len(cells) + 1))
+                    cells[index] = text.strip()
+                yield cells
+
+
+def _ods_text(element) -> str:
+    text = [element.text or ""]
+    for child in element:
+        if child.tag == f"{_TEXT}s":
+            text.append(" " * int(child.get(f"{_TEXT}c", "1")))  # Runs of spaces are stored as <text:s c="N"/>
+        else:
+            text.append(_ods_text(child))
+        text.append(child.tail or "")
+    return "".join(text)
+
+
+def _ods_cell_text(cell) -> str:
+    kind = cell.get(f"{_OFFICE}value-type")
+    if kind in ("float", "percentage", "currency"):
+        return _number_text(cell.get(f"{_OFFICE}value", ""))
+    if kind == "boolean":
+        return cell.get(f"{_OFFICE}boolean-value", "").upper()
+    return "\n".join(_ods_text(paragraph) for paragraph in cell.iter(f"{_TEXT}p"))
+
+
+def _ods_rows(file: BinaryIO) -> Iterator[List[str]]:
+    try:
+        archive = zipfile.ZipFile(file)
+    except zipfile.BadZipFile:
+        raise ValueError("Not a valid .ods file")
+    with archive, archive.open("content.xml") as content:
+        for element in _parsed(content, f"{_TABLE}table-row", until=f"{_TABLE}table"):  # The first sheet only
+            cells = []
+            for cell in element:
+                if cell.tag not in (f"{_TABLE}table-cell", f"{_TABLE}covered-table-cell"):
+                    continue
+                text = _ods_cell_text(cell).strip()
+                cells.extend([text] * min(int(cell.get(f"{_TABLE}number-columns-repeated", "1")), MAX_REPEAT))
+            while cells and not cells[-1]:
+                cells.pop()
+            if cells:
+                for _ in range(min(int(element.get(f"{_TABLE}number-rows-repeated", "1")), MAX_REPEAT)):
+                    yield list(cells)
@@ -0,0 +1,92 @@
+# backend/static.py
+import hashlib
+import os
+import stat
+import threading
+from collections import OrderedDict
+from typing import Tuple
+from urllib.parse import parse_qs
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+VERSION_LENGTH = 16  # Hex digits of the content hash used in ?v= URLs
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"  # May be stored, but must be revalidated with the ETag (a 304 costs no body)
+MAX_CACHED_HASHES = 1024
+
+_hashes: "OrderedDict[str, Tuple[Tuple[int, int], str]]" = OrderedDict()  # path -> ((mtime_ns, size), sha256)
+_hashes_lock = threading.Lock()
+
+
+def _stat_key(stat_result: os.stat_result) -> Tuple[int, int]:
+    return stat_result.st_mtime_ns, stat_result.st_size
+
+
+def remember_hash(path, file_hash: str):
+    """Record the SHA-256 of a file that was just written, so serving it never has to re-read it."""
+    key = _stat_key(os.stat(path))
+    with _hashes_lock:
+        _hashes[str(path)] = (key, file_hash)
+        _hashes.move_to_end(str(path))
+        while len(_hashes) > MAX_CACHED_HASHES:
+            _hashes.popitem(last=False)
+
+
+def content_hash(path, stat_result: os.stat_result = None) -> str:
+    """SHA-256 of the file, cached until its mtime or size changes."""
+    stat_result = stat_result or os.stat(path)
+    key = _stat_key(stat_result)
+    with _hashes_lock:
+        cached = _hashes.get(str(path))
+    if cached and cached[0] == key:
+        return cached[1]
+
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    file_hash = digest.hexdigest()
+    with _hashes_lock:
+        _hashes[str(path)] = (key, file_hash)
+        while len(_hashes) > MAX_CACHED_HASHES:
+            _hashes.popitem(last=False)
+    return file_hash
+
+
+def versioned_url(base_url: str, filename: str, file_hash: str) -> str:
+    """URL that names the file's content, so it can be cached forever (see CachedStaticFiles)."""
+    return f"{base_url}/{filename}?v={file_hash[:VERSION_LENGTH]}"
+
+
+class CachedStaticFiles(StaticFiles):
+    """
+    StaticFiles for files that never change once written. Responses carry a
+    strong, content-hash ETag. A URL whose `?v=` matches the content hash is
+    served as immutable; a plain URL must be revalidated, which costs a 304.
+    Range requests (video scrubbing) are served by FileResponse itself.
+    """
+
+    def lookup_path(self, path: str):
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result and stat.S_ISREG(stat_result.st_mode):
+            # Starlette runs this in the threadpool: hashing a file that isn't cached yet (every file after a
+            # restart, videos included) never blocks the event loop, and file_response finds the hash cached
+            content_hash(full_path, stat_result)
+        return full_path, stat_result
+
+    def file_response(self, full_path, stat_result: os.stat_result, scope, status_code: int = 200) -> Response:
+        file_hash = content_hash(full_path, stat_result)
+        version = parse_qs(scope.get("query_string", b"").decode("latin-1")).get("v", [""])[0]
+        versioned = len(version) >= 8 and file_hash.startswith(version)
+        cache_control = IMMUTABLE if versioned else REVALIDATE
+
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result, headers={
+            "etag": f'"{file_hash[:32]}"',
+            "cache-control": cache_control,
+        })
+        if self.is_not_modified(response.headers, Headers(scope=scope)):
+            return NotModifiedResponse(response.headers)
+        return response
+
@@ -0,0 +1,140 @@
+# backend/text_entry.py
+import logging
+import re
+from typing import List, Optional
+
+from backend.clipboard import clipboard
+from backend.config import Settings
+from backend.helper import random_sleep
+from backend.jobs import checkpoint
+from backend.metrics import DRIVER_ACTION_SECONDS, TEXT_ENTRY_RESULTS
+from backend.tracing import span
+
+log = logging.getLogger(__name__)
+
+TYPING_INTERVAL = 0.01  # Seconds between two typed keys
+CHUNK_CHARS = 20  # Typed text is sent in chunks of this many characters, so a long one can still be stopped
+TYPING_MAX_CHARS = CHUNK_CHARS  # Up to one chunk, typing is about as quick as a paste
+CHUNK_PAUSE = (0.05, 0.15)
+PASTE_PAUSE = (0.2, 0.5)  # Between putting the text on the clipboard and pasting it
+
+_SEND_KEYS_SPECIAL = re.compile(r"[{}]")
+
+
+class StrategyUnsupported(Exception):
+    """The message box doesn't offer what a strategy needs (such as a writable ValuePattern)."""
+
+
+class ValueInjection:
+    """Set the whole text at once through the box's UI Automation ValuePattern."""
+
+    name = "value"
+    action = "text_value"
+
+    def enter(self, box, text: str):
+        pattern = box.GetValuePattern()
+        if pattern is None or pattern.IsReadOnly:
+            raise StrategyUnsupported("the message box has no writable ValuePattern")
+        pattern.SetValue(text)
+
+
+class ClipboardPaste:
+    """Put the text on the clipboard and paste it; handles any length and script."""
+
+    name = "clipboard"
+    action = "text_paste"
+
+    def enter(self, box, text: str):
+        clipboard.put_text(text)
+        random_sleep(*PASTE_PAUSE)
+        box.SendKeys("{CTRL}v", waitTime=0)
+
+
+class ChunkedTyping:
+    """Type the text as key presses, CHUNK_CHARS at a time; new lines as Shift+Enter, since Enter sends."""
+
+    name = "typing"
+    action = "text_typing"
+
+    def enter(self, box, text: str):
+        for line_number, line in enumerate(text.split("\n")):
+            if line_number:
+                box.SendKeys("{SHIFT}{ENTER}", waitTime=0)
+            for start in range(0, len(line), CHUNK_CHARS):
+                checkpoint()
+                chunk = _SEND_KEYS_SPECIAL.sub(lambda m: "{" + m.group() + "}", line[start:start + CHUNK_CHARS])
+                box.SendKeys(chunk, interval=TYPING_INTERVAL, waitTime=0)
+                random_sleep(*CHUNK_PAUSE)
+
+
+STRATEGIES = {strategy.name: strategy for strategy in (ValueInjection(), ClipboardPaste(), ChunkedTyping())}
+
+
+def is_short_latin(text: str) -> bool:
+    return len(text) <= TYPING_MAX_CHARS and text.isascii() and "\n" not in text
+
+
+def plan(text: str, preferred: Optional[str] = None) -> List[str]:
+    """
+    The strategies to try for `text`, best first. Value injection is one call
+    whatever the length; of the others, typing is as quick as a paste for a
+    few words of Latin text and leaves the clipboard alone, while longer,
+    multi-line or Urdu text is pasted. `preferred` (default
+    Settings.TEXT_ENTRY, "auto" for none) goes first.
+    """
+    order = ["value", "typing", "clipboard"] if is_short_latin(text) else ["value", "clipboard", "typing"]
+    preferred = preferred or Settings.TEXT_ENTRY
+    if preferred in STRATEGIES:
+        order.remove(preferred)
+        order.insert(0, preferred)
+    return order
+
+
+def composed_text(box) -> Optional[str]:
+    """The text in the message box, None if it can't be read."""
+    for read in (lambda: box.GetValuePattern().Value, lambda: box.GetTextPattern().DocumentRange.GetText(-1)):
+        try:
+            return read()
+        except Exception:  # No such pattern (None), or the element went away
+            continue
+    return None
+
+
+def same_text(composed: str, text: str) -> bool:
+    # The box stores new lines as \r, and may drop trailing whitespace
+    return composed.replace("\r\n", "\n").replace("\r", "\n").strip() == text.replace("\r\n", "\n").strip()
+
+
+def clear(box):
+    box.SendKeys("{CTRL}a{DELETE}", waitTime=0)
+
+
+def compose(box, text: str, preferred: Optional[str] = None) -> Optional[str]:
+    """
+    Enter `text` into the message box with the first strategy (see plan) whose
+    result reads back as `text`, clearing the box after each one that doesn't.
+    Returns the strategy's name, or None when none produced the text: the
+    message must not be sent then. When the box can't be read back, the first
+    strategy that ran is trusted, as the driver did before it checked.
+    """
+    if composed_text(box):
+        clear(box)  # A draft left in the box would be sent along
+    for name in plan(text, preferred):
+        strategy = STRATEGIES[name]
+        try:
+            with DRIVER_ACTION_SECONDS.time(action=strategy.action), span(f"text_entry.{name}", length=len(text)):
+                strategy.enter(box, text)
+        except StrategyUnsupported as e:
+            log.debug("Not using %s text entry: %s", name, e)
+            continue
+        composed = composed_text(box)
+        if not composed and name != "value":
+            composed = None  # Some boxes read back empty whatever they hold: nothing to verify against
+        if composed is None or same_text(composed, text):
+            TEXT_ENTRY_RESULTS.inc(strategy=name, result="unverified" if composed is None else "verified")
+            return name
+        TEXT_ENTRY_RESULTS.inc(strategy=name, result="mismatch")
+        log.warning("Text entered by %s doesn't match the message (%d characters instead of %d), trying the next way",
+                    name, len(composed), len(text))
+        clear(box)
+    return None
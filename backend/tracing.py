@@ -0,0 +1,101 @@
+# backend/tracing.py
+import json
+import logging
+import os
+import threading
+import time
+from contextlib import nullcontext
+
+from backend.config import Settings
+from backend.jobs import current_job, finish_hooks
+from backend.metrics import TRACE_EVENTS_DROPPED
+
+log = logging.getLogger(__name__)
+
+_null_span = nullcontext()
+_pid = os.getpid()
+_named = threading.local()  # Which job this thread has already written its thread_name event for
+
+
+class Span:
+    """Records one complete ("X") Chrome trace event into the running job's buffer on exit."""
+
+    __slots__ = ("job", "name", "args", "started")
+
+    def __init__(self, job, name, args):
+        self.job = job
+        self.name = name
+        self.args = args
+
+    def __enter__(self):
+        self.started = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        ended = time.perf_counter_ns()
+        event = {
+            "name": self.name,
+            "ph": "X",
+            "ts": self.started // 1000,
+            "dur": (ended - self.started) // 1000,
+            "pid": _pid,
+            "tid": threading.get_ident(),
+        }
+        if self.args:
+            event["args"] = self.args
+        if exc_type is not None:
+            event.setdefault("args", {})["error"] = exc_type.__name__
+        # deque.append and next() on a count are atomic, shard threads can share the buffer; a full
+        # buffer drops its oldest span
+        self.job.trace_events.append(event)
+        next(self.job.trace_recorded)
+        return False
+
+
+def span(name: str, **args):
+    """
+    Time a block as a trace span of the running job. Returns a shared no-op
+    context manager when tracing is disabled or no job is running, so leaving
+    the calls in hot paths costs one attribute lookup.
+    """
+    if not Settings.TRACE_ENABLED:
+        return _null_span
+    job = current_job()
+    if job is None:
+        return _null_span
+    if getattr(_named, "job_id", None) != job.id:
+        _named.job_id = job.id
+        job.trace_threads[threading.get_ident()] = threading.current_thread().name
+    return Span(job, name, args)
+
+
+def trace_path(job_id: str):
+    return Settings.TRACE_DIR / f"{job_id}.json"
+
+
+def write_trace(job):
+    """Save a finished job's spans as a Chrome trace (chrome://tracing, ui.perfetto.dev), then free them."""
+    events = list(job.trace_events)
+    if not events:
+        return
+    dropped = next(job.trace_recorded) - 1 - len(events)
+    job.trace_events.clear()  # Finished jobs stay in memory a while, their spans don't need to
+    if dropped:
+        TRACE_EVENTS_DROPPED.inc(dropped)
+        log.warning("Trace of job %s is missing its first %d spans, the buffer keeps %d", job.id, dropped,
+                    job.trace_events.maxlen)
+    threads = [{"name": "thread_name", "ph": "M", "pid": _pid, "tid": tid, "args": {"name": name}}
+               for tid, name in job.trace_threads.items()]
+    try:
+        Settings.TRACE_DIR.mkdir(parents=True, exist_ok=True)
+        with open(trace_path(job.id), "w", encoding="utf-8") as f:
+            json.dump({
+                "traceEvents": threads + events,
+                "displayTimeUnit": "ms",
+                "otherData": {"job_id": job.id, "kind": job.kind, "status": job.status, "dropped_spans": dropped},
+            }, f)
+    except OSError as e:
+        log.error("Could not write trace for job %s: %s", job.id, e)
+
+
+finish_hooks.append(write_trace)
@@ -0,0 +1,130 @@
+# backend/wait_model.py
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Tuple
+
+from backend.config import Settings
+
+MB = 1024 * 1024
+DECAY = 0.9  # Weight of the older observations at each new one: the model follows WhatsApp getting faster/slower
+SAFETY_FACTOR = 1.3  # The fallback waits this much longer than the typical time, plus SAFETY_MARGIN
+SAFETY_MARGIN = 0.4
+MIN_WAIT = 0.5
+MAX_WAIT = 120.0
+MIN_OBSERVATIONS = 3
+
+# (seconds, seconds per MB) before anything has been measured, close to the old fixed waits
+PRIORS: Dict[str, Tuple[float, float]] = {
+    "image_ready": (2.0, 0.05),
+    "video_ready": (2.5, 0.08),
+    "document_ready": (2.0, 0.05),
+    "image_sent": (1.0, 0.02),
+    "video_sent": (2.0, 0.08),
+    "document_sent": (1.0, 0.02),
+}
+
+
+class LinearFit:
+    """Exponentially weighted least squares of seconds against file size in MB."""
+
+    def __init__(self, weight=0.0, sum_x=0.0, sum_y=0.0, sum_xx=0.0, sum_xy=0.0, observations=0):
+        self.weight = weight
+        self.sum_x = sum_x
+        self.sum_y = sum_y
+        self.sum_xx = sum_xx
+        self.sum_xy = sum_xy
+        self.observations = observations
+
+    def add(self, size_mb: float, seconds: float):
+        self.weight = self.weight * DECAY + 1
+        self.sum_x = self.sum_x * DECAY + size_mb
+        self.sum_y = self.sum_y * DECAY + seconds
+        self.sum_xx = self.sum_xx * DECAY + size_mb * size_mb
+        self.sum_xy = self.sum_xy * DECAY + size_mb * seconds
+        self.observations += 1
+
+    def coefficients(self, prior: Tuple[float, float]) -> Tuple[float, float]:
+        """(intercept, slope), or the prior until there are enough observations."""
+        if self.observations < MIN_OBSERVATIONS:
+            return prior
+        mean_x = self.sum_x / self.weight
+        mean_y = self.sum_y / self.weight
+        variance = self.sum_xx / self.weight - mean_x * mean_x
+        if variance < 1e-6:
+            # All files about the same size so far: keep the prior's slope, fit only the intercept
+            slope = prior[1]
+        else:
+            slope = max((self.sum_xy / self.weight - mean_x * mean_y) / variance, 0.0)
+        return max(mean_y - slope * mean_x, 0.0), slope
+
+    def to_dict(self) -> dict:
+        return dict(self.__dict__)
+
+
+class WaitModel:
+    """
+    How long an attachment takes to become ready in WhatsApp's preview, and to
+    be sent, by file type and size. Learned from the timings the driver
+    measures when it can see the UI, and used as the wait when it can't.
+    Persisted to STATE_DIR so it survives restarts.
+    """
+
+    def __init__(self, state_file):
+        self.state_file = state_file
+        self.fits: Dict[str, LinearFit] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.state_file, "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return
+        self.fits = {key: LinearFit(**fit) for key, fit in state.items()}
+
+    def _save(self):
+        state = {key: fit.to_dict() for key, fit in self.fits.items()}
+        Path(self.state_file).parent.mkdir(parents=True, exist_ok=True)
+        temp_file = f"{self.state_file}.tmp"
+        with open(temp_file, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+        os.replace(temp_file, self.state_file)
+
+    def typical(self, kind: str, phase: str, size_bytes: int) -> float:
+        """The expected seconds for `phase` ("ready" or "sent") of a `kind` file of `size_bytes`."""
+        key = f"{kind}_{phase}"
+        with self._lock:
+            fit = self.fits.get(key, LinearFit())
+            intercept, slope = fit.coefficients(PRIORS[key])
+        return intercept + slope * size_bytes / MB
+
+    def predict(self, kind: str, phase: str, size_bytes: int) -> float:
+        """A safe wait for when the UI can't be watched: the typical time plus a margin."""
+        wait = self.typical(kind, phase, size_bytes) * SAFETY_FACTOR + SAFETY_MARGIN
+        return min(max(wait, MIN_WAIT), MAX_WAIT)
+
+    def observe(self, kind: str, phase: str, size_bytes: int, seconds: float):
+        with self._lock:
+            self.fits.setdefault(f"{kind}_{phase}", LinearFit()).add(size_bytes / MB, seconds)
+            try:
+                self._save()
+            except OSError:
+                pass  # Learning is best effort
+
+    def status(self) -> Dict[str, dict]:
+        status = {}
+        for key in PRIORS:
+            kind, phase = key.split("_")
+            base = self.typical(kind, phase, 0)
+            status[key] = {
+                "observations": self.fits[key].observations if key in self.fits else 0,
+                "seconds": round(base, 2),
+                "seconds_per_mb": round(self.typical(kind, phase, MB) - base, 3),
+            }
+        return status
+
+
+wait_model = WaitModel(Settings.STATE_DIR / "wait_model.json")
@@ -0,0 +1,33 @@
+# backend/warmup.py
+import importlib
+import logging
+import sys
+import threading
+import time
+
+log = logging.getLogger(__name__)
+
+# Heavy modules the backend only imports inside the functions that need them, so the
+# server answers its health check before they are loaded
+WARM_MODULES = ["pandas", "cv2", "PIL.Image"]
+if sys.platform == "win32":
+    WARM_MODULES += ["win32clipboard", "uiautomation", "pyperclip", "backend.whatsapp_controller_after_update",
+                     "backend.whatsapp_controler"]
+
+
+def warm_up(modules=None):
+    """Import the heavy modules one by one, so the first request that needs them doesn't pay for it."""
+    for name in modules or WARM_MODULES:
+        started = time.perf_counter()
+        try:
+            importlib.import_module(name)
+        except Exception as e:
+            log.warning("Could not preload %s: %s", name, e)
+            continue
+        log.debug("Preloaded %s in %.0f ms", name, (time.perf_counter() - started) * 1000)
+
+
+def start_warm_up() -> threading.Thread:
+    thread = threading.Thread(target=warm_up, name="warm-up", daemon=True)
+    thread.start()
+    return thread
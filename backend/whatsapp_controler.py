@@ -1,11 +1,17 @@
+import logging
 import uiautomation as auto
 from time import sleep
 import sys
-import pandas as pd
 from backend.config import Settings
 import pyperclip
 from backend.helper import random_sleep, human_typing
-from backend.whatsapp_controller_after_update import send_message_clipboard, open_chat_with_number
+from backend.phone import national_number, normalize
+from backend.whatsapp_controller_after_update import send_text_message, open_chat_with_number
+
+log = logging.getLogger(__name__)
+
+# The upload folder is typed into the file dialog's address bar once per session; it remembers it after that
+_upload_dir_added = False
 
 def open_whatsapp():
     try:
@@ -18,7 +24,7 @@ def open_whatsapp():
         window = auto.WindowControl(searchDepth=1, ClassName="ApplicationFrameWindow", Name="WhatsApp")
         return window
     except Exception as e:
-        print(f"[ERROR]: Unable to launch WhatsApp: {e}")
+        log.error("Unable to launch WhatsApp: %s", e)
         sys.exit(1)
 
 def check_whatsapp_focus(window):
@@ -29,11 +35,11 @@ def check_whatsapp_focus(window):
             random_sleep(0.5, 1.0)
             return True
         else:
-            print("[ERROR]: WhatsApp window is not in focus.")
+            log.error("WhatsApp window is not in focus.")
             return False
     
     except Exception as e:
-        print(f"[ERROR]: Failed to check window focus: {e}")
+        log.error("Failed to check window focus: %s", e)
         return False
 
 def number_search(window, number):
@@ -45,7 +51,7 @@ def number_search(window, number):
             new_chat_button.Click()
             random_sleep(0.8, 1.8)
         else:
-            print("[ERROR]: Could not find 'New Chat' button.")
+            log.error("Could not find 'New Chat' button.")
             return False
 
         # Open phone number input
@@ -55,7 +61,7 @@ def number_search(window, number):
             dial_pad_button.Click()
             random_sleep(0.5, 1.0)
         else:
-            print("[ERROR]: Could not find dial pad button.")
+            log.error("Could not find dial pad button.")
             return False
         
         # Enter phone number (human typing)
@@ -67,7 +73,7 @@ def number_search(window, number):
             human_typing(phone_number_textbox, number)
             random_sleep(0.7, 1.0)
         else:
-            print("[ERROR]: Could not find phone number text box.")
+            log.error("Could not find phone number text box.")
             return False
 
         # Click chat
@@ -78,13 +84,13 @@ def number_search(window, number):
             random_sleep(1.2, 1.8)
             return True
         else:
-            print(f"[ERROR]: Could not find or initiate chat with {number}.")
+            log.error("Could not find or initiate chat with %s.", number)
             auto.SendKeys('{ESC}' * 2)
             random_sleep(0.8, 1.3)
             return "Invalid Number"
                 
     except Exception as e:
-        print(f"[ERROR]: Unable to search for number: {e}")
+        log.error("Unable to search for number: %s", e)
         return False
 
 
@@ -106,7 +112,7 @@ def send_message(window, message):
                 message_field.SendKeys('{SHIFT}{ENTER}')
                 random_sleep(0.3, 0.9)
         else:
-            print("[ERROR]: Could not find message text field.")
+            log.error("Could not find message text field.")
             return False
         
         send_button = window.ButtonControl(AutomationId="RightButton", Name="Send message")
@@ -116,11 +122,11 @@ def send_message(window, message):
             random_sleep(0.8, 1.3)
             return True
         else:
-            print("[ERROR]: Could not find 'Send' button.")
+            log.error("Could not find 'Send' button.")
             return False
 
     except Exception as e:
-        print(f"[ERROR]: Unable to send message: {e}")
+        log.error("Unable to send message: %s", e)
         return False
 
 def send_defaulters_to_admin(no_number, invalid_number, batch_no, admin_no):
@@ -132,7 +138,7 @@ def send_defaulters_to_admin(no_number, invalid_number, batch_no, admin_no):
             if batch_no:    
                 invalid_number_message += f"\nBatch {batch_no}"
             
-            send_message_clipboard(no_number_message)
+            send_text_message(no_number_message)
 
         if invalid_number:
             invalid_number_message = f"Invalid Number Report (Total: {len(invalid_number)}):"
@@ -141,22 +147,23 @@ def send_defaulters_to_admin(no_number, invalid_number, batch_no, admin_no):
             if batch_no:
                 invalid_number_message += f"\nBatch {batch_no}"
 
-            send_message_clipboard(invalid_number_message)
+            send_text_message(invalid_number_message)
             
         if not no_number and not invalid_number:
             message = f"All Processed and No Defaulters were found!\nBatch {batch_no}"
             
-            send_message_clipboard(message)
+            send_text_message(message)
             return True
 
     else:
-        print("[ERROR]: Could not find admin number.")
+        log.error("Could not find admin number.")
         
 def load_numbers_from_csv_due_bill(file_path):
+    import pandas as pd
     try:
         df = pd.read_csv(file_path, header=None)
         if df.shape[1] < 3:
-            print("[ERROR]: CSV file must have at least three columns: Name, Number, and Balance!")
+            log.error("CSV file must have at least three columns: Name, Number, and Balance!")
             sys.exit(1)
         names = df[0].tolist()
         balances = df[1].astype(int).tolist()
@@ -164,11 +171,12 @@ def load_numbers_from_csv_due_bill(file_path):
 
         return names, numbers, balances
     except Exception as e:
-        print(f"[ERROR]: Unable to read CSV file: {e}")
+        log.error("Unable to read CSV file: %s", e)
         sys.exit(1)
         
 
 def read_numbers_from_csv_attachment(numbers_file_path):
+    import pandas as pd
     try:
         df = pd.read_csv(numbers_file_path, dtype={"Number": str}, header=0)
         numbers = df["Number"].astype(str).tolist()
@@ -176,30 +184,23 @@ def read_numbers_from_csv_attachment(numbers_file_path):
         
         names = [name if name else f"Name_{i+1}" for i, name in enumerate(names)]
         
-        def clean_number(number):
-            if number.startswith("+92"):
-                return number[3:]
-            elif number.startswith("92"):
-                return number[2:]
-            if number.startswith("0"):
-                number = number[1:]
-            return number
-
-        numbers = [clean_number(number) for number in numbers]
+        # Without the country code, as typed into the dial pad
+        numbers = [national_number(normalize(number) or number) for number in numbers]
         
         return numbers, names
 
     except Exception as e:
-        print(f"[ERROR]: Unable to read CSV file: {e}")
+        log.error("Unable to read CSV file: %s", e)
         sys.exit(1)
 
 
 def file_dialog_controller(attachment_paths_string):
+    global _upload_dir_added
     try:
         file_dialog = auto.WindowControl(searchDepth=2)
-        if Settings.FILE_DIALOG_INITIAL_STEP:
+        if not _upload_dir_added:
             add_folder_address(Settings.UPLOAD_DIR)
-            Settings.FILE_DIALOG_INITIAL_STEP = False
+            _upload_dir_added = True
             
         sleep(1)
         if file_dialog.Exists(5):
@@ -216,17 +217,17 @@ def file_dialog_controller(attachment_paths_string):
                     random_sleep(1.5, 2.5)
                     return True
                 else:
-                    print("[ERROR]: Could not find the 'Open' button in the file dialog.")
+                    log.error("Could not find the 'Open' button in the file dialog.")
                     return False
             else:
-                print("[ERROR]: Could not find the file input field in the file dialog.")
+                log.error("Could not find the file input field in the file dialog.")
                 return False
         else:
-            print("[ERROR]: File selection dialog did not appear.")
+            log.error("File selection dialog did not appear.")
             return False
         
     except Exception as e:
-        print(f"[ERROR]: An error occurred: {e}")
+        log.error("An error occurred: %s", e)
 
 def close_file_dialog():
     try:
@@ -238,7 +239,7 @@ def close_file_dialog():
             if cancel_button.Exists(2):
                 cancel_button.Click()
                 random_sleep(1.0, 1.5)
-                print("[INFO]: File dialog closed using 'Cancel' button.")
+                log.info("File dialog closed using 'Cancel' button.")
                 return True
 
             # If "Cancel" is not available, try closing with the 'X' button
@@ -248,21 +249,21 @@ def close_file_dialog():
                 random_sleep(1.0, 1.5)
                 return True
             
-            print("[ERROR]: Could not find 'Cancel' or 'Close' button.")
+            log.error("Could not find 'Cancel' or 'Close' button.")
             return False
         else:
-            print("[ERROR]: File dialog is not open.")
+            log.error("File dialog is not open.")
             return False
 
     except Exception as e:
-        print(f"[ERROR]: An error occurred while closing the file dialog: {e}")
+        log.error("An error occurred while closing the file dialog: %s", e)
         return False
     
 def add_folder_address(folder_path):
     try:
         file_dialog = auto.WindowControl(Name="Open", searchDepth=2)
         if not file_dialog.Exists(5):
-            print("[ERROR]: File dialog not found")
+            log.error("File dialog not found")
             return False
 
         file_dialog.SetActive()
@@ -290,7 +291,7 @@ def add_folder_address(folder_path):
         return True
 
     except Exception as e:
-        print(f"[ERROR]: An error occurred while adding folder address: {e}")
+        log.error("An error occurred while adding folder address: %s", e)
         return False
 
 def send_image_attachments(window, image_attachment_paths):
@@ -309,7 +310,7 @@ def send_image_attachments(window, image_attachment_paths):
             attachment_field.Click()
             random_sleep(0.8, 1.6)
         else:
-            print("[ERROR]: Could not find attachment field.")
+            log.error("Could not find attachment field.")
             return False
         
         image_attachment_field = window.TextControl(Name="Photos & videos", AutomationId="TextBlock")    
@@ -336,14 +337,14 @@ def send_image_attachments(window, image_attachment_paths):
                 return True
                 
             else:
-                print("[ERROR]: Could not find image attachment field.")
+                log.error("Could not find image attachment field.")
                 return False
         else:
             close_file_dialog()
             return False
         
     except Exception as e:
-        print(f"[ERROR]: Unable to send image attachments: {e}")
+        log.error("Unable to send image attachments: %s", e)
         return False
     
 def send_pdf_attachments(window, pdf_attachment_paths):
@@ -361,7 +362,7 @@ def send_pdf_attachments(window, pdf_attachment_paths):
             attachment_field.Click()
             random_sleep(0.8, 1.6)
         else:
-            print("[ERROR]: Could not find attachment field.")
+            log.error("Could not find attachment field.")
             return False
 
         file_attachment_field = window.TextControl(
@@ -375,7 +376,7 @@ def send_pdf_attachments(window, pdf_attachment_paths):
             file_attachment_field.Click()
             random_sleep(0.8, 1.5)
         else:
-            print("[ERROR]: Could not find document option.")
+            log.error("Could not find document option.")
             return False
 
         file_dialog = file_dialog_controller(pdf_attachment_paths_string)
@@ -393,14 +394,14 @@ def send_pdf_attachments(window, pdf_attachment_paths):
                 random_sleep(2.0, 4.0)
                 return True
             else:
-                print("[ERROR]: Could not find send button.")
+                log.error("Could not find send button.")
                 return False
 
         close_file_dialog()
         return False
 
     except Exception as e:
-        print(f"[ERROR]: Unable to send pdf attachments: {e}")
+        log.error("Unable to send pdf attachments: %s", e)
         return False
 
 def close_whatsapp():
@@ -412,7 +413,7 @@ def close_whatsapp():
             window = None
             return window
     except Exception as e:
-        print(f"[ERROR]: Unable to close WhatsApp: {e}")
+        log.error("Unable to close WhatsApp: %s", e)
         return False
 
 # def start_sending_dues(window, file_path):
@@ -1,64 +1,157 @@
+import logging
 import uiautomation as auto
-from backend.helper import random_sleep, copy_file_to_clipboard
+from backend.attachments import attachment_kind, group_kind, paste_groups
+from backend.helper import random_sleep, copy_file_to_clipboard, copy_files_to_clipboard, wait_exists, wait_until
+from backend.jobs import checkpoint
+from backend.metrics import ATTACHMENT_SECONDS, DRIVER_ACTION_SECONDS
+from backend.text_entry import compose
+from backend.tracing import span
+from backend.wait_model import wait_model
 import os
-import pyperclip
+import time
 
+log = logging.getLogger(__name__)
+
+
+def send_keys(keys):
+    with span("SendKeys", keys=keys):
+        auto.SendKeys(keys)
 
 def number_validity(wa_window):
-    ok_btn = wa_window.ButtonControl(Name='OK')
-    if ok_btn.Exists(3):
-        random_sleep(0.3, 0.6)
-        ok_btn.Click()
-        random_sleep(0.3, 0.6)
-        return False
-    
-    return True
+    with DRIVER_ACTION_SECONDS.time(action="validity_check"), span("number_validity"):
+        ok_btn = wa_window.ButtonControl(Name='OK')
+        if wait_exists(ok_btn, 3):
+            random_sleep(0.3, 0.6)
+            ok_btn.Click()
+            random_sleep(0.3, 0.6)
+            return False
+        
+        return True
 
 def open_chat_with_number(number):
+    with DRIVER_ACTION_SECONDS.time(action="open_chat"), span("open_chat_with_number", number=number):
+        url = f"whatsapp://send?phone={number}"
+        os.startfile(url)
+        random_sleep(1.0, 2.0)
 
-    url = f"whatsapp://send?phone={number}"
-    os.startfile(url)
-    random_sleep(1.0, 2.0)
-
-    # Detect WhatsApp window
-    wa_window = auto.WindowControl(ClassName='WinUIDesktopWin32WindowClass', Name='WhatsApp')
-    if not wa_window.Exists(10):
-        return "WhatsApp not detected"
+        # Detect WhatsApp window
+        wa_window = auto.WindowControl(ClassName='WinUIDesktopWin32WindowClass', Name='WhatsApp')
+        if not wait_exists(wa_window, 10):
+            return "WhatsApp not detected"
 
-    random_sleep(0.5, 1.0)
+        random_sleep(0.5, 1.0)
 
     if not number_validity(wa_window):
         return "Invalid Number"
  
     return True
 
-def send_message_clipboard(message):
-    random_sleep(1.0, 2.5)
+class FocusedInput:
+    """Stands in for a message box that can't be found: keys go to whatever has the focus, nothing can be read back."""
+
+    def SendKeys(self, keys, interval=0.01, waitTime=0):
+        with span("SendKeys", keys=keys[:20]):
+            auto.SendKeys(keys, interval=interval, waitTime=waitTime)
+
+    def GetValuePattern(self):
+        return None
 
-    # Copy message to clipboard
-    pyperclip.copy(message)
-    random_sleep(0.2, 0.5)
+    def GetTextPattern(self):
+        return None
 
-    # Paste from clipboard
-    auto.SendKeys('{CTRL}v')
+def message_box():
+    wa_window = auto.WindowControl(ClassName='WinUIDesktopWin32WindowClass', Name='WhatsApp')
+    box = wa_window.EditControl(AutomationId="InputBarTextBox")
+    return box if box.Exists(0, 0) else FocusedInput()
+
+def send_text_message(message):
     random_sleep(1.0, 2.5)
 
-    # Send message
-    auto.SendKeys('{ENTER}')
+    # Typed, pasted or set at once depending on the message, and checked before it is sent
+    strategy = compose(message_box(), message)
+    if strategy is None:
+        log.error("The composed text didn't match the message (%d characters), not sending it", len(message))
+        return False
     random_sleep(1.0, 2.5)
 
+    with DRIVER_ACTION_SECONDS.time(action="send"):
+        # Send message
+        send_keys('{ENTER}')
+        random_sleep(1.0, 2.5)
+
     return True
 
+DETECTION_PATIENCE = 3  # Once the preview has been seen, wait up to this many times the learned fallback for it
+
+# Per attachment kind: whether the preview's Send button has ever been seen ready, so the
+# driver knows if it is worth waiting longer than the fallback for it
+preview_detectable = {}
+
+def never():
+    return False
+
+def wait_for_attachment(kind, phase, size, predicate, watch=True):
+    """
+    Wait for `predicate` (the preview being ready, or gone once sent) and return
+    (seconds waited, whether it was seen, the fallback wait). Falls back to the learned wait for this kind and size
+    when the UI doesn't show it in time; measured timings teach the model. With `watch` false the UI can't
+    tell (the preview was never seen, so its Send button being absent means nothing): the fallback is waited out.
+    """
+    fallback = wait_model.predict(kind, phase, size)
+    timeout = fallback * DETECTION_PATIENCE if watch and preview_detectable.get(kind) else fallback
+    started = time.perf_counter()
+    detected = wait_until(predicate if watch else never, timeout, interval=0.1)
+    seconds = time.perf_counter() - started
+    if detected:
+        if phase == "ready":
+            preview_detectable[kind] = True
+        wait_model.observe(kind, phase, size, seconds)
+    ATTACHMENT_SECONDS.observe(seconds, kind=kind, phase=phase, source="detected" if detected else "model")
+    return seconds, detected, fallback
+
+def copy_to_clipboard(file_paths):
+    if len(file_paths) == 1 and attachment_kind(file_paths[0]) == "image":
+        copy_file_to_clipboard(file_paths[0])  # A single image pastes as a bitmap, as before
+    else:
+        copy_files_to_clipboard(file_paths)
+
 def send_attachment_clipboard(file_paths):
     random_sleep(1.0, 2.5)
-    
-    for file_path in file_paths:
-        copy_file_to_clipboard(file_path)
-        random_sleep(1.0, 2.0)
-        auto.SendKeys('{CTRL}v')
-        random_sleep(2.7, 4.0)
-        auto.SendKeys('{ENTER}')
-        random_sleep(1.5, 3.0)
+    wa_window = auto.WindowControl(ClassName='WinUIDesktopWin32WindowClass', Name='WhatsApp')
+    # Shown by the attachment preview, enabled once the files have loaded; gone when they were sent
+    send_button = wa_window.ButtonControl(AutomationId="SubmitButton", Name="Send message")
+
+    def preview_ready():
+        return send_button.Exists(0, 0) and send_button.IsEnabled
+
+    def preview_closed():
+        return not send_button.Exists(0, 0)
+
+    for group in paste_groups(file_paths):
+        checkpoint()
+        kind = group_kind(group)
+        size = sum(os.path.getsize(file_path) for file_path in group)
+
+        with DRIVER_ACTION_SECONDS.time(action="attachment_paste"):
+            copy_to_clipboard(group)
+            random_sleep(0.4, 0.9)
+            send_keys('{CTRL}v')
+            with span("attachment_ready", kind=kind, files=len(group), size=size):
+                ready_seconds, ready_detected, ready_fallback = wait_for_attachment(kind, "ready", size, preview_ready)
+            random_sleep(0.3, 0.8)  # A person glances at the preview before sending
+        with DRIVER_ACTION_SECONDS.time(action="send"):
+            send_keys('{ENTER}')
+            with span("attachment_sent", kind=kind, files=len(group), size=size):
+                # Only a preview seen ready can be seen closing: if UIA never found its Send button, it's "closed" at once
+                sent_seconds, sent_detected, sent_fallback = wait_for_attachment(kind, "sent", size, preview_closed,
+                                                                                 watch=ready_detected)
+            random_sleep(0.5, 1.2)
+
+        log.info(
+            "Attachments %s (%s, %.1f MB): ready after %.2f s (%s, fallback %.2f s), sent after %.2f s (%s, fallback %.2f s)",
+            ", ".join(os.path.basename(file_path) for file_path in group), kind, size / (1024 * 1024),
+            ready_seconds, "detected" if ready_detected else "not detected", ready_fallback,
+            sent_seconds, "detected" if sent_detected else "not detected", sent_fallback
+        )
 
     return True
-    
\ No newline at end of file
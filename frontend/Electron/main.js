@@ -239,11 +239,14 @@ async function startBackend() {
     });
   } else {
     // Production: Start packaged backend
-    if (app.isPackaged) {
-      backendPath = path.join(process.resourcesPath, 'backend.exe');
-    } else {
-      backendPath = path.join(__dirname, '..', '..', 'backend', 'dist', 'backend.exe');
-    }
+    // Prefer the onedir build (backend/backend.exe), which starts without unpacking itself first
+    const backendRoot = app.isPackaged
+      ? process.resourcesPath
+      : path.join(__dirname, '..', '..', 'backend', 'dist');
+    backendPath = [
+      path.join(backendRoot, 'backend', 'backend.exe'),
+      path.join(backendRoot, 'backend.exe')
+    ].find((candidate) => fs.existsSync(candidate)) || path.join(backendRoot, 'backend', 'backend.exe');
 
     if (!fs.existsSync(backendPath)) {
       console.error('Backend executable not found:', backendPath);
@@ -766,7 +766,7 @@ const handleDownloadReport = () => {
                 <TabsList className="grid grid-cols-2 gap-4 mb-6">
                   <TabsTrigger value="upload" className="flex items-center space-x-2">
                     <Upload className="h-4 w-4" />
-                    <span>Upload CSV</span>
+                    <span>Upload Contacts</span>
                   </TabsTrigger>
                   <TabsTrigger value="saved" className="flex items-center space-x-2">
                     <Database className="h-4 w-4" />
@@ -783,9 +783,9 @@ const handleDownloadReport = () => {
                           <p className="mb-2 text-sm text-gray-500">
                             <span className="font-semibold">Click to upload</span> or drag and drop
                           </p>
-                          <p className="text-xs text-gray-500">CSV file with name and number columns</p>
+                          <p className="text-xs text-gray-500">CSV, XLSX or ODS file with name and number columns</p>
                         </div>
-                        <input ref={csvInputRef} type="file" className="hidden" accept=".csv" onChange={handleCSVUpload} />
+                        <input ref={csvInputRef} type="file" className="hidden" accept=".csv,.xlsx,.ods" onChange={handleCSVUpload} />
                       </label>
                     </div>
                   </div>
@@ -392,12 +392,12 @@ const handleSendMessages = async () => {
                           <path stroke="currentColor" strokeLinecap="round" strokeLinejoin="round" strokeWidth="2" d="M13 13h3a3 3 0 0 0 0-6h-.025A5.56 5.56 0 0 0 16 6.5 5.5 5.5 0 0 0 5.207 5.021C5.137 5.017 5.071 5 5 5a4 4 0 0 0 0 8h2.167M10 15V6m0 0L8 8m2-2 2 2"/>
                         </svg>
                         <p className="mb-2 text-sm text-gray-500"><span className="font-semibold">Click to upload</span> or drag and drop</p>
-                        <p className="text-xs text-gray-500">CSV file only</p>
+                        <p className="text-xs text-gray-500">CSV, XLSX or ODS file</p>
                       </div>
                       <input 
                         type="file" 
                         className="hidden" 
-                        accept=".csv"
+                        accept=".csv,.xlsx,.ods"
                         onChange={handleFileUpload}
                       />
                     </label>
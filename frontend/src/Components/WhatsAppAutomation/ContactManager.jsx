@@ -427,13 +427,13 @@ const ContactManager = ({ state, updateState }) => {
                         <p className="mb-2 text-sm text-gray-500">
                           <span className="font-semibold">Click to upload</span> or drag and drop
                         </p>
-                        <p className="text-xs text-gray-500">CSV file with Name and Number columns</p>
+                        <p className="text-xs text-gray-500">CSV, XLSX or ODS file with Name and Number columns</p>
                       </div>
                       <input 
                         ref={csvInputRef} 
                         type="file" 
                         className="hidden" 
-                        accept=".csv" 
+                        accept=".csv,.xlsx,.ods" 
                         onChange={handleCSVUpload} 
                       />
                     </label>
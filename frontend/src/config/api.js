@@ -29,6 +29,13 @@ export const API_ENDPOINTS = {
     REMOVE: (filename) => `${API_BASE_URL}/pdf/remove?filename=${filename}`,
   },
   STOP: `${API_BASE_URL}/stop/`,
+  JOBS: {
+    LIST: `${API_BASE_URL}/jobs/`,
+    STATUS: (jobId) => `${API_BASE_URL}/jobs/${jobId}`,
+    CANCEL: (jobId) => `${API_BASE_URL}/jobs/${jobId}/cancel`,
+    PAUSE: (jobId) => `${API_BASE_URL}/jobs/${jobId}/pause`,
+    RESUME: (jobId) => `${API_BASE_URL}/jobs/${jobId}/resume`,
+  },
 };
 
 export default API_BASE_URL;